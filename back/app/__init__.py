@@ -7,8 +7,16 @@ from app.api.tasks import views as tasks_routes
 from app.api.users import views as users_routes
 from app.api.auth import views as auth_routes
 from app.lib.database.init import init_mongodb
+from app.lib.database.cli import indexes_cli
+from app.lib.mailcli import mail_cli
+from app.lib.taskscli import tasks_cli
+from app.lib.metrics import init_metrics
+from app.lib.compression import init_compression
 from app.config import config_by_name
 from app.lib.redis.init import init_redis
+from app.lib.redis.blocklist import TokenBlocklist
+from app.lib.users import UserService
+from bson.errors import InvalidId
 
 import logging
 
@@ -25,32 +33,56 @@ def create_app(config_name="development"):
     # Enable CORS
     CORS(app, resources={r"/*": {"origins": "*"}})
 
-    mongo = init_mongodb(app)
-    redis_client = init_redis(configuration)
+    # Latência e status por rota, exportados em /metrics
+    if configuration.METRICS_ENABLED:
+        init_metrics(app)
+
+    # gzip/brotli conforme o Accept-Encoding, para respostas grandes
+    if configuration.COMPRESSION_ENABLED:
+        init_compression(app, configuration)
+
+    init_mongodb(app)
+    init_redis(configuration)
 
     # Configuração JWT
     app.config["JWT_SECRET_KEY"] = configuration.JWT_SECRET_KEY
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = configuration.JWT_ACCESS_TOKEN_EXPIRES
+    # Sem isso, o Flask-RESTful responde 500 aos erros do flask_jwt_extended
+    # (ex.: token revogado) em vez de deixá-los para os handlers de 401
+    app.config["PROPAGATE_EXCEPTIONS"] = True
 
     jwt = JWTManager(app)
+    blocklist = TokenBlocklist(configuration)
+    # Mesma instância (e near-cache) no logout e nas estatísticas
+    app.blocklist = blocklist
 
-    # Configuração do callback do JWT para verificar Token no Redis
+    # Configuração do callback do JWT para verificar Token no Redis, com
+    # near-cache local (ver TokenBlocklist)
     @jwt.token_in_blocklist_loader
     def check_if_token_is_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload["jti"]
-        token_in_redis = redis_client.get(f"blocklist:{jti}")
-        return token_in_redis is not None
+        return blocklist.is_revoked(jwt_payload["jti"])
 
-    # Configuração do callback do JWT para adicionar claims ao token
+    # Mesma configuração da aplicação, e não a da variável ENV
+    users = UserService(configuration)
+
+    # Configuração do callback do JWT para adicionar claims ao token, a partir
+    # do perfil em cache (o identity é o _id do usuário em texto)
     @jwt.additional_claims_loader
     def add_claims_to_access_token(identity):
-        user = mongo.get_collection("users").find_one({"_id": identity})
-        if user:
-            return {"username": user["username"], "email": user["email"]}
+        try:
+            profile = users.get_profile(identity)
+        except InvalidId:
+            return {}
+        if profile:
+            return users.claims(profile)
         return {}
 
     api = Api(app)
     tasks_routes.init_routes(api)
     users_routes.init_routes(api)
     auth_routes.init_routes(api)
+
+    app.cli.add_command(indexes_cli)
+    app.cli.add_command(mail_cli)
+    app.cli.add_command(tasks_cli)
     return app
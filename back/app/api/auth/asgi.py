@@ -0,0 +1,248 @@
+import functools
+import time
+import traceback
+import uuid
+import logging
+
+from bson import ObjectId
+from starlette.endpoints import HTTPEndpoint
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from .models import PasswordResetModel
+from app.lib.database.asyncmongodb import AsyncMongoDB
+from app.lib.mail import build_password_reset_message
+from app.lib.mailqueue import QUEUE_KEY, MailQueue
+from app.lib.passwords import BUSY_RESPONSE, PasswordHasher, PasswordHasherBusy
+from app.lib.redis.asyncrediscache import AsyncRedisCache
+from app.lib.redis.asyncratelimit import AsyncRateLimiter
+from app.lib.redis.blocklist import CHANNEL, TokenBlocklist
+from app.lib.redis.ratelimit import limited_response
+from app.lib.redis.usercache import UserCache
+from app.lib.tokens import InvalidToken, create_access_token, decode_access_token
+
+logger = logging.getLogger(__name__)
+
+RESET_MESSAGE = (
+    "Se seu email estiver registrado, você receberá um link para redefinir sua senha"
+)
+
+
+def jwt_required(handler):
+    """
+    Equivalente assíncrono do ``jwt_required`` do flask_jwt_extended: valida
+    o token, consulta a blocklist e disponibiliza as claims em
+    ``request.state.jwt``.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(self, request):
+        try:
+            claims = decode_access_token(
+                request.app.state.config, request.headers.get("Authorization")
+            )
+        except InvalidToken as e:
+            return JSONResponse({"msg": str(e)}, 401)
+        if await is_revoked(request.app.state.config, claims["jti"]):
+            return JSONResponse({"msg": "Token has been revoked"}, 401)
+        request.state.jwt = claims
+        return await handler(self, request)
+
+    return wrapper
+
+
+async def is_revoked(config, jti):
+    """Consulta a blocklist pelo near-cache do processo e, em miss, no Redis"""
+    blocklist = TokenBlocklist(config)
+    revoked = blocklist.lookup(jti)
+    if revoked is None:
+        redis = AsyncRedisCache(config)
+        revoked = await redis.redis_client.exists(blocklist.key(jti)) > 0
+        blocklist.remember(jti, revoked)
+    return revoked
+
+
+def busy_response():
+    body, status, headers = BUSY_RESPONSE
+    return JSONResponse(body, status, headers=headers)
+
+
+async def rate_limited(request, rule, email):
+    """Resposta 429 se o IP ou o email excederam o limite de tentativas"""
+    ip = request.client.host if request.client else None
+    limiter = AsyncRateLimiter(config=request.app.state.config)
+    retry_after = await limiter.hit(rule, ip=ip, email=email)
+    if retry_after:
+        body, status, headers = limited_response(retry_after)
+        return JSONResponse(body, status, headers=headers)
+    return None
+
+
+class LoginResource(HTTPEndpoint):
+    async def post(self, request):
+        try:
+            data = await request.json()
+            email = data.get("email")
+            password = data.get("password")
+
+            if not email or not password:
+                return JSONResponse({"message": "Email e senha são obrigatórios"}, 400)
+
+            # Limite de tentativas, antes de consultar o usuário e a senha
+            limited = await rate_limited(request, "login", email)
+            if limited:
+                return limited
+
+            config = request.app.state.config
+            collection = AsyncMongoDB(config).get_collection("users")
+            user = await collection.find_one(
+                {"email": email}, {"password": 1, "email": 1, "username": 1}
+            )
+
+            if not user:
+                return JSONResponse({"message": "Email ou senha inválidos"}, 401)
+
+            hasher = PasswordHasher(config)
+            if not await hasher.verify_async(password, user["password"]):
+                return JSONResponse({"message": "Email ou senha inválidos "}, 401)
+
+            # Atualiza o hash se o custo configurado mudou
+            if hasher.needs_rehash(user["password"]):
+                await collection.update_one(
+                    {"_id": user["_id"]},
+                    {"$set": {"password": await hasher.hash_async(password)}},
+                )
+
+            user_id = str(user["_id"])
+            claims = {"username": user["username"], "email": user["email"]}
+            access_token = create_access_token(config, user_id, claims)
+
+            return JSONResponse(
+                {
+                    "access_token": access_token,
+                    "user": {
+                        "id": user_id,
+                        "email": user["email"],
+                        "username": user["username"],
+                    },
+                },
+                200,
+            )
+        except PasswordHasherBusy:
+            return busy_response()
+        except Exception as e:
+            return JSONResponse({"message": f"Erro ao fazer login: {str(e)}"}, 500)
+
+
+class LogoutResource(HTTPEndpoint):
+    @jwt_required
+    async def post(self, request):
+        try:
+            config = request.app.state.config
+            token = request.state.jwt
+            blocklist = TokenBlocklist(config)
+            expires_in = max(int(token["exp"] - time.time()), 1)
+
+            pipe = AsyncRedisCache(config).pipeline()
+            pipe.setex(blocklist.key(token["jti"]), expires_in, "1")
+            pipe.publish(CHANNEL, token["jti"])
+            await pipe.execute()
+            blocklist.remember(token["jti"], True)
+
+            return JSONResponse({"message": "Logout realizado com sucesso"}, 200)
+        except Exception as e:
+            return JSONResponse({"message": f"Erro ao fazer logout: {str(e)}"}, 500)
+
+
+class BlocklistStatsResource(HTTPEndpoint):
+    @jwt_required
+    async def get(self, request):
+        """Contadores do near-cache da blocklist neste processo"""
+        return JSONResponse(TokenBlocklist(request.app.state.config).stats(), 200)
+
+
+class PasswordResetRequestResource(HTTPEndpoint):
+    async def post(self, request):
+        try:
+            data = await request.json()
+            email = data.get("email")
+
+            if not email:
+                return JSONResponse({"message": "Email é obrigatório"}, 400)
+
+            PasswordResetModel(email=email)
+
+            # Limite de tentativas, antes de consultar o usuário e enviar email
+            limited = await rate_limited(request, "password_reset", email)
+            if limited:
+                return limited
+
+            config = request.app.state.config
+            collection = AsyncMongoDB(config).get_collection("users")
+            user = await collection.find_one({"email": email}, {"_id": 1})
+
+            if not user:
+                # Não revelamos se o email existe ou não por razões de segurança
+                return JSONResponse({"message": RESET_MESSAGE}, 200)
+
+            reset_token = str(uuid.uuid4())
+            redis = AsyncRedisCache(config)
+            await redis.set(
+                f"password_reset:{reset_token}",
+                str(user["_id"]),
+                "PASSWORD_RESET_TOKEN_EXPIRES",
+            )
+
+            # Enfileira o email para o dispatcher (``flask mail worker``)
+            message = build_password_reset_message(config, email, reset_token)
+            job = MailQueue.job(email, message.as_string())
+            await redis.redis_client.rpush(QUEUE_KEY, redis.serialize(job))
+
+            return JSONResponse({"message": RESET_MESSAGE}, 200)
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return JSONResponse(
+                {"message": f"Erro ao solicitar redefinição de senha: {str(e)}"}, 500
+            )
+
+
+class PasswordResetResource(HTTPEndpoint):
+    async def post(self, request):
+        try:
+            token = request.path_params["token"]
+            data = await request.json()
+            password = data.get("password")
+
+            if not password:
+                return JSONResponse({"message": "Nova senha é obrigatória"}, 400)
+
+            config = request.app.state.config
+            redis = AsyncRedisCache(config)
+            redis_key = f"password_reset:{token}"
+            user_id = await redis.get(redis_key)
+
+            if not user_id:
+                return JSONResponse({"message": "Token inválido ou expirado"}, 400)
+
+            hashed_password = await PasswordHasher(config).hash_async(password)
+
+            await AsyncMongoDB(config).get_collection("users").update_one(
+                {"_id": ObjectId(user_id)}, {"$set": {"password": hashed_password}}
+            )
+            # Remove o token e o perfil em cache (ver UserCache)
+            await redis.redis_client.delete(redis_key, UserCache.profile_key(user_id))
+
+            return JSONResponse({"message": "Senha redefinida com sucesso"}, 200)
+        except PasswordHasherBusy:
+            return busy_response()
+        except Exception as e:
+            return JSONResponse({"message": f"Erro ao redefinir senha: {str(e)}"}, 500)
+
+
+routes = [
+    Route("/api/auth/login", LoginResource),
+    Route("/api/auth/logout", LogoutResource),
+    Route("/api/auth/blocklist/stats", BlocklistStatsResource),
+    Route("/api/auth/reset-password", PasswordResetRequestResource),
+    Route("/api/auth/reset-password/{token}", PasswordResetResource),
+]
@@ -1,6 +1,6 @@
+import time
 import uuid
-import bcrypt
-from flask import request
+from flask import current_app, request
 from flask_restful import Resource
 from flask_jwt_extended import create_access_token, get_jwt, jwt_required
 from bson import ObjectId
@@ -8,6 +8,10 @@ from ...lib import mail
 from .models import PasswordResetModel
 from app.lib.database.mongodb import MongoDB
 from app.lib.redis.rediscache import RedisCache
+from app.lib.redis.ratelimit import RateLimiter, limited_response
+from app.lib.redis.usercache import UserCache
+from app.lib.passwords import BUSY_RESPONSE, PasswordHasher, PasswordHasherBusy
+from app.lib.users import UserService
 import traceback
 import logging
 
@@ -18,6 +22,9 @@ class LoginResource(Resource):
     def __init__(self, **kwargs):
         self.db = MongoDB()
         self.redis = RedisCache()
+        self.hasher = PasswordHasher()
+        self.limiter = RateLimiter(self.redis)
+        self.users = UserService()
         self.collection = self.db.get_collection("users")
 
     def post(self):
@@ -29,18 +36,34 @@ class LoginResource(Resource):
             if not email or not password:
                 return {"message": "Email e senha são obrigatórios"}, 400
 
+            # Limite de tentativas, antes de consultar o usuário e a senha
+            retry_after = self.limiter.hit("login", ip=request.remote_addr, email=email)
+            if retry_after:
+                return limited_response(retry_after)
+
             # Buscar usuário no MongoDB
-            user = self.collection.find_one({"email": email})
+            user = self.collection.find_one(
+                {"email": email},
+                {"password": 1, "email": 1, "username": 1, "created_at": 1},
+            )
 
             if not user:
                 return {"message": "Email ou senha inválidos"}, 401
 
             # Verificar senha
-            if not bcrypt.checkpw(
-                password.encode("utf-8"), user["password"].encode("utf-8")
-            ):
+            if not self.hasher.verify(password, user["password"]):
                 return {"message": "Email ou senha inválidos "}, 401
 
+            # Atualiza o hash se o custo configurado mudou
+            if self.hasher.needs_rehash(user["password"]):
+                self.collection.update_one(
+                    {"_id": user["_id"]},
+                    {"$set": {"password": self.hasher.hash(password)}},
+                )
+
+            # O perfil em cache é usado nas claims do token (sem nova leitura)
+            self.users.cache_profile(user)
+
             # Criar token JWT com identity sendo o ID do usuário em string
             user_id = str(user["_id"])
             access_token = create_access_token(identity=user_id)
@@ -53,6 +76,8 @@ class LoginResource(Resource):
                     "username": user["username"],
                 },
             }, 200
+        except PasswordHasherBusy:
+            return BUSY_RESPONSE
         except Exception as e:
             return {"message": f"Erro ao fazer login: {str(e)}"}, 500
 
@@ -67,10 +92,11 @@ class LogoutResource(Resource):
     def post(self):
         try:
             # Obter o JTI (JWT ID) para blocklist
-            jti = get_jwt()["jti"]
+            token = get_jwt()
 
-            # Armazenar JTI no Redis com TTL igual ao tempo de expiração do token
-            self.redis.set(f"blocklist:{jti}", "1")
+            # Armazenar JTI no Redis com TTL igual ao tempo restante do token
+            # e avisar os demais processos
+            current_app.blocklist.revoke(token["jti"], token["exp"] - time.time())
 
             return {"message": "Logout realizado com sucesso"}, 200
         except Exception as e:
@@ -81,6 +107,7 @@ class PasswordResetRequestResource(Resource):
     def __init__(self, **kwargs):
         self.db = MongoDB()
         self.redis = RedisCache()
+        self.limiter = RateLimiter(self.redis)
         self.collection = self.db.get_collection("users")
 
     def post(self):
@@ -94,8 +121,15 @@ class PasswordResetRequestResource(Resource):
             # Validar dados com Pydantic
             user = PasswordResetModel(email=email)
 
+            # Limite de tentativas, antes de consultar o usuário e enviar email
+            retry_after = self.limiter.hit(
+                "password_reset", ip=request.remote_addr, email=email
+            )
+            if retry_after:
+                return limited_response(retry_after)
+
             # Buscar usuário no MongoDB
-            user = self.collection.find_one({"email": email})
+            user = self.collection.find_one({"email": email}, {"_id": 1})
 
             if not user:
                 # Não revelamos se o email existe ou não por razões de segurança
@@ -111,8 +145,8 @@ class PasswordResetRequestResource(Resource):
             redis_key = f"password_reset:{reset_token}"
             self.redis.set(redis_key, user_id, "PASSWORD_RESET_TOKEN_EXPIRES")
 
-            # Enviar email
-            if mail.send_password_reset_email(email, reset_token):
+            # Enfileirar email (enviado pelo dispatcher de emails)
+            if mail.queue_password_reset_email(email, reset_token):
                 return {
                     "message": "Se seu email estiver registrado, você receberá um link para redefinir sua senha"
                 }, 200
@@ -128,6 +162,7 @@ class PasswordResetResource(Resource):
     def __init__(self, **kwargs):
         self.db = MongoDB()
         self.redis = RedisCache()
+        self.hasher = PasswordHasher()
         self.collection = self.db.get_collection("users")
 
     def post(self, token):
@@ -146,23 +181,30 @@ class PasswordResetResource(Resource):
                 return {"message": "Token inválido ou expirado"}, 400
 
             # Hash da nova senha
-            hashed_password = bcrypt.hashpw(
-                password.encode("utf-8"), bcrypt.gensalt()
-            ).decode("utf-8")
+            hashed_password = self.hasher.hash(password)
 
             # Atualizar senha no MongoDB
             self.collection.update_one(
                 {"_id": ObjectId(user_id)}, {"$set": {"password": hashed_password}}
             )
 
-            # Remover token do Redis
-            self.redis.delete(redis_key)
+            # Remover token do Redis e o perfil em cache
+            self.redis.mdelete(redis_key, UserCache.profile_key(user_id))
 
             return {"message": "Senha redefinida com sucesso"}, 200
+        except PasswordHasherBusy:
+            return BUSY_RESPONSE
         except Exception as e:
             return {"message": f"Erro ao redefinir senha: {str(e)}"}, 500
 
 
+class BlocklistStatsResource(Resource):
+    @jwt_required()
+    def get(self):
+        """Contadores do near-cache da blocklist neste processo"""
+        return current_app.blocklist.stats(), 200
+
+
 def init_routes(api):
     api.add_resource(
         LoginResource,
@@ -172,6 +214,10 @@ def init_routes(api):
         LogoutResource,
         "/api/auth/logout",
     )
+    api.add_resource(
+        BlocklistStatsResource,
+        "/api/auth/blocklist/stats",
+    )
     api.add_resource(
         PasswordResetRequestResource,
         "/api/auth/reset-password",
@@ -0,0 +1,197 @@
+import logging
+import traceback
+
+from bson.errors import InvalidId
+from starlette.convertors import Convertor, register_url_convertor
+from starlette.endpoints import HTTPEndpoint
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import parse_etags, quote_etag
+
+from app.api.auth.asgi import jwt_required
+from app.api.tasks.models import TaskModel, TaskUpdateModel
+from app.api.tasks.views import TaskIdConverter
+from app.lib.asynctasks import AsyncTaskService
+
+logger = logging.getLogger(__name__)
+
+
+def _int_arg(request, name):
+    """Equivalente a ``request.args.get(name, type=int)`` do Flask"""
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+class TaskIdConvertor(Convertor):
+    """Id de tarefa na URL, exceto as rotas fixas (ver ``TaskIdConverter``)"""
+
+    regex = TaskIdConverter.regex
+
+    def convert(self, value):
+        return value
+
+    def to_string(self, value):
+        return str(value)
+
+
+register_url_convertor("task_id", TaskIdConvertor())
+
+
+class TaskView(HTTPEndpoint):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task_service = AsyncTaskService(self.scope["app"].state.config)
+
+    @jwt_required
+    async def get(self, request):
+        user_id = request.state.jwt["sub"]
+        task_id = request.path_params.get("task_id")
+        if task_id:
+            try:
+                task = await self.task_service.get_task(user_id, task_id)
+                if task:
+                    return JSONResponse(task, 200)
+                return JSONResponse({"message": "Tarefa não encontrada"}, 404)
+            except InvalidId:
+                return JSONResponse({"message": "ID de tarefa inválido"}, 400)
+        # Requisição condicional: responde 304 apenas com a versão, sem
+        # consultar o MongoDB nem o cache de tarefas
+        version = await self.task_service.get_tasks_version(user_id)
+        headers = {
+            "ETag": quote_etag(version, weak=True),
+            "Cache-Control": "private, no-cache",
+        }
+        if parse_etags(request.headers.get("if-none-match")).contains_weak(version):
+            return Response(status_code=304, headers=headers)
+        try:
+            args = request.query_params
+            if args.get("stream", "").lower() in ("1", "true"):
+                # Todas as tarefas, enviadas em blocos à medida que são lidas
+                chunks = self.task_service.stream_tasks(
+                    user_id,
+                    status=args.get("status"),
+                    due_before=args.get("due_before"),
+                    due_after=args.get("due_after"),
+                    sort=args.get("sort"),
+                    fields=args.get("fields"),
+                )
+                return StreamingResponse(
+                    chunks, media_type="application/json", headers=headers
+                )
+            page = await self.task_service.get_all_tasks(
+                user_id,
+                limit=_int_arg(request, "limit"),
+                cursor=args.get("cursor"),
+                status=args.get("status"),
+                due_before=args.get("due_before"),
+                due_after=args.get("due_after"),
+                sort=args.get("sort"),
+                fields=args.get("fields"),
+            )
+            return JSONResponse(page, 200, headers=headers)
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, 400)
+
+    @jwt_required
+    async def post(self, request):
+        try:
+            task = TaskModel(**await request.json())
+            created_task = await self.task_service.create_task(
+                request.state.jwt["sub"], task
+            )
+            return JSONResponse(created_task.model_dump(), 201)
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return JSONResponse({"message": f"Erro ao criar tarefa: {str(e)}"}, 400)
+
+    @jwt_required
+    async def put(self, request):
+        try:
+            task_update = TaskUpdateModel(**await request.json())
+            updated_task = await self.task_service.update_task(
+                request.state.jwt["sub"], request.path_params["task_id"], task_update
+            )
+            if updated_task:
+                return JSONResponse(updated_task, 200)
+            return JSONResponse({"message": "Tarefa não encontrada"}, 404)
+        except InvalidId:
+            return JSONResponse({"message": "ID de tarefa inválido"}, 400)
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return JSONResponse({"message": f"Erro ao atualizar tarefa: {str(e)}"}, 400)
+
+    @jwt_required
+    async def delete(self, request):
+        try:
+            if await self.task_service.delete_task(
+                request.state.jwt["sub"], request.path_params["task_id"]
+            ):
+                return JSONResponse({"message": "Tarefa excluída com sucesso"}, 200)
+            return JSONResponse({"message": "Tarefa não encontrada"}, 404)
+        except InvalidId:
+            return JSONResponse({"message": "ID de tarefa inválido"}, 400)
+        except Exception as e:
+            return JSONResponse({"message": f"Erro ao excluir tarefa: {str(e)}"}, 400)
+
+
+class TaskSearchView(HTTPEndpoint):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task_service = AsyncTaskService(self.scope["app"].state.config)
+
+    @jwt_required
+    async def get(self, request):
+        try:
+            page = await self.task_service.search_tasks(
+                request.state.jwt["sub"],
+                request.query_params.get("q"),
+                limit=_int_arg(request, "limit"),
+                cursor=request.query_params.get("cursor"),
+            )
+            return JSONResponse(page, 200)
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, 400)
+
+
+class TaskStatsView(HTTPEndpoint):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task_service = AsyncTaskService(self.scope["app"].state.config)
+
+    @jwt_required
+    async def get(self, request):
+        stats = await self.task_service.get_task_stats(request.state.jwt["sub"])
+        return JSONResponse(stats, 200)
+
+
+class TaskBulkView(HTTPEndpoint):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task_service = AsyncTaskService(self.scope["app"].state.config)
+
+    @jwt_required
+    async def post(self, request):
+        try:
+            data = await request.json()
+            results = await self.task_service.bulk_tasks(
+                request.state.jwt["sub"], data.get("operations")
+            )
+            return JSONResponse({"results": results}, 200)
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, 400)
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return JSONResponse(
+                {"message": f"Erro ao processar lote de tarefas: {str(e)}"}, 400
+            )
+
+
+routes = [
+    Route("/api/tasks", TaskView),
+    Route("/api/tasks/bulk", TaskBulkView),
+    Route("/api/tasks/search", TaskSearchView),
+    Route("/api/tasks/stats", TaskStatsView),
+    Route("/api/tasks/{task_id:task_id}", TaskView),
+]
@@ -3,40 +3,87 @@ import logging
 logger = logging.getLogger(__name__)
 from datetime import datetime
 
-from flask import request
+from flask import Response, request
 from flask_restful import Resource
 from bson.errors import InvalidId
+from werkzeug.http import quote_etag
+from werkzeug.routing import BaseConverter
 
 from app.api.tasks.models import TaskModel, TaskUpdateModel
 from app.lib.tasks import TaskService
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import traceback
 
-task_service = TaskService()
+# Rotas fixas sob /api/tasks, que não são ids de tarefa
+RESERVED_PATHS = ("bulk", "search", "stats")
+
+
+class TaskIdConverter(BaseConverter):
+    """
+    Id de tarefa na URL: qualquer segmento, exceto as rotas fixas. Sem isso,
+    um método não aceito por elas (ex.: GET /api/tasks/bulk) cairia em
+    /api/tasks/<task_id> com um id inválido, em vez de receber 405.
+    """
+
+    regex = rf"(?!(?:{'|'.join(RESERVED_PATHS)})$)[^/]+"
 
 
 class TaskView(Resource):
+    def __init__(self):
+        self.task_service = TaskService()
 
     @jwt_required()
     def get(self, task_id=None):
         if task_id:
             try:
-                task = task_service.get_task(task_id)
+                task = self.task_service.get_task(task_id)
                 if task:
                     return task, 200
                 return {"message": "Tarefa não encontrada"}, 404
             except InvalidId:
                 return {"message": "ID de tarefa inválido"}, 400
         else:
-            tasks = task_service.get_all_tasks()
-            return tasks, 200
+            # Requisição condicional: responde 304 apenas com a versão, sem
+            # consultar o MongoDB nem o cache de tarefas
+            version = self.task_service.get_tasks_version()
+            headers = {
+                "ETag": quote_etag(version, weak=True),
+                "Cache-Control": "private, no-cache",
+            }
+            if request.if_none_match.contains_weak(version):
+                return None, 304, headers
+            try:
+                if request.args.get("stream", "").lower() in ("1", "true"):
+                    # Todas as tarefas, enviadas em blocos à medida que são lidas
+                    chunks = self.task_service.stream_tasks(
+                        status=request.args.get("status"),
+                        due_before=request.args.get("due_before"),
+                        due_after=request.args.get("due_after"),
+                        sort=request.args.get("sort"),
+                        fields=request.args.get("fields"),
+                    )
+                    return Response(
+                        chunks, mimetype="application/json", headers=headers
+                    )
+                page = self.task_service.get_all_tasks(
+                    limit=request.args.get("limit", type=int),
+                    cursor=request.args.get("cursor"),
+                    status=request.args.get("status"),
+                    due_before=request.args.get("due_before"),
+                    due_after=request.args.get("due_after"),
+                    sort=request.args.get("sort"),
+                    fields=request.args.get("fields"),
+                )
+                return page, 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
 
     @jwt_required()
     def post(self):
         try:
             task_data = request.get_json()
             task = TaskModel(**task_data)
-            created_task = task_service.create_task(task)
+            created_task = self.task_service.create_task(task)
             return created_task.model_dump(), 201
         except Exception as e:
             logger.error(traceback.format_exc())
@@ -47,7 +94,7 @@ class TaskView(Resource):
         try:
             task_data = request.get_json()
             task_update = TaskUpdateModel(**task_data)
-            updated_task = task_service.update_task(task_id, task_update)
+            updated_task = self.task_service.update_task(task_id, task_update)
 
             if updated_task:
                 return updated_task, 200
@@ -65,7 +112,7 @@ class TaskView(Resource):
     @jwt_required()
     def delete(self, task_id):
         try:
-            if task_service.delete_task(task_id):
+            if self.task_service.delete_task(task_id):
                 return {"message": "Tarefa excluída com sucesso"}, 200
             return {"message": "Tarefa não encontrada"}, 404
         except InvalidId:
@@ -74,9 +121,56 @@ class TaskView(Resource):
             return {"message": f"Erro ao excluir tarefa: {str(e)}"}, 400
 
 
+class TaskSearchView(Resource):
+    def __init__(self):
+        self.task_service = TaskService()
+
+    @jwt_required()
+    def get(self):
+        try:
+            page = self.task_service.search_tasks(
+                request.args.get("q"),
+                limit=request.args.get("limit", type=int),
+                cursor=request.args.get("cursor"),
+            )
+            return page, 200
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+
+class TaskStatsView(Resource):
+    def __init__(self):
+        self.task_service = TaskService()
+
+    @jwt_required()
+    def get(self):
+        return self.task_service.get_task_stats(), 200
+
+
+class TaskBulkView(Resource):
+    def __init__(self):
+        self.task_service = TaskService()
+
+    @jwt_required()
+    def post(self):
+        try:
+            data = request.get_json()
+            results = self.task_service.bulk_tasks(data.get("operations"))
+            return {"results": results}, 200
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return {"message": f"Erro ao processar lote de tarefas: {str(e)}"}, 400
+
+
 def init_routes(api):
+    api.app.url_map.converters["task_id"] = TaskIdConverter
     api.add_resource(
         TaskView,
         "/api/tasks",
-        "/api/tasks/<task_id>",
+        "/api/tasks/<task_id:task_id>",
     )
+    api.add_resource(TaskBulkView, "/api/tasks/bulk")
+    api.add_resource(TaskSearchView, "/api/tasks/search")
+    api.add_resource(TaskStatsView, "/api/tasks/stats")
@@ -2,48 +2,87 @@ from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
-import bcrypt
-from .models import UserModel, UserResponse
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .models import UserModel
 from app.lib.database.mongodb import MongoDB
 from app.lib.redis.rediscache import RedisCache
+from app.lib.passwords import BUSY_RESPONSE, PasswordHasher, PasswordHasherBusy
+from app.lib.users import UserService
+
+# Mensagens para violações dos índices únicos de "users", por campo
+DUPLICATE_MESSAGES = {
+    "email": "Este email já está em uso",
+    "username": "Este nome de usuário já está em uso",
+}
+
+
+def duplicate_response(error: DuplicateKeyError):
+    """
+    Resposta para uma violação de índice único. O campo vem de ``keyPattern``
+    nos detalhes do erro ou, na falta deles, do nome do índice na mensagem
+    (ex.: "email_unique").
+    """
+    fields = list((error.details or {}).get("keyPattern") or {})
+    if not fields:
+        fields = [f for f in DUPLICATE_MESSAGES if f"{f}_unique" in str(error)]
+    for field in fields:
+        if field in DUPLICATE_MESSAGES:
+            return {"message": DUPLICATE_MESSAGES[field]}, 400
+    return {"message": "Este usuário já está cadastrado"}, 400
 
 
 class UserResource(Resource):
     def __init__(self, **kwargs):
         self.db = MongoDB()
         self.redis = RedisCache()
+        self.hasher = PasswordHasher()
+        self.users = UserService()
         self.collection = self.db.get_collection("users")
 
     def post(self):
         try:
             data = request.get_json()
 
-            # Verificar se o email já está em uso
-            if self.collection.find_one({"email": data["email"]}):
-                return {"message": "Este email já está em uso"}, 400
-
-            # Verificar se o username já está em uso
-            if self.collection.find_one({"username": data["username"]}):
-                return {"message": "Este nome de usuário já está em uso"}, 400
+            # Verificar duplicidade antes do hash, que é caro. Os índices
+            # únicos continuam rejeitando cadastros simultâneos na inserção.
+            existing = self.collection.find_one(
+                {
+                    "$or": [
+                        {"email": data.get("email")},
+                        {"username": data.get("username")},
+                    ]
+                },
+                {"email": 1},
+            )
+            if existing:
+                field = (
+                    "email"
+                    if existing.get("email") == data.get("email")
+                    else "username"
+                )
+                return {"message": DUPLICATE_MESSAGES[field]}, 400
 
             # Hash da senha
-            password = data["password"].encode("utf-8")
-            salt = bcrypt.gensalt()
-            data["password"] = bcrypt.hashpw(password, salt).decode("utf-8")
+            data["password"] = self.hasher.hash(data["password"])
 
             # Validar dados com Pydantic
             user = UserModel(**data)
 
-            # Inserir no MongoDB
-            result = self.collection.insert_one(user.model_dump())
+            # Inserir no MongoDB (insert_one acrescenta o _id ao documento)
+            created_user = user.model_dump()
+            self.collection.insert_one(created_user)
 
             # Retornar usuário criado (sem a senha)
-            created_user = self.collection.find_one({"_id": result.inserted_id})
             created_user["_id"] = str(created_user["_id"])
             del created_user["password"]
             del created_user["created_at"]
 
             return created_user, 201
+        except DuplicateKeyError as e:
+            return duplicate_response(e)
+        except PasswordHasherBusy:
+            return BUSY_RESPONSE
         except Exception as e:
             return {"message": f"Erro ao criar usuário: {str(e)}"}, 500
 
@@ -58,17 +97,13 @@ class UserResource(Resource):
             if user_id != get_jwt_identity():
                 return {"message": "Acesso não autorizado"}, 403
 
-            # Buscar usuário no MongoDB
-            user = self.collection.find_one({"_id": ObjectId(user_id)})
+            # Perfil em cache, ou lido do MongoDB (sem a senha)
+            user = self.users.get_profile(user_id)
 
             if not user:
                 return {"message": "Usuário não encontrado"}, 404
 
-            # Validar e formatar resposta com Pydantic
-            user["_id"] = str(user["_id"])
-            response = UserResponse(**user).dict()
-
-            return response, 200
+            return user, 200
         except Exception as e:
             return {"message": f"Erro ao buscar usuário: {str(e)}"}, 500
 
@@ -91,15 +126,24 @@ class UserResource(Resource):
                     "message": "Não é possível alterar email ou senha por esta rota"
                 }, 400
 
-            # Atualizar no MongoDB
-            self.collection.update_one({"_id": ObjectId(user_id)}, {"$set": data})
+            # Atualizar no MongoDB, recebendo o usuário atualizado com os
+            # mesmos campos da resposta de criação (sem senha e created_at)
+            updated_user = self.collection.find_one_and_update(
+                {"_id": ObjectId(user_id)},
+                {"$set": data},
+                projection={"password": 0, "created_at": 0},
+                return_document=ReturnDocument.AFTER,
+            )
+
+            if not updated_user:
+                return {"message": "Usuário não encontrado"}, 404
 
-            # Retornar usuário atualizado
-            updated_user = self.collection.find_one({"_id": ObjectId(user_id)})
+            self.users.invalidate(user_id)
             updated_user["_id"] = str(updated_user["_id"])
-            del updated_user["password"]
 
             return updated_user, 200
+        except DuplicateKeyError as e:
+            return duplicate_response(e)
         except Exception as e:
             return {"message": f"Erro ao atualizar usuário: {str(e)}"}, 500
 
@@ -0,0 +1,66 @@
+import contextlib
+import logging
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.routing import Route
+
+from app.api.auth import asgi as auth_routes
+from app.api.tasks import asgi as tasks_routes
+from app.config import config_by_name
+from app.lib.database.asyncmongodb import AsyncMongoDB
+from app.lib.metrics import MetricsMiddleware, asgi_metrics
+from app.lib.passwords import PasswordHasher
+from app.lib.redis.asyncrediscache import AsyncRedisCache
+from app.lib.redis.rediscache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+
+def create_asgi_app(config_name="development"):
+    """
+    Versão ASGI das APIs de tarefas e autenticação, com as mesmas rotas e
+    contratos da aplicação Flask, sobre drivers assíncronos. As duas
+    aplicações compartilham o banco, o cache e o formato dos tokens JWT.
+    """
+    configuration = config_by_name.get(config_name)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await AsyncMongoDB(configuration).ping()
+        await AsyncRedisCache(configuration).redis_client.ping()
+        logger.info(f"Connected to Redis: {configuration.REDIS_URI}")
+        yield
+        await AsyncMongoDB.close_all()
+        await AsyncRedisCache.close_all()
+        # Pool de hashing e cliente síncrono usado pela escuta da blocklist
+        PasswordHasher.shutdown_all()
+        RedisCache.close_all()
+
+    routes = tasks_routes.routes + auth_routes.routes
+    middleware = [Middleware(CORSMiddleware, allow_origins=["*"])]
+    if configuration.METRICS_ENABLED:
+        # Latência e status por rota, exportados em /metrics. Com vários
+        # workers (uvicorn --workers), defina PROMETHEUS_MULTIPROC_DIR.
+        routes.append(Route("/metrics", asgi_metrics, methods=["GET"]))
+        middleware.append(Middleware(MetricsMiddleware))
+    if configuration.COMPRESSION_ENABLED:
+        # O Starlette só oferece gzip; respostas em streaming são comprimidas
+        # bloco a bloco
+        middleware.append(
+            Middleware(
+                GZipMiddleware,
+                minimum_size=configuration.COMPRESSION_MIN_SIZE,
+                compresslevel=configuration.COMPRESSION_GZIP_LEVEL,
+            )
+        )
+
+    app = Starlette(
+        routes=routes,
+        middleware=middleware,
+        lifespan=lifespan,
+    )
+    app.state.config = configuration
+    return app
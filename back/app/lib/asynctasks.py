@@ -0,0 +1,365 @@
+from bson import ObjectId
+from app.api.tasks.models import TaskModel, TaskUpdateModel
+from app.lib.database.asyncmongodb import AsyncMongoDB
+from app.lib.redis.asyncrediscache import AsyncRedisCache
+from app.lib.redis.asynctaskcache import AsyncTaskCache
+from app.lib.redis.asynctaskstats import AsyncTaskStats
+from app.lib.redis import singleflight
+from app.lib.pagination import clamp_limit
+from app.lib.tasks import (
+    STREAM_HEAD,
+    STREAM_TAIL,
+    TASK_PROJECTION,
+    UNFILTERED_QUERY,
+    TaskService,
+)
+from app.config import config_by_name
+from pymongo.errors import BulkWriteError
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTaskService(TaskService):
+    """
+    Versão assíncrona do TaskService, sobre o driver async do pymongo e
+    ``redis.asyncio``. Reaproveita a validação, a montagem das consultas e a
+    serialização do serviço síncrono; as operações de I/O são corrotinas e
+    recebem o ``user_id`` explicitamente, já que não há contexto do Flask.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or config_by_name.get(os.getenv("ENV", "development"))
+        self.db = AsyncMongoDB(self.config)
+        self.redis = AsyncRedisCache(self.config)
+        self.cache = AsyncTaskCache(self.redis)
+        self.stats = AsyncTaskStats(self.redis, self.config)
+
+    async def get_all_tasks(
+        self,
+        user_id,
+        limit=None,
+        cursor=None,
+        status=None,
+        due_before=None,
+        due_after=None,
+        sort=None,
+        fields=None,
+    ):
+        """Página de tarefas do usuário (ver ``TaskService.get_all_tasks``)"""
+        limit = clamp_limit(
+            limit, self.config.TASKS_PAGE_SIZE, self.config.TASKS_PAGE_MAX_SIZE
+        )
+        query = self._build_query(status, due_before, due_after, sort, fields)
+
+        if query:
+            return await self._get_query_page(user_id, query, limit, cursor)
+
+        after_member = self._after_member(cursor)
+        # Busca um membro a mais para saber se existe próxima página
+        members, rebuild = await self.cache.index_page(user_id, after_member, limit + 1)
+        if rebuild:
+            members = await self._refresh_index(
+                user_id, after_member, limit + 1, members
+            )
+
+        task_ids, next_cursor = self._index_page(members, limit)
+        tasks = await self._load_tasks(user_id, task_ids)
+        return {"tasks": tasks, "next_cursor": next_cursor}
+
+    async def _refresh_index(self, user_id, after_member, count, stale):
+        async def load():
+            return (await self.cache.index_page(user_id, after_member, count))[0]
+
+        async def compute():
+            members, stored = await self._rebuild_index(user_id)
+            page = await load() if stored else None
+            if page is None:
+                # Índice descartado por uma escrita concorrente (ver
+                # TaskService._refresh_index)
+                page = self._members_after(members, after_member, count)
+            return page
+
+        return await singleflight.refresh_async(
+            self.redis, self.cache.index_key(user_id), stale, load, compute
+        )
+
+    def stream_tasks(
+        self,
+        user_id,
+        status=None,
+        due_before=None,
+        due_after=None,
+        sort=None,
+        fields=None,
+    ):
+        """Listagem completa em blocos de JSON (ver TaskService.stream_tasks)"""
+        query = self._build_query(status, due_before, due_after, sort, fields)
+        query = query or UNFILTERED_QUERY
+        mongo_filter, sort = self._query_filter(user_id, query, None)
+        cursor = (
+            self.collection.find(mongo_filter, self._projection(query))
+            .sort(sort)
+            .batch_size(self.config.TASKS_STREAM_BATCH_SIZE)
+        )
+        return self._stream_json(cursor, query["fields"])
+
+    async def _stream_json(self, cursor, fields):
+        yield STREAM_HEAD
+        batch = []
+        first = True
+        async for task in cursor:
+            batch.append(task)
+            if len(batch) == self.config.TASKS_STREAM_BATCH_SIZE:
+                yield self._json_items(batch, fields, first)
+                batch, first = [], False
+        if batch:
+            yield self._json_items(batch, fields, first)
+        yield STREAM_TAIL
+
+    async def search_tasks(self, user_id, q, limit=None, cursor=None):
+        """Busca textual nas tarefas (ver TaskService.search_tasks)"""
+        terms, offset, limit, signature = self._search_arguments(q, limit, cursor)
+
+        page, version = await self.cache.get_search_page(user_id, signature)
+        if page is None:
+            mongo_filter, projection, sort = self._search_query(user_id, terms)
+            documents = (
+                await self.collection.find(mongo_filter, projection)
+                .sort(sort)
+                .skip(offset)
+                .limit(limit + 1)
+                .to_list()
+            )
+            page = self._search_page(documents, offset, limit)
+            await self.cache.set_search_page(user_id, signature, page, version)
+        return page
+
+    async def get_task_stats(self, user_id):
+        """Estatísticas das tarefas (ver ``TaskService.get_task_stats``)"""
+        stats = await self.stats.get(user_id)
+        if stats is not None:
+            return stats
+
+        async def load():
+            return await self.stats.get(user_id)
+
+        async def compute():
+            return (await self.rebuild_stats(user_id))[0]
+
+        return await singleflight.refresh_async(
+            self.redis, self.stats.counters_key(user_id), None, load, compute
+        )
+
+    async def rebuild_stats(self, user_id):
+        version = await self.cache.get_version(user_id)
+        cursor = await self.collection.aggregate(self._stats_pipeline(user_id))
+        tasks = [
+            (t["_id"], t["revisao"], t["status"], t["data_vencimento"])
+            async for t in cursor
+        ]
+        return await self.stats.rebuild(user_id, version, tasks)
+
+    async def get_tasks_version(self, user_id):
+        """ETag das listagens do usuário (ver TaskService.get_tasks_version)"""
+        return self._version_tag(user_id, await self.cache.get_version(user_id))
+
+    async def get_task(self, user_id, task_id):
+        cached_task = await self.cache.get_item(user_id, task_id)
+        if cached_task:
+            return cached_task
+
+        task = await self.collection.find_one(
+            {"_id": ObjectId(task_id), "user_id": user_id}, TASK_PROJECTION
+        )
+        if not task:
+            return None
+
+        revision = self._revision(task)
+        task = self._serialize(task)
+        await self.cache.set_items(user_id, {task["id"]: task}, {task["id"]: revision})
+        return task
+
+    async def create_task(self, user_id, task: TaskModel):
+        created_task = self._task_document(task, user_id)
+        await self.collection.insert_one(created_task)
+
+        pipe = self.redis.pipeline()
+        await self.cache.put(
+            user_id,
+            created_task["_id"],
+            self._serialize(dict(created_task)),
+            created_task["data_vencimento"],
+            self._revision(created_task),
+            pipe=pipe,
+        )
+        await self.cache.bump_version(user_id, pipe)
+        await self.stats.put(
+            user_id,
+            created_task["_id"],
+            self._revision(created_task),
+            created_task["status"],
+            created_task["data_vencimento"],
+            created=True,
+            pipe=pipe,
+        )
+        await pipe.execute()
+
+        return TaskModel(**created_task)
+
+    async def update_task(self, user_id, task_id, task_update: TaskUpdateModel):
+        query = {"_id": ObjectId(task_id), "user_id": user_id}
+
+        update_data = self._update_document(task_update)
+        if not update_data:
+            return await self.get_task(user_id, task_id)
+
+        old_task = await self.collection.find_one_and_update(
+            query, self._update_operation(update_data), projection=TASK_PROJECTION
+        )
+        if not old_task:
+            return None
+        updated_task = self._apply_update(old_task, update_data)
+
+        task = self._serialize(dict(updated_task))
+        pipe = self.redis.pipeline()
+        await self.cache.put(
+            user_id,
+            task_id,
+            task,
+            updated_task["data_vencimento"],
+            self._revision(updated_task),
+            old_data_vencimento=old_task["data_vencimento"],
+            pipe=pipe,
+        )
+        await self.cache.bump_version(user_id, pipe)
+        await self.stats.put(
+            user_id,
+            task_id,
+            self._revision(updated_task),
+            updated_task["status"],
+            updated_task["data_vencimento"],
+            pipe=pipe,
+        )
+        await pipe.execute()
+        return task
+
+    async def delete_task(self, user_id, task_id):
+        query = {"_id": ObjectId(task_id), "user_id": user_id}
+
+        task = await self.collection.find_one_and_delete(
+            query, projection={"data_vencimento": 1, "revisao": 1}
+        )
+        if not task:
+            return False
+
+        pipe = self.redis.pipeline()
+        await self.cache.remove(
+            user_id,
+            task_id,
+            task["data_vencimento"],
+            self._revision(task),
+            pipe=pipe,
+        )
+        await self.cache.bump_version(user_id, pipe)
+        await self.stats.remove(user_id, task_id, self._revision(task), pipe=pipe)
+        await pipe.execute()
+        return True
+
+    async def bulk_tasks(self, user_id, operations):
+        """Lote de operações em um único bulk_write (ver TaskService.bulk_tasks)"""
+        results, requests = self._bulk_requests(operations, user_id)
+
+        target_ids = self._bulk_target_ids(requests)
+        existing = set()
+        if target_ids:
+            cursor = self.collection.find(
+                {"_id": {"$in": target_ids}, "user_id": user_id}, {"_id": 1}
+            )
+            existing = {task["_id"] async for task in cursor}
+        pending = self._bulk_pending(results, requests, existing)
+
+        if pending:
+            try:
+                result = await self.collection.bulk_write(
+                    [r for _, r in pending], ordered=False
+                )
+                outcome = result.bulk_api_result
+            except BulkWriteError as e:
+                outcome = e.details
+                self._bulk_errors(results, pending, e)
+            self._bulk_lost(results, pending, outcome)
+            pipe = self.redis.pipeline()
+            await self.cache.invalidate(user_id, pipe)
+            await self.stats.invalidate(user_id, pipe)
+            await pipe.execute()
+
+        return results
+
+    async def _get_query_page(self, user_id, query, limit, cursor):
+        signature = self._query_signature(query, cursor, limit)
+        cached_page, refresh, version = await self.cache.get_query_page(
+            user_id, signature
+        )
+        if not refresh:
+            return cached_page
+
+        async def load():
+            return (await self.cache.get_query_page(user_id, signature))[0]
+
+        async def compute():
+            start = time.perf_counter()
+            mongo_filter, sort = self._query_filter(user_id, query, cursor)
+            documents = (
+                await self.collection.find(mongo_filter, self._projection(query))
+                .sort(sort)
+                .limit(limit + 1)
+                .to_list()
+            )
+            page = self._query_page(query, documents, limit)
+            await self.cache.set_query_page(
+                user_id, signature, page, version, time.perf_counter() - start
+            )
+            return page
+
+        return await singleflight.refresh_async(
+            self.redis,
+            self.cache.query_key(user_id, signature),
+            cached_page,
+            load,
+            compute,
+        )
+
+    async def _rebuild_index(self, user_id):
+        start = time.perf_counter()
+        cursor = self.collection.find(
+            {"user_id": user_id}, {"_id": 1, "data_vencimento": 1, "revisao": 1}
+        )
+        tasks = [
+            (t["_id"], self._revision(t), t["data_vencimento"]) async for t in cursor
+        ]
+        stored = await self.cache.rebuild_index(
+            user_id, tasks, time.perf_counter() - start
+        )
+        return self._sorted_members(tasks), stored
+
+    async def _load_tasks(self, user_id, task_ids):
+        cached = await self.cache.get_items(user_id, task_ids)
+        missing = [i for i, task in zip(task_ids, cached) if task is None]
+
+        loaded = {}
+        revisions = {}
+        if missing:
+            cursor = self.collection.find(
+                {"_id": {"$in": [ObjectId(i) for i in missing]}, "user_id": user_id},
+                TASK_PROJECTION,
+            )
+            documents = await cursor.to_list()
+            for document, task in zip(documents, self._serialize_many(documents)):
+                loaded[task["id"]] = task
+                revisions[task["id"]] = self._revision(document)
+            await self.cache.set_items(user_id, loaded, revisions)
+
+        return self._merge_loaded(task_ids, cached, loaded)
@@ -0,0 +1,97 @@
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - compressão brotli é opcional
+    brotli = None
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31: formato gzip (cabeçalho e CRC), e não zlib puro
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        # Z_SYNC_FLUSH envia o bloco ao cliente sem aguardar o próximo
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def available_encodings():
+    """Codificações suportadas, em ordem de preferência do servidor"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def compress(data, encoding, config):
+    """Comprime um corpo completo"""
+    if encoding == "br":
+        return brotli.compress(data, quality=config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, encoding, config):
+    """Comprime um corpo em streaming, bloco a bloco"""
+    if encoding == "br":
+        stream = _BrotliStream(config.COMPRESSION_BROTLI_QUALITY)
+    else:
+        stream = _GzipStream(config.COMPRESSION_GZIP_LEVEL)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+def init_compression(app, config):
+    """
+    Comprime as respostas com gzip ou brotli, conforme o Accept-Encoding do
+    cliente. Corpos completos só são comprimidos a partir de
+    COMPRESSION_MIN_SIZE bytes; respostas em streaming, cujo tamanho não é
+    conhecido, são sempre comprimidas.
+    """
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, config)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config.COMPRESSION_MIN_SIZE:
+                return response
+            response.set_data(compress(data, encoding, config))
+        response.headers["Content-Encoding"] = encoding
+        return response
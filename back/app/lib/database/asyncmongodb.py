@@ -0,0 +1,76 @@
+from pymongo import AsyncMongoClient
+from app.lib.metrics import MongoCommandListener
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMongoDB:
+    """
+    Conexão assíncrona com o MongoDB (driver async do pymongo), usada pela
+    API ASGI. O cliente é criado no primeiro acesso de cada processo e se
+    conecta sob demanda, no event loop em que for usado.
+    Implementa o padrão Singleton para garantir apenas um cliente por processo.
+    """
+
+    _instances = {}
+    _client = None
+    _db = None
+    _config = None
+    _pid = None
+
+    def __new__(cls, config=None):
+        # Use config as key for the instance to support different environments
+        config_key = id(config) if config else "default"
+
+        if config_key not in cls._instances:
+            cls._instances[config_key] = super(AsyncMongoDB, cls).__new__(cls)
+            cls._instances[config_key]._config = config
+            cls._instances[config_key]._load_config()
+        return cls._instances[config_key]
+
+    @classmethod
+    async def close_all(cls):
+        """Fecha as conexões de todas as instâncias do processo"""
+        for instance in cls._instances.values():
+            await instance.close_connection()
+
+    def _load_config(self):
+        if not self._config:
+            from app.config import config_by_name
+
+            env = os.getenv("ENV", "development")
+            self._config = config_by_name.get(env)
+
+    def get_database(self):
+        """Retorna a instância do banco de dados"""
+        if self._db is None or self._pid != os.getpid():
+            self._client = AsyncMongoClient(
+                self._config.MONGODB_URI,
+                serverSelectionTimeoutMS=5000,
+                event_listeners=[MongoCommandListener()],
+            )
+            self._db = self._client[self._config.MONGODB_DATABASE]
+            self._pid = os.getpid()
+        return self._db
+
+    def get_collection(self, collection_name):
+        """Retorna uma coleção específica do banco de dados"""
+        return self.get_database()[collection_name]
+
+    async def ping(self):
+        """Verifica a conexão com o servidor"""
+        await self.get_database().client.admin.command("ping")
+        logger.info(
+            f"Conexão assíncrona com MongoDB estabelecida: {self._config.MONGODB_URI}"
+        )
+
+    async def close_connection(self):
+        """Fecha a conexão com o MongoDB"""
+        if self._client:
+            if self._pid == os.getpid():
+                await self._client.close()
+            self._client = None
+            self._db = None
+            logger.info("Conexão assíncrona com MongoDB encerrada")
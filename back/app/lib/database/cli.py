@@ -0,0 +1,38 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.lib.database import indexes
+
+indexes_cli = AppGroup("indexes", help="Gerencia os índices do MongoDB.")
+
+
+@indexes_cli.command("ensure")
+def ensure_command():
+    """Cria os índices do registro que ainda não existem."""
+    indexes.ensure_indexes(current_app.mongodb.get_database())
+    click.echo("Índices garantidos.")
+
+
+@indexes_cli.command("report")
+def report_command():
+    """Exibe índices ausentes, índices sem uso e o plano de cada consulta."""
+    db = current_app.mongodb.get_database()
+
+    click.echo("Índices ausentes:")
+    _echo_by_collection(indexes.missing_indexes(db))
+
+    click.echo("\nÍndices sem uso:")
+    _echo_by_collection(indexes.unused_indexes(db))
+
+    click.echo("\nPlanos de execução:")
+    for query, plan in indexes.explain_queries(db).items():
+        marker = "!!" if "COLLSCAN" in plan else "ok"
+        click.echo(f"  [{marker}] {query}\n        {plan}")
+
+
+def _echo_by_collection(result):
+    if not result:
+        click.echo("  nenhum")
+    for collection_name, names in result.items():
+        click.echo(f"  {collection_name}: {', '.join(names)}")
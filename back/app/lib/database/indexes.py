@@ -0,0 +1,192 @@
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Registro declarativo dos índices de cada coleção. Os índices compostos de
+# "tasks" começam por user_id, portanto também atendem às consultas que
+# filtram apenas pelo usuário.
+INDEXES = {
+    "tasks": [
+        # Listagem paginada e reconstrução do índice do cache, ordenadas por
+        # (data_vencimento, _id)
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("data_vencimento", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            name="user_id_data_vencimento",
+        ),
+        # Listagem filtrada por status, ordenada por (data_vencimento, _id)
+        # em qualquer direção
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("status", ASCENDING),
+                ("data_vencimento", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            name="user_id_status_data_vencimento",
+        ),
+        # Busca textual (/api/tasks/search): o prefixo user_id restringe a
+        # busca às tarefas do usuário, e o idioma aplica stemming e stop
+        # words do português
+        IndexModel(
+            [("user_id", ASCENDING), ("titulo", TEXT), ("descricao", TEXT)],
+            name="user_id_text",
+            default_language="portuguese",
+            weights={"titulo": 3, "descricao": 1},
+        ),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+}
+
+_SAMPLE_USER_ID = "000000000000000000000000"
+_SAMPLE_ID = ObjectId(_SAMPLE_USER_ID)
+
+# Consultas emitidas pelos serviços, usadas pelo comando de diagnóstico para
+# exibir os planos de execução (explain)
+QUERIES = {
+    "tasks": {
+        "TaskService._rebuild_index": {
+            "filter": {"user_id": _SAMPLE_USER_ID},
+            "projection": {"_id": 1, "data_vencimento": 1, "revisao": 1},
+        },
+        "TaskService._load_tasks": {
+            "filter": {"_id": {"$in": [_SAMPLE_ID]}, "user_id": _SAMPLE_USER_ID},
+        },
+        "TaskService._get_query_page (status)": {
+            "filter": {
+                "user_id": _SAMPLE_USER_ID,
+                "status": {"$in": ["pendente"]},
+                "$or": [
+                    {"data_vencimento": {"$gte": datetime(2025, 1, 1)}},
+                    {"data_vencimento": {"$gte": "2025-01-01 00:00:00"}},
+                ],
+            },
+            "sort": [("data_vencimento", DESCENDING), ("_id", DESCENDING)],
+        },
+        "TaskService._get_query_page (vencimento)": {
+            "filter": {
+                "user_id": _SAMPLE_USER_ID,
+                "$or": [
+                    {"data_vencimento": {"$lt": datetime(2025, 1, 1)}},
+                    {"data_vencimento": {"$lt": "2025-01-01 00:00:00"}},
+                ],
+            },
+            "sort": [("data_vencimento", ASCENDING), ("_id", ASCENDING)],
+        },
+        "TaskService.get_task": {
+            "filter": {"_id": _SAMPLE_ID, "user_id": _SAMPLE_USER_ID},
+        },
+        "TaskService.search_tasks": {
+            "filter": {"user_id": _SAMPLE_USER_ID, "$text": {"$search": "reunião"}},
+            "projection": {"score": {"$meta": "textScore"}},
+            "sort": [("score", {"$meta": "textScore"}), ("_id", ASCENDING)],
+        },
+    },
+    "users": {
+        "LoginResource.post": {
+            "filter": {"email": "usuario@exemplo.com"},
+            "projection": {"password": 1, "email": 1, "username": 1, "created_at": 1},
+        },
+        "UserResource.post": {
+            "filter": {
+                "$or": [
+                    {"email": "usuario@exemplo.com"},
+                    {"username": "usuario"},
+                ]
+            },
+            "projection": {"email": 1},
+        },
+        "PasswordResetRequestResource.post": {
+            "filter": {"email": "usuario@exemplo.com"},
+            "projection": {"_id": 1},
+        },
+        "UserService.get_profile": {
+            "filter": {"_id": _SAMPLE_ID},
+            "projection": {"email": 1, "username": 1, "created_at": 1},
+        },
+    },
+}
+
+
+def ensure_indexes(db):
+    """
+    Cria os índices do registro que ainda não existem. A operação é
+    idempotente: índices já existentes com a mesma especificação são mantidos.
+    """
+    for collection_name, indexes in INDEXES.items():
+        try:
+            created = db[collection_name].create_indexes(indexes)
+            logger.info(f"Índices garantidos em {collection_name}: {created}")
+        except OperationFailure as e:
+            # Ex.: índice único sobre dados duplicados ou nome em conflito
+            logger.error(f"Falha ao criar índices em {collection_name}: {str(e)}")
+
+
+def missing_indexes(db):
+    """Retorna {coleção: [nomes]} dos índices do registro ausentes no banco"""
+    missing = {}
+    for collection_name, indexes in INDEXES.items():
+        existing = db[collection_name].index_information()
+        names = [
+            i.document["name"] for i in indexes if i.document["name"] not in existing
+        ]
+        if names:
+            missing[collection_name] = names
+    return missing
+
+
+def unused_indexes(db):
+    """
+    Retorna {coleção: [nomes]} dos índices sem nenhum uso desde o último
+    restart do servidor, segundo ``$indexStats``.
+    """
+    unused = {}
+    for collection_name in INDEXES:
+        names = [
+            stats["name"]
+            for stats in db[collection_name].aggregate([{"$indexStats": {}}])
+            if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0
+        ]
+        if names:
+            unused[collection_name] = names
+    return unused
+
+
+def explain_queries(db):
+    """Retorna o resumo do plano vencedor de cada consulta em ``QUERIES``"""
+    plans = {}
+    for collection_name, queries in QUERIES.items():
+        for name, query in queries.items():
+            cursor = db[collection_name].find(query["filter"], query.get("projection"))
+            if "sort" in query:
+                cursor = cursor.sort(query["sort"])
+            explain = cursor.explain()
+            plans[f"{collection_name}: {name}"] = plan_summary(
+                explain["queryPlanner"]["winningPlan"]
+            )
+    return plans
+
+
+def plan_summary(plan):
+    """Resume um plano de execução como 'ESTÁGIO <- ESTÁGIO(índice)'"""
+    # Em versões recentes o plano vem dentro de "queryPlan"
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " <- ".join(stages)
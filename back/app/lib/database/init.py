@@ -25,6 +25,10 @@ def init_mongodb(app):
         db = mongodb.get_database()
         app.mongodb = mongodb
 
+        # Garante os índices declarados em app.lib.database.indexes
+        if configuration.MONGODB_AUTO_INDEX:
+            mongodb.ensure_indexes()
+
         logger.info(f"MongoDB inicializado com sucesso. Banco de dados: {db.name}")
         return mongodb
     except Exception as e:
@@ -1,7 +1,9 @@
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
+from app.lib.metrics import MongoCommandListener
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,8 @@ class MongoDB:
     _client = None
     _db = None
     _config = None
+    _pid = None
+    _lock = threading.Lock()
 
     def __new__(cls, config=None):
         # Use config as key for the instance to support different environments
@@ -24,25 +28,39 @@ class MongoDB:
         if config_key not in cls._instances:
             cls._instances[config_key] = super(MongoDB, cls).__new__(cls)
             cls._instances[config_key]._config = config
-            cls._instances[config_key]._connect()
+            cls._instances[config_key]._load_config()
         return cls._instances[config_key]
 
-    def _connect(self):
-        """Estabelece a conexão com o MongoDB"""
-        try:
-            if not self._config:
-                from app.config import config_by_name
+    @classmethod
+    def close_all(cls):
+        """Fecha as conexões de todas as instâncias do processo"""
+        for instance in cls._instances.values():
+            instance.close_connection()
 
-                env = os.getenv("ENV", "development")
-                configuration = config_by_name.get(env)
-                self._config = configuration
+    def _load_config(self):
+        if not self._config:
+            from app.config import config_by_name
 
+            env = os.getenv("ENV", "development")
+            configuration = config_by_name.get(env)
+            self._config = configuration
+
+    def _connect(self):
+        """
+        Estabelece a conexão com o MongoDB. Chamado sob demanda, no primeiro
+        acesso de cada processo: o MongoClient não é seguro após um fork,
+        então cada worker abre o seu.
+        """
+        try:
             self._client = MongoClient(
-                self._config.MONGODB_URI, serverSelectionTimeoutMS=5000
+                self._config.MONGODB_URI,
+                serverSelectionTimeoutMS=5000,
+                event_listeners=[MongoCommandListener()],
             )
             # Verifica se a conexão foi estabelecida
             self._client.admin.command("ismaster")
             self._db = self._client[self._config.MONGODB_DATABASE]
+            self._pid = os.getpid()
             logger.info(
                 f"Conexão com MongoDB estabelecida com sucesso: {self._config.MONGODB_URI}"
             )
@@ -55,18 +73,32 @@ class MongoDB:
 
     def get_database(self):
         """Retorna a instância do banco de dados"""
-        if self._db is None:
-            self._connect()
+        if self._db is None or self._pid != os.getpid():
+            with self._lock:
+                if self._db is None or self._pid != os.getpid():
+                    # Cliente herdado do processo pai é descartado sem ser
+                    # fechado, para não encerrar as conexões do pai
+                    self._client = None
+                    self._db = None
+                    self._connect()
         return self._db
 
     def get_collection(self, collection_name):
         """Retorna uma coleção específica do banco de dados"""
         return self.get_database()[collection_name]
 
+    def ensure_indexes(self):
+        """Aplica o registro de índices (idempotente)"""
+        from app.lib.database.indexes import ensure_indexes
+
+        ensure_indexes(self.get_database())
+
     def close_connection(self):
         """Fecha a conexão com o MongoDB"""
         if self._client:
-            self._client.close()
+            # Após um fork, o cliente pertence ao processo pai
+            if self._pid == os.getpid():
+                self._client.close()
             self._client = None
             self._db = None
             logger.info("Conexão com MongoDB encerrada")
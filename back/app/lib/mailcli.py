@@ -0,0 +1,39 @@
+import signal
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.config import config_by_name
+from app.lib.mailqueue import DEAD_KEY, QUEUE_KEY, RETRY_KEY, MailDispatcher, MailQueue
+
+mail_cli = AppGroup("mail", help="Gerencia a fila de emails.")
+
+
+@mail_cli.command("worker")
+def worker_command():
+    """Consome a fila de emails e envia pelo SMTP configurado."""
+    configuration = config_by_name.get(current_app.config["ENV"])
+    dispatcher = MailDispatcher(configuration)
+
+    def shutdown(signum, frame):
+        click.echo("Encerrando dispatcher de emails...")
+        dispatcher.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    dispatcher.run()
+
+
+@mail_cli.command("stats")
+def stats_command():
+    """
+    Exibe o tamanho da fila, dos envios em andamento, das novas tentativas
+    e dos descartados.
+    """
+    queue = MailQueue()
+    client = queue.client
+    click.echo(f"Na fila: {client.llen(QUEUE_KEY)}")
+    click.echo(f"Em processamento: {queue.processing_count()}")
+    click.echo(f"Aguardando nova tentativa: {client.zcard(RETRY_KEY)}")
+    click.echo(f"Descartados: {client.llen(DEAD_KEY)}")
@@ -0,0 +1,298 @@
+import os
+import smtplib
+import socket
+import time
+import uuid
+import logging
+
+from app.lib.redis.rediscache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "mail:queue"
+RETRY_KEY = "mail:retry"
+DEAD_KEY = "mail:dead"
+WORKERS_KEY = "mail:workers"
+
+
+def sender(config):
+    """Endereço de remetente dos emails"""
+    return config.MAIL_DEFAULT_SENDER or config.MAIL_USERNAME
+
+
+class MailQueue:
+    """
+    Fila de emails no Redis.
+
+        mail:queue -> lista com os emails prontos para envio
+        mail:retry -> zset com os emails aguardando nova tentativa
+                      (score = instante da próxima tentativa)
+        mail:dead  -> lista com os emails descartados
+        mail:processing:{worker} -> lista com os emails retirados da fila
+                                    pelo worker e ainda não confirmados
+        mail:worker:{worker} -> heartbeat do worker (expira se ele parar)
+        mail:workers -> set com os workers que podem ter emails em
+                        processamento
+
+    Cada email passa da fila para a lista de processamento do worker
+    (BLMOVE) e só sai dela depois de enviado, reagendado ou descartado
+    (``ack``). Se um worker morre no meio de um lote, seu heartbeat expira e
+    outro worker devolve os emails pendentes à fila (``recover_orphans``).
+    """
+
+    def __init__(self, redis=None, worker_id=None):
+        self.redis = redis or RedisCache()
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+
+    @property
+    def client(self):
+        return self.redis.redis_client
+
+    @staticmethod
+    def processing_key(worker_id):
+        return f"mail:processing:{worker_id}"
+
+    @staticmethod
+    def heartbeat_key(worker_id):
+        return f"mail:worker:{worker_id}"
+
+    def enqueue(self, to_email, message):
+        """Adiciona um email (mensagem MIME em texto) à fila de envio"""
+        job = self.job(to_email, message)
+        self.client.rpush(QUEUE_KEY, self.redis.serialize(job))
+        return job["id"]
+
+    @staticmethod
+    def job(to_email, message):
+        """Item da fila para um email ainda não enviado"""
+        return {
+            "id": str(uuid.uuid4()),
+            "to": to_email,
+            "message": message,
+            "attempts": 0,
+        }
+
+    def heartbeat(self, ttl):
+        """Registra o worker como ativo pelos próximos ``ttl`` segundos"""
+        pipe = self.client.pipeline()
+        pipe.set(self.heartbeat_key(self.worker_id), 1, ex=ttl)
+        pipe.sadd(WORKERS_KEY, self.worker_id)
+        pipe.execute()
+
+    def pop_batch(self, size, timeout):
+        """
+        Aguarda até ``timeout`` segundos pelo primeiro email e move até
+        ``size`` emails da fila para a lista de processamento do worker.
+        Retorna pares (item serializado, email); cada item deve ser
+        confirmado com ``ack``, ``schedule_retry`` ou ``dead_letter``.
+        """
+        processing = self.processing_key(self.worker_id)
+        data = self.client.blmove(QUEUE_KEY, processing, timeout, "LEFT", "RIGHT")
+        if data is None:
+            return []
+        batch = [data]
+        if size > 1:
+            pipe = self.client.pipeline()
+            for _ in range(size - 1):
+                pipe.lmove(QUEUE_KEY, processing, "LEFT", "RIGHT")
+            batch.extend(data for data in pipe.execute() if data is not None)
+        return [(data, self.redis.deserialize(data)) for data in batch]
+
+    def ack(self, data, pipe=None):
+        """Retira o item da lista de processamento do worker"""
+        (pipe or self.client).lrem(self.processing_key(self.worker_id), 1, data)
+
+    def schedule_retry(self, data, job, delay):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zadd(RETRY_KEY, {self.redis.serialize(job): time.time() + delay})
+        self.ack(data, pipe)
+        pipe.execute()
+
+    def dead_letter(self, data, job):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(DEAD_KEY, self.redis.serialize(job))
+        self.ack(data, pipe)
+        pipe.execute()
+
+    def promote_due_retries(self, now=None):
+        """Move para a fila os emails cuja próxima tentativa já venceu"""
+        now = now or time.time()
+        due = self.client.zrangebyscore(RETRY_KEY, "-inf", now)
+        for data in due:
+            # ZREM garante que apenas um worker reenfileire cada email
+            if self.client.zrem(RETRY_KEY, data):
+                self.client.rpush(QUEUE_KEY, data)
+        return len(due)
+
+    def recover_orphans(self):
+        """
+        Devolve à frente da fila os emails em processamento de workers cujo
+        heartbeat expirou. Retorna a quantidade de emails devolvidos.
+        """
+        recovered = 0
+        for worker_id in self.client.smembers(WORKERS_KEY):
+            worker_id = worker_id.decode("utf-8")
+            if worker_id == self.worker_id:
+                continue
+            if self.client.exists(self.heartbeat_key(worker_id)):
+                continue
+            recovered += self._requeue(worker_id)
+            self.client.srem(WORKERS_KEY, worker_id)
+        if recovered:
+            logger.warning(f"{recovered} emails de workers inativos reenfileirados")
+        return recovered
+
+    def release(self):
+        """Devolve à fila os emails ainda em processamento e remove o worker"""
+        self._requeue(self.worker_id)
+        pipe = self.client.pipeline()
+        pipe.delete(self.heartbeat_key(self.worker_id))
+        pipe.srem(WORKERS_KEY, self.worker_id)
+        pipe.execute()
+
+    def _requeue(self, worker_id):
+        # LMOVE é atômico por item: dois workers recuperando a mesma lista
+        # não duplicam emails. Do fim para o início, preservando a ordem.
+        processing = self.processing_key(worker_id)
+        moved = 0
+        while self.client.lmove(processing, QUEUE_KEY, "RIGHT", "LEFT") is not None:
+            moved += 1
+        return moved
+
+    def processing_count(self):
+        """Quantidade de emails em processamento em todos os workers"""
+        pipe = self.client.pipeline()
+        for worker_id in self.client.smembers(WORKERS_KEY):
+            pipe.llen(self.processing_key(worker_id.decode("utf-8")))
+        return sum(pipe.execute())
+
+
+def permanent_failure(error):
+    """
+    Se a falha é uma recusa permanente do servidor (código 5xx), que não
+    adianta tentar de novo. Falhas de autenticação são tratadas como
+    temporárias: indicam um problema de configuração, não do email.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class SMTPConnection:
+    """
+    Conexão SMTP persistente, reaberta sob demanda quando o servidor a
+    encerra ou quando fica ociosa por mais de MAIL_IDLE_TIMEOUT segundos.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._server = None
+        self._last_used = 0
+
+    def send(self, from_email, to_email, message):
+        server = self._connection()
+        try:
+            server.sendmail(from_email, to_email, message)
+        except smtplib.SMTPServerDisconnected:
+            # Conexão encerrada pelo servidor: reconecta e tenta uma vez
+            self.close()
+            self._connection().sendmail(from_email, to_email, message)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _connection(self):
+        idle = time.monotonic() - self._last_used
+        if self._server is not None and idle > self.config.MAIL_IDLE_TIMEOUT:
+            self.close()
+        if self._server is None:
+            server = smtplib.SMTP(
+                self.config.MAIL_SERVER,
+                self.config.MAIL_PORT,
+                timeout=self.config.MAIL_TIMEOUT,
+            )
+            if self.config.MAIL_USE_TLS:
+                server.starttls()
+            if self.config.MAIL_USERNAME:
+                server.login(self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD)
+            self._server = server
+        return self._server
+
+
+class MailDispatcher:
+    """
+    Worker que consome a fila de emails em lotes, reutilizando a mesma
+    conexão SMTP. Falhas temporárias são reagendadas com backoff
+    exponencial; recusas permanentes do servidor (códigos 5xx) vão direto
+    para os descartados.
+    """
+
+    def __init__(self, config, queue=None, connection=None):
+        self.config = config
+        self.queue = queue or MailQueue()
+        self.connection = connection or SMTPConnection(config)
+        self._running = False
+
+    def run(self):
+        self._running = True
+        logger.info("Dispatcher de emails iniciado")
+        try:
+            while self._running:
+                self.run_once()
+        finally:
+            self.connection.close()
+            self.queue.release()
+
+    def stop(self):
+        self._running = False
+
+    def run_once(self):
+        """Processa um lote da fila; retorna a quantidade de emails enviados"""
+        self.queue.heartbeat(self.config.MAIL_WORKER_TIMEOUT)
+        self.queue.recover_orphans()
+        self.queue.promote_due_retries()
+        batch = self.queue.pop_batch(
+            self.config.MAIL_BATCH_SIZE, self.config.MAIL_POLL_TIMEOUT
+        )
+        sent = 0
+        for data, job in batch:
+            if self._send(data, job):
+                sent += 1
+        return sent
+
+    def _send(self, data, job):
+        try:
+            self.connection.send(sender(self.config), job["to"], job["message"])
+        except (smtplib.SMTPException, OSError) as e:
+            job["attempts"] += 1
+            if permanent_failure(e):
+                # A conexão continua válida: o smtplib já fez RSET
+                logger.error(f"Email {job['id']} recusado pelo servidor: {str(e)}")
+                self.queue.dead_letter(data, job)
+                return False
+            self.connection.close()
+            if job["attempts"] >= self.config.MAIL_MAX_ATTEMPTS:
+                logger.error(f"Email {job['id']} descartado após falhas: {str(e)}")
+                self.queue.dead_letter(data, job)
+            else:
+                delay = self.config.MAIL_RETRY_BACKOFF * 2 ** (job["attempts"] - 1)
+                logger.warning(
+                    f"Falha ao enviar email {job['id']}, nova tentativa em "
+                    f"{delay}s: {str(e)}"
+                )
+                self.queue.schedule_retry(data, job, delay)
+            return False
+        self.queue.ack(data)
+        return True
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+import logging
+
+import redis
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+from starlette.responses import Response as StarletteResponse
+
+logger = logging.getLogger(__name__)
+
+# Buckets para comandos de banco/cache, mais finos que os padrões de HTTP
+COMMAND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ["method", "route"],
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Requisições HTTP por rota e status",
+    ["method", "route", "status"],
+)
+MONGODB_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "Latência dos comandos do MongoDB por coleção e operação",
+    ["collection", "command"],
+    buckets=COMMAND_BUCKETS,
+)
+MONGODB_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total",
+    "Comandos do MongoDB que falharam, por coleção e operação",
+    ["collection", "command"],
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Latência dos comandos do Redis (pipelines contam como um comando)",
+    ["command"],
+    buckets=COMMAND_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Consultas aos caches por resultado (hit/miss)",
+    ["cache", "result"],
+)
+RATE_LIMIT_REQUESTS = Counter(
+    "rate_limit_requests_total",
+    "Tentativas verificadas pelo limitador, por regra e resultado",
+    ["rule", "result"],
+)
+
+
+def record_cache(cache, hits=0, misses=0):
+    """Contabiliza acertos e falhas de um cache"""
+    if hits:
+        CACHE_REQUESTS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, "miss").inc(misses)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Mede todos os comandos enviados pelo pymongo. A coleção só está no
+    documento do comando (evento de início), então é guardada até o evento
+    de conclusão correspondente.
+    """
+
+    # Comandos cujo primeiro campo não é o nome de uma coleção
+    _NO_COLLECTION = {"ping", "ismaster", "hello", "isMaster", "endSessions"}
+
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _key(self, event):
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        collection = "admin"
+        if event.command_name not in self._NO_COLLECTION:
+            value = event.command.get(event.command_name)
+            if isinstance(value, str):
+                collection = value
+        with self._lock:
+            self._collections[self._key(event)] = collection
+
+    def succeeded(self, event):
+        with self._lock:
+            collection = self._collections.pop(self._key(event), "unknown")
+        MONGODB_COMMAND_DURATION.labels(collection, event.command_name).observe(
+            event.duration_micros / 1e6
+        )
+
+    def failed(self, event):
+        with self._lock:
+            collection = self._collections.pop(self._key(event), "unknown")
+        MONGODB_COMMAND_DURATION.labels(collection, event.command_name).observe(
+            event.duration_micros / 1e6
+        )
+        MONGODB_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+
+class InstrumentedRedis(redis.Redis):
+    """Cliente Redis que mede a latência de cada comando e pipeline"""
+
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).lower()).observe(
+                time.perf_counter() - start
+            )
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class InstrumentedPipeline(redis.client.Pipeline):
+    def execute(self, raise_on_error=True):
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            command = "multi" if self.transaction else "pipeline"
+            REDIS_COMMAND_DURATION.labels(command).observe(time.perf_counter() - start)
+
+
+def init_metrics(app):
+    """
+    Registra os hooks que medem cada requisição e a rota ``/metrics``.
+
+    Com vários workers (gunicorn), defina PROMETHEUS_MULTIPROC_DIR para que
+    ``/metrics`` agregue as métricas de todos os processos.
+    """
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None and request.endpoint != "metrics":
+            # Rota como declarada (ex.: /api/tasks/<task_id>), para limitar
+            # a cardinalidade dos labels
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_REQUEST_DURATION.labels(request.method, route).observe(
+                time.perf_counter() - start
+            )
+            HTTP_REQUESTS.labels(request.method, route, response.status_code).inc()
+        return response
+
+    def metrics():
+        return Response(generate_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule("/metrics", "metrics", metrics)
+
+
+def generate_metrics():
+    """
+    Métricas no formato de texto do Prometheus. Com PROMETHEUS_MULTIPROC_DIR
+    definido, agrega as métricas de todos os processos (workers).
+    """
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI equivalente aos hooks de ``init_metrics``: mede a
+    latência e conta o status de cada requisição HTTP, rotulada pela rota
+    como declarada no Starlette (ex.: /api/tasks/{task_id:task_id}).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # O roteador do Starlette registra a rota encontrada no escopo
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route).observe(
+                time.perf_counter() - start
+            )
+            HTTP_REQUESTS.labels(scope["method"], route, status).inc()
+
+
+async def asgi_metrics(request):
+    """Rota ``/metrics`` da aplicação ASGI"""
+    return StarletteResponse(generate_metrics(), media_type=CONTENT_TYPE_LATEST)
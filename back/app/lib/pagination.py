@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class InvalidCursor(ValueError):
+    """Cursor de paginação malformado ou adulterado"""
+
+
+def encode_cursor(data_vencimento, task_id):
+    """
+    Gera um cursor opaco a partir da última tarefa da página. Tarefas
+    antigas têm a data gravada em texto: o cursor guarda o texto original,
+    para que a próxima página o compare com documentos do mesmo tipo.
+    """
+    if isinstance(data_vencimento, str):
+        payload = {"d": data_vencimento, "i": str(task_id), "t": "s"}
+    else:
+        payload = {"d": data_vencimento.isoformat(), "i": str(task_id)}
+    payload = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Retorna a tupla (data_vencimento, ObjectId) codificada no cursor. A
+    data é retornada em texto se a última tarefa a tinha gravada em texto.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        data_vencimento = payload["d"]
+        if payload.get("t") != "s":
+            data_vencimento = datetime.fromisoformat(data_vencimento)
+        elif not isinstance(data_vencimento, str):
+            raise TypeError(data_vencimento)
+        return data_vencimento, ObjectId(payload["i"])
+    except (ValueError, TypeError, KeyError, InvalidId) as e:
+        raise InvalidCursor(f"Cursor inválido: {cursor}") from e
+
+
+def encode_offset_cursor(offset):
+    """
+    Cursor opaco das buscas, que são ordenadas por relevância e não por
+    uma chave estável: guarda a posição da próxima página
+    """
+    payload = json.dumps({"o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_offset_cursor(cursor):
+    """Retorna a posição codificada em um cursor de busca"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = payload["o"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+        return offset
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Cursor inválido: {cursor}") from e
+
+
+def keyset_filter(cursor, descending=False):
+    """
+    Filtro do MongoDB para buscar os documentos posteriores ao cursor,
+    considerando a ordenação (data_vencimento, _id) crescente ou decrescente.
+
+    O MongoDB ordena datas em texto (tarefas antigas) antes de todas as
+    datas BSON, e só as compara com valores do mesmo tipo: as que ficam do
+    outro lado do cursor são incluídas pelo tipo.
+    """
+    data_vencimento, last_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    conditions = [
+        {"data_vencimento": {op: data_vencimento}},
+        {"data_vencimento": data_vencimento, "_id": {op: last_id}},
+    ]
+    legacy = isinstance(data_vencimento, str)
+    if legacy and not descending:
+        conditions.append({"data_vencimento": {"$type": "date"}})
+    elif not legacy and descending:
+        conditions.append({"data_vencimento": {"$type": "string"}})
+    return {"$or": conditions}
+
+
+def clamp_limit(limit, default, maximum):
+    """Normaliza o tamanho da página solicitado"""
+    if limit is None:
+        return default
+    if limit < 1:
+        raise ValueError("O parâmetro limit deve ser maior que zero")
+    return min(limit, maximum)
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """A fila de hashing de senhas está cheia"""
+
+
+# Resposta das rotas quando o pool de hashing está saturado
+BUSY_RESPONSE = (
+    {"message": "Servidor ocupado, tente novamente em instantes"},
+    503,
+    {"Retry-After": "1"},
+)
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Serviço de hashing de senhas com bcrypt.
+
+    As chamadas são executadas em um pool limitado (threads, já que o bcrypt
+    libera o GIL, ou processos) e no máximo PASSWORD_HASH_MAX_PENDING
+    operações podem estar pendentes: acima disso ``PasswordHasherBusy`` é
+    lançada imediatamente, em vez de acumular requisições.
+    Implementa o padrão Singleton para compartilhar o pool do processo.
+    """
+
+    _instances = {}
+    _config = None
+    _pid = None
+
+    def __new__(cls, config=None):
+        # Use config as key for the instance to support different environments
+        config_key = id(config) if config else "default"
+
+        if config_key not in cls._instances:
+            cls._instances[config_key] = super(PasswordHasher, cls).__new__(cls)
+            cls._instances[config_key]._config = config
+            cls._instances[config_key]._setup()
+        return cls._instances[config_key]
+
+    @classmethod
+    def shutdown_all(cls):
+        """Encerra os pools de todas as instâncias do processo"""
+        for instance in cls._instances.values():
+            instance.shutdown()
+
+    def _setup(self):
+        if not self._config:
+            from app.config import config_by_name
+
+            env = os.getenv("ENV", "development")
+            self._config = config_by_name.get(env)
+
+        self.rounds = self._config.BCRYPT_ROUNDS
+        self.timeout = self._config.PASSWORD_HASH_TIMEOUT
+        self._executor = None
+        self._pool_lock = threading.Lock()
+
+    def _start_pool(self):
+        """Cria o pool do processo atual (as threads não sobrevivem a um fork)"""
+        workers = self._config.PASSWORD_HASH_WORKERS
+        if self._config.PASSWORD_HASH_EXECUTOR == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="bcrypt"
+            )
+        self._slots = threading.BoundedSemaphore(
+            workers + self._config.PASSWORD_HASH_MAX_PENDING
+        )
+        self._pid = os.getpid()
+
+    def hash(self, password):
+        """Retorna o hash bcrypt da senha com o custo configurado"""
+        return self._submit(_hashpw, password.encode("utf-8"), self.rounds)
+
+    def verify(self, password, hashed):
+        """Verifica a senha contra um hash bcrypt"""
+        return self._submit(_checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    async def hash_async(self, password):
+        """Versão de ``hash`` que aguarda o pool sem bloquear o event loop"""
+        return await self._submit_async(_hashpw, password.encode("utf-8"), self.rounds)
+
+    async def verify_async(self, password, hashed):
+        """Versão de ``verify`` que aguarda o pool sem bloquear o event loop"""
+        return await self._submit_async(
+            _checkpw, password.encode("utf-8"), hashed.encode("utf-8")
+        )
+
+    def needs_rehash(self, hashed):
+        """Indica se o hash foi gerado com um custo diferente do configurado"""
+        # Formato: $2b$<custo>$<salt+hash>
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _submit(self, fn, *args):
+        future = self._start(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHasherBusy()
+
+    async def _submit_async(self, fn, *args):
+        future = self._start(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise PasswordHasherBusy()
+
+    def _start(self, fn, *args):
+        """Reserva uma vaga na fila e submete a operação ao pool"""
+        if self._executor is None or self._pid != os.getpid():
+            with self._pool_lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._start_pool()
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Fila de hashing de senhas cheia")
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
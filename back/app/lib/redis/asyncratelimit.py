@@ -0,0 +1,28 @@
+import logging
+
+from redis.exceptions import RedisError
+
+from app.lib.redis.asyncrediscache import AsyncRedisCache
+from app.lib.redis.ratelimit import TOKEN_BUCKET_SCRIPT, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter(RateLimiter):
+    """Versão assíncrona do RateLimiter, com os mesmos buckets"""
+
+    def __init__(self, redis=None, config=None):
+        super().__init__(redis or AsyncRedisCache(config), config)
+
+    async def hit(self, rule, **values):
+        if not self.config.RATE_LIMIT_ENABLED:
+            return None
+        kinds, keys, args = self._arguments(rule, values)
+        if not keys:
+            return None
+        try:
+            result = await self.redis.script(TOKEN_BUCKET_SCRIPT)(keys, args)
+        except RedisError as e:
+            logger.warning(f"Limite de tentativas não verificado ({rule}): {e}")
+            return None
+        return self._result(rule, kinds, result)
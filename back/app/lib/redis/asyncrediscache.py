@@ -0,0 +1,139 @@
+import os
+
+import redis.asyncio as aioredis
+from redis.asyncio.retry import Retry
+
+from app.lib.redis.codecs import CacheSerializer
+from app.lib.redis.rediscache import RedisCache, pool_options
+from app.lib.redis.singleflight import should_refresh
+
+
+class AsyncRedisCache:
+    """
+    Versão assíncrona do RedisCache, sobre ``redis.asyncio``, usada pela API
+    ASGI. Usa a mesma configuração, serialização e layout de chaves do
+    cliente síncrono; os métodos que fazem I/O são corrotinas.
+    """
+
+    _instances = {}
+    _config = None
+    _client = None
+    _pid = None
+
+    def __new__(cls, config=None):
+        # Use config as key for the instance to support different environments
+        config_key = id(config) if config else "default"
+
+        if config_key not in cls._instances:
+            cls._instances[config_key] = super(AsyncRedisCache, cls).__new__(cls)
+            cls._instances[config_key]._config = config
+            cls._instances[config_key]._load_config()
+        return cls._instances[config_key]
+
+    @classmethod
+    async def close_all(cls):
+        """Fecha as conexões de todas as instâncias do processo"""
+        for instance in cls._instances.values():
+            await instance.close()
+
+    def _load_config(self):
+        if not self._config:
+            from app.config import config_by_name
+
+            env = os.getenv("ENV", "development")
+            self._config = config_by_name.get(env)
+        self.serializer = CacheSerializer.from_config(self._config)
+
+    @property
+    def redis_client(self):
+        """
+        Cliente Redis assíncrono do processo atual. Criar o cliente não faz
+        I/O: as conexões são abertas pelo pool no primeiro comando.
+        """
+        if self._client is None or self._pid != os.getpid():
+            self._connect()
+        return self._client
+
+    def _connect(self):
+        pool = aioredis.BlockingConnectionPool.from_url(
+            self._config.REDIS_URI, **pool_options(self._config, Retry)
+        )
+        self._client = aioredis.Redis(connection_pool=pool)
+        self._pid = os.getpid()
+        self._scripts = {}
+
+    def script(self, source):
+        """Script Lua registrado no cliente assíncrono (ver ``RedisCache.script``)"""
+        client = self.redis_client
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = client.register_script(source)
+        return script
+
+    async def close(self):
+        """Fecha as conexões do pool do processo atual"""
+        if self._client is not None:
+            if self._pid == os.getpid():
+                await self._client.aclose()
+                await self._client.connection_pool.disconnect()
+            self._client = None
+
+    def expiration(self, expiration_key="REDIS_EXPIRATION"):
+        """Retorna o TTL (em segundos) configurado em ``expiration_key``"""
+        return getattr(self._config, expiration_key)
+
+    async def set(self, key, value, expiration_key="REDIS_EXPIRATION"):
+        """Armazena um valor no cache com expiração"""
+        await self.redis_client.setex(
+            key, self.expiration(expiration_key), self.serialize(value)
+        )
+
+    async def get(self, key):
+        """Recupera um valor do cache"""
+        data = await self.redis_client.get(key)
+        if data:
+            return self.deserialize(data)
+        return None
+
+    async def delete(self, key):
+        """Remove um valor do cache"""
+        await self.redis_client.delete(key)
+
+    def pipeline(self):
+        """Pipeline sem transação; os comandos são enviados em ``await execute()``"""
+        return self.redis_client.pipeline(transaction=False)
+
+    def lock(self, name):
+        """Lock de recálculo assíncrono (ver ``RedisCache.lock``)"""
+        return self.redis_client.lock(
+            f"lock:{name}",
+            timeout=self._config.CACHE_LOCK_TIMEOUT,
+            blocking_timeout=self._config.CACHE_LOCK_WAIT,
+        )
+
+    def should_refresh(self, remaining, delta):
+        return should_refresh(remaining, delta, self._config.CACHE_EARLY_REFRESH_BETA)
+
+    async def hget(self, key, field):
+        """Recupera um campo de um hash do cache"""
+        data = await self.redis_client.hget(key, field)
+        if data:
+            return self.deserialize(data)
+        return None
+
+    async def hmget(self, key, fields):
+        """Recupera vários campos de um hash, na mesma ordem de ``fields``"""
+        if not fields:
+            return []
+        return [
+            self.deserialize(data) if data else None
+            for data in await self.redis_client.hmget(key, fields)
+        ]
+
+    def serialize(self, value):
+        """Serializa um valor para gravação no Redis"""
+        return self.serializer.dumps(value)
+
+    def deserialize(self, data):
+        """Deserializa um valor lido do Redis"""
+        return self.serializer.loads(data)
@@ -0,0 +1,128 @@
+from contextlib import asynccontextmanager
+
+from app.lib.metrics import record_cache
+from app.lib.redis.asyncrediscache import AsyncRedisCache
+from app.lib.redis.taskcache import (
+    LOAD_TASKS_SCRIPT,
+    PUT_TASK_SCRIPT,
+    REBUILD_INDEX_SCRIPT,
+    REMOVE_TASK_SCRIPT,
+    SET_VERSIONED_SCRIPT,
+    TaskCache,
+)
+
+
+class AsyncTaskCache(TaskCache):
+    """
+    Versão assíncrona do TaskCache, com o mesmo layout de chaves: as APIs
+    WSGI e ASGI leem e invalidam o mesmo cache.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or AsyncRedisCache()
+
+    async def get_item(self, user_id, task_id):
+        task = await self.redis.hget(self.items_key(user_id), str(task_id))
+        record_cache("tasks_items", hits=task is not None, misses=task is None)
+        return task
+
+    async def get_items(self, user_id, task_ids):
+        tasks = await self.redis.hmget(
+            self.items_key(user_id), [str(i) for i in task_ids]
+        )
+        misses = tasks.count(None)
+        record_cache("tasks_items", hits=len(tasks) - misses, misses=misses)
+        return tasks
+
+    async def set_items(self, user_id, tasks, revisions):
+        if tasks:
+            await self.redis.script(LOAD_TASKS_SCRIPT)(
+                *self._load_arguments(user_id, tasks, revisions)
+            )
+
+    async def index_page(self, user_id, after_member, count):
+        pipe = self.redis.pipeline()
+        self._queue_index_page(pipe, user_id, after_member, count)
+        return self._index_result(*await pipe.execute())
+
+    async def rebuild_index(self, user_id, tasks, delta=0):
+        stored = await self.redis.script(REBUILD_INDEX_SCRIPT)(
+            *self._rebuild_arguments(user_id, tasks, delta)
+        )
+        return stored == 1
+
+    async def put(
+        self,
+        user_id,
+        task_id,
+        task,
+        data_vencimento,
+        revision,
+        old_data_vencimento=None,
+        pipe=None,
+    ):
+        async with _pipeline(self.redis, pipe) as pipe:
+            await self.redis.script(PUT_TASK_SCRIPT)(
+                *self._put_arguments(
+                    user_id,
+                    task_id,
+                    task,
+                    data_vencimento,
+                    revision,
+                    old_data_vencimento,
+                ),
+                client=pipe,
+            )
+
+    async def remove(self, user_id, task_id, data_vencimento, revision, pipe=None):
+        async with _pipeline(self.redis, pipe) as pipe:
+            await self.redis.script(REMOVE_TASK_SCRIPT)(
+                *self._remove_arguments(user_id, task_id, data_vencimento, revision),
+                client=pipe,
+            )
+
+    async def invalidate(self, user_id, pipe=None):
+        async with _pipeline(self.redis, pipe) as pipe:
+            pipe.delete(*self._task_keys(user_id))
+            await self.bump_version(user_id, pipe)
+
+    async def get_version(self, user_id):
+        pipe = self.redis.pipeline()
+        self._seed_version(user_id, pipe)
+        pipe.get(self.version_key(user_id))
+        return int((await pipe.execute())[1])
+
+    async def bump_version(self, user_id, pipe=None):
+        async with _pipeline(self.redis, pipe) as pipe:
+            super().bump_version(user_id, pipe=pipe)
+
+    async def get_query_page(self, user_id, signature):
+        pipe = self.redis.pipeline()
+        self._queue_versioned_get(pipe, user_id, self.query_key(user_id, signature))
+        return self._query_result(*(await pipe.execute())[1:])
+
+    async def set_query_page(self, user_id, signature, page, version, delta=0):
+        await self.redis.script(SET_VERSIONED_SCRIPT)(
+            *self._query_page_arguments(user_id, signature, page, version, delta)
+        )
+
+    async def get_search_page(self, user_id, signature):
+        pipe = self.redis.pipeline()
+        self._queue_versioned_get(pipe, user_id, self.search_key(user_id, signature))
+        return self._search_result(*(await pipe.execute())[1:])
+
+    async def set_search_page(self, user_id, signature, page, version):
+        await self.redis.script(SET_VERSIONED_SCRIPT)(
+            *self._search_page_arguments(user_id, signature, page, version)
+        )
+
+
+@asynccontextmanager
+async def _pipeline(redis, pipe):
+    """Usa o pipeline informado ou cria um e o executa ao final do bloco"""
+    if pipe is not None:
+        yield pipe
+        return
+    pipe = redis.pipeline()
+    yield pipe
+    await pipe.execute()
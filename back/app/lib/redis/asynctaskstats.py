@@ -0,0 +1,74 @@
+from app.lib.redis.asyncrediscache import AsyncRedisCache
+from app.lib.redis.asynctaskcache import _pipeline
+from app.lib.redis.taskstats import (
+    REBUILD_STATS_SCRIPT,
+    UPDATE_STATS_SCRIPT,
+    TaskStats,
+)
+
+
+class AsyncTaskStats(TaskStats):
+    """
+    Versão assíncrona do TaskStats, com o mesmo layout de chaves: as APIs
+    WSGI e ASGI leem e atualizam os mesmos contadores.
+    """
+
+    def __init__(self, redis=None, config=None):
+        super().__init__(redis or AsyncRedisCache(config), config)
+
+    async def get(self, user_id):
+        pipe = self.redis.pipeline()
+        self._queue_get(pipe, user_id)
+        return self._result(*await pipe.execute())
+
+    async def put(
+        self,
+        user_id,
+        task_id,
+        revision,
+        status,
+        data_vencimento,
+        created=False,
+        pipe=None,
+    ):
+        await self._update(
+            user_id,
+            [
+                str(task_id),
+                revision,
+                status,
+                self._due_argument(status, data_vencimento),
+                "1" if created else "",
+                self.redis.expiration("TASKS_STATS_EXPIRATION"),
+            ],
+            pipe,
+        )
+
+    async def remove(self, user_id, task_id, revision, pipe=None):
+        await self._update(
+            user_id,
+            [
+                str(task_id),
+                revision + 1,
+                "",
+                "",
+                "",
+                self.redis.expiration("TASKS_STATS_EXPIRATION"),
+            ],
+            pipe,
+        )
+
+    async def _update(self, user_id, args, pipe):
+        async with _pipeline(self.redis, pipe) as pipe:
+            await self.redis.script(UPDATE_STATS_SCRIPT)(
+                self._keys(user_id), args, client=pipe
+            )
+
+    async def rebuild(self, user_id, version, tasks):
+        keys, args = self._rebuild_arguments(user_id, version, tasks)
+        stored = await self.redis.script(REBUILD_STATS_SCRIPT)(keys, args)
+        return self._summary(tasks), bool(stored)
+
+    async def invalidate(self, user_id, pipe=None):
+        async with _pipeline(self.redis, pipe) as pipe:
+            pipe.delete(*self._keys(user_id))
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from app.lib.metrics import record_cache
+from app.lib.redis.rediscache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "blocklist:revoked"
+
+
+class TokenBlocklist:
+    """
+    Blocklist de tokens JWT no Redis com near-cache local.
+
+    Cada processo mantém um LRU limitado com os jtis já consultados: tokens
+    revogados ficam em cache por BLOCKLIST_REVOKED_TTL segundos e tokens
+    válidos por BLOCKLIST_VALID_TTL segundos. Revogações são publicadas no
+    canal ``blocklist:revoked`` e aplicadas imediatamente no near-cache de
+    todos os processos; o TTL dos tokens válidos limita a janela de
+    inconsistência caso uma mensagem seja perdida.
+    Implementa o padrão Singleton para compartilhar o cache do processo.
+    """
+
+    _instances = {}
+    _config = None
+
+    def __new__(cls, config=None):
+        # Use config as key for the instance to support different environments
+        config_key = id(config) if config else "default"
+
+        if config_key not in cls._instances:
+            cls._instances[config_key] = super(TokenBlocklist, cls).__new__(cls)
+            cls._instances[config_key]._config = config
+            cls._instances[config_key]._setup()
+        return cls._instances[config_key]
+
+    def _setup(self):
+        self.redis = RedisCache(self._config)
+        if not self._config:
+            from app.config import config_by_name
+
+            env = os.getenv("ENV", "development")
+            self._config = config_by_name.get(env)
+
+        self.max_size = self._config.BLOCKLIST_NEAR_CACHE_SIZE
+        self.valid_ttl = self._config.BLOCKLIST_VALID_TTL
+        self.revoked_ttl = self._config.BLOCKLIST_REVOKED_TTL
+        self._entries = OrderedDict()  # jti -> (revogado, expira_em)
+        self._lock = threading.Lock()
+        self._listener = None
+        self._listener_pid = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(jti):
+        return f"blocklist:{jti}"
+
+    def is_revoked(self, jti):
+        """Indica se o token foi revogado, consultando o Redis só em cache miss"""
+        revoked = self.lookup(jti)
+        if revoked is None:
+            revoked = self.redis.redis_client.exists(self.key(jti)) > 0
+            self.remember(jti, revoked)
+        return revoked
+
+    def lookup(self, jti):
+        """
+        Consulta apenas o near-cache: retorna True/False, ou None em cache
+        miss (o chamador consulta o Redis e registra o resultado com
+        ``remember``). Permite que a API ASGI consulte o Redis sem bloquear.
+        """
+        self._ensure_listener()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(jti)
+                self.hits += 1
+                record_cache("blocklist", hits=1)
+                return entry[0]
+            self.misses += 1
+        record_cache("blocklist", misses=1)
+        return None
+
+    def revoke(self, jti, expires_in):
+        """Revoga o token pelos ``expires_in`` segundos restantes de validade"""
+        expires_in = max(int(expires_in), 1)
+        pipe = self.redis.redis_client.pipeline(transaction=False)
+        pipe.setex(self.key(jti), expires_in, "1")
+        pipe.publish(CHANNEL, jti)
+        pipe.execute()
+        self.remember(jti, True)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
+
+    def remember(self, jti, revoked):
+        ttl = self.revoked_ttl if revoked else self.valid_ttl
+        with self._lock:
+            self._entries[jti] = (revoked, time.monotonic() + ttl)
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _on_revoked(self, message):
+        jti = message["data"]
+        if isinstance(jti, bytes):
+            jti = jti.decode("utf-8")
+        self.remember(jti, True)
+
+    def _ensure_listener(self):
+        """
+        Inicia a thread que escuta revogações, ou a reinicia após um fork ou
+        uma queda da conexão com o Redis.
+        """
+        if self._listener_pid == os.getpid() and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid() and self._listener.is_alive():
+                return
+            # Revogações publicadas enquanto ninguém escutava foram perdidas
+            self._entries.clear()
+            pubsub = self.redis.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CHANNEL: self._on_revoked})
+            self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            self._listener_pid = os.getpid()
+            logger.info(f"Near-cache da blocklist escutando {CHANNEL}")
@@ -0,0 +1,239 @@
+import json
+import struct
+import zlib
+from datetime import UTC, datetime, timedelta
+
+import msgpack
+import orjson
+from bson import ObjectId
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - compressão zstd é opcional
+    zstandard = None
+
+# Cabeçalho dos valores gravados no Redis:
+#   MAGIC (2 bytes) | versão (1 byte) | codec (1 byte) | compressão (1 byte)
+# Valores sem o cabeçalho são tratados como JSON legado, de forma que o
+# formato pode mudar sem a necessidade de limpar o cache.
+MAGIC = b"RC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">2sBBB")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CodecError(ValueError):
+    """Valor do cache em formato desconhecido"""
+
+
+class JsonCodec:
+    """JSON da biblioteca padrão, com tipos especiais marcados por ``__type__``"""
+
+    id = 0
+    name = "json"
+
+    def dumps(self, value):
+        return json.dumps(value, default=self._default).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data, object_hook=self._object_hook)
+
+    @staticmethod
+    def _default(obj):
+        """Serializa tipos especiais para JSON"""
+        if isinstance(obj, datetime):
+            return {"__type__": "datetime", "value": obj.isoformat()}
+        elif isinstance(obj, ObjectId):
+            return {"__type__": "objectid", "value": str(obj)}
+        raise TypeError(f"Objeto do tipo {obj.__class__.__name__} não é serializável")
+
+    @staticmethod
+    def _object_hook(obj):
+        """Deserializa tipos especiais do JSON"""
+        if "__type__" in obj:
+            if obj["__type__"] == "datetime":
+                return datetime.fromisoformat(obj["value"])
+            elif obj["__type__"] == "objectid":
+                return ObjectId(obj["value"])
+        return obj
+
+
+class OrjsonCodec(JsonCodec):
+    """JSON com orjson, compatível com as marcações do ``JsonCodec``"""
+
+    id = 1
+    name = "orjson"
+
+    def dumps(self, value):
+        return orjson.dumps(
+            value, default=self._default, option=orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+    def loads(self, data):
+        return self._restore(orjson.loads(data))
+
+    def _restore(self, obj):
+        if isinstance(obj, dict):
+            return self._object_hook({k: self._restore(v) for k, v in obj.items()})
+        if isinstance(obj, list):
+            return [self._restore(v) for v in obj]
+        return obj
+
+
+class MsgpackCodec:
+    """
+    Codec binário com msgpack. ObjectId e datetime são gravados como tipos
+    de extensão, sem conversão para texto.
+    """
+
+    id = 2
+    name = "msgpack"
+
+    EXT_OBJECTID = 1
+    EXT_DATETIME = 2
+    EXT_DATETIME_UTC = 3
+    _MICROS = struct.Struct(">q")
+
+    def dumps(self, value):
+        return msgpack.packb(value, default=self._default, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False)
+
+    def _default(self, obj):
+        if isinstance(obj, ObjectId):
+            return msgpack.ExtType(self.EXT_OBJECTID, obj.binary)
+        if isinstance(obj, datetime):
+            code = self.EXT_DATETIME
+            if obj.tzinfo is not None:
+                code = self.EXT_DATETIME_UTC
+                obj = obj.astimezone(UTC).replace(tzinfo=None)
+            micros = (obj - _EPOCH) // timedelta(microseconds=1)
+            return msgpack.ExtType(code, self._MICROS.pack(micros))
+        raise TypeError(f"Objeto do tipo {obj.__class__.__name__} não é serializável")
+
+    def _ext_hook(self, code, data):
+        if code == self.EXT_OBJECTID:
+            return ObjectId(data)
+        if code in (self.EXT_DATETIME, self.EXT_DATETIME_UTC):
+            (micros,) = self._MICROS.unpack(data)
+            value = _EPOCH + timedelta(microseconds=micros)
+            if code == self.EXT_DATETIME_UTC:
+                value = value.replace(tzinfo=UTC)
+            return value
+        return msgpack.ExtType(code, data)
+
+
+class NoCompression:
+    id = 0
+    name = "none"
+
+    def compress(self, data):
+        return data
+
+    def decompress(self, data):
+        return data
+
+
+class ZlibCompression:
+    id = 1
+    name = "zlib"
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class ZstdCompression:
+    id = 2
+    name = "zstd"
+
+    def __init__(self, level=3):
+        if zstandard is None:
+            raise RuntimeError("Compressão zstd requer o pacote 'zstandard' instalado")
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec, OrjsonCodec, MsgpackCodec)}
+COMPRESSIONS = {
+    compression.name: compression
+    for compression in (NoCompression, ZlibCompression, ZstdCompression)
+}
+
+
+class CacheSerializer:
+    """
+    Serializa valores do cache com o codec configurado, comprimindo os que
+    ultrapassam ``threshold`` bytes. A leitura usa o codec e a compressão
+    indicados no cabeçalho de cada valor, independente da configuração atual.
+    """
+
+    def __init__(self, codec="msgpack", compression="zlib", threshold=1024):
+        self.codec = CODECS[codec]()
+        self.compression = COMPRESSIONS[compression]()
+        self.threshold = threshold
+        self._codecs = {self.codec.id: self.codec}
+        self._compressions = {
+            NoCompression.id: NoCompression(),
+            self.compression.id: self.compression,
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            codec=config.REDIS_CODEC,
+            compression=config.REDIS_COMPRESSION,
+            threshold=config.REDIS_COMPRESSION_THRESHOLD,
+        )
+
+    def dumps(self, value):
+        payload = self.codec.dumps(value)
+        compression = NoCompression.id
+        if self.compression.id != NoCompression.id and len(payload) > self.threshold:
+            payload = self.compression.compress(payload)
+            compression = self.compression.id
+        return HEADER.pack(MAGIC, FORMAT_VERSION, self.codec.id, compression) + payload
+
+    def loads(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data.startswith(MAGIC):
+            # Valor gravado antes da introdução do cabeçalho
+            return self._codec(JsonCodec.id).loads(data)
+
+        _, version, codec_id, compression_id = HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise CodecError(f"Versão de formato desconhecida: {version}")
+        payload = self._compression(compression_id).decompress(data[HEADER.size :])
+        return self._codec(codec_id).loads(payload)
+
+    def _codec(self, codec_id):
+        if codec_id not in self._codecs:
+            codec = next((c for c in CODECS.values() if c.id == codec_id), None)
+            if codec is None:
+                raise CodecError(f"Codec desconhecido: {codec_id}")
+            self._codecs[codec_id] = codec()
+        return self._codecs[codec_id]
+
+    def _compression(self, compression_id):
+        if compression_id not in self._compressions:
+            compression = next(
+                (c for c in COMPRESSIONS.values() if c.id == compression_id), None
+            )
+            if compression is None:
+                raise CodecError(f"Compressão desconhecida: {compression_id}")
+            self._compressions[compression_id] = compression()
+        return self._compressions[compression_id]
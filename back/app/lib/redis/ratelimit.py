@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import math
+import os
+
+from redis.exceptions import RedisError
+
+from app.config import config_by_name
+from app.lib.metrics import RATE_LIMIT_REQUESTS
+from app.lib.redis.rediscache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Token bucket atômico sobre vários buckets (KEYS), com a capacidade e a
+# reposição (tokens por segundo) de cada um em pares no ARGV. A tentativa só
+# é aceita, consumindo um token de cada bucket, se todos tiverem um token
+# disponível; caso contrário nada é consumido. Retorna {0, 0} quando aceita,
+# ou {i, ms}: o índice do bucket que limitou e os milissegundos até que ele
+# tenha um token. O relógio é o do Redis, comum a todos os processos.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = {}
+local limited, wait = 0, 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    available = math.min(capacity, available + elapsed * rate)
+    tokens[i] = available
+    if available < 1 and (1 - available) / rate > wait then
+        limited, wait = i, (1 - available) / rate
+    end
+end
+if limited > 0 then
+    return {limited, math.ceil(wait * 1000)}
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+return {0, 0}
+"""
+
+# Chaves limitadas em cada regra: cada uma tem um bucket próprio, com a
+# capacidade RATE_LIMIT_<REGRA>_<CHAVE> reposta a cada RATE_LIMIT_<REGRA>_PERIOD
+RULES = {
+    "login": ("ip", "email"),
+    "password_reset": ("ip", "email"),
+}
+
+
+def limited_response(retry_after):
+    """Resposta das rotas quando o limite de tentativas foi atingido"""
+    return (
+        {"message": "Muitas tentativas, tente novamente mais tarde"},
+        429,
+        {"Retry-After": str(retry_after)},
+    )
+
+
+class RateLimiter:
+    """
+    Limite de tentativas por IP e por email nas rotas de autenticação, com
+    token buckets no Redis (ver TOKEN_BUCKET_SCRIPT). A verificação é feita
+    antes de qualquer consulta ao MongoDB ou hashing de senha, para que
+    rajadas de tentativas não consumam os workers.
+
+    Se o Redis estiver indisponível, as tentativas são permitidas: o limite
+    protege o servidor, mas não deve derrubar o login junto com o cache.
+    """
+
+    def __init__(self, redis=None, config=None):
+        self.config = config or config_by_name.get(os.getenv("ENV", "development"))
+        self.redis = redis or RedisCache(config)
+
+    def hit(self, rule, **values):
+        """
+        Registra uma tentativa da regra ``rule`` para as chaves informadas
+        (ex.: ``ip=...``, ``email=...``). Retorna None se permitida, ou os
+        segundos a aguardar (Retry-After).
+        """
+        if not self.config.RATE_LIMIT_ENABLED:
+            return None
+        kinds, keys, args = self._arguments(rule, values)
+        if not keys:
+            return None
+        try:
+            result = self.redis.script(TOKEN_BUCKET_SCRIPT)(keys, args)
+        except RedisError as e:
+            logger.warning(f"Limite de tentativas não verificado ({rule}): {e}")
+            return None
+        return self._result(rule, kinds, result)
+
+    @staticmethod
+    def key(rule, kind, value):
+        # Emails são normalizados e não ficam legíveis nas chaves
+        if kind == "email":
+            value = hashlib.sha1(value.strip().lower().encode("utf-8")).hexdigest()
+        return f"ratelimit:{rule}:{kind}:{value}"
+
+    def _arguments(self, rule, values):
+        period = getattr(self.config, f"RATE_LIMIT_{rule.upper()}_PERIOD")
+        kinds, keys, args = [], [], []
+        for kind in RULES[rule]:
+            if not values.get(kind):
+                continue
+            capacity = getattr(self.config, f"RATE_LIMIT_{rule.upper()}_{kind.upper()}")
+            kinds.append(kind)
+            keys.append(self.key(rule, kind, values[kind]))
+            args.extend([capacity, capacity / period])
+        return kinds, keys, args
+
+    @staticmethod
+    def _result(rule, kinds, result):
+        limited, wait_ms = (int(v) for v in result)
+        if not limited:
+            RATE_LIMIT_REQUESTS.labels(rule, "allowed").inc()
+            return None
+        RATE_LIMIT_REQUESTS.labels(rule, f"limited_{kinds[limited - 1]}").inc()
+        return max(1, math.ceil(wait_ms / 1000))
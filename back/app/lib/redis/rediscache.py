@@ -1,13 +1,45 @@
-import json
 import redis
-from datetime import datetime
-from bson import ObjectId
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
 import os
+import threading
+
+from app.lib.metrics import InstrumentedRedis
+from app.lib.redis.codecs import CacheSerializer
+from app.lib.redis.singleflight import should_refresh
+
+
+def pool_options(config, retry_class=Retry):
+    """
+    Opções do pool de conexões, compartilhadas pelos clientes síncrono e
+    assíncrono (que usa a sua própria classe de ``Retry``).
+    """
+    return dict(
+        password=config.DOCKER_REDIS_PASSWORD,
+        max_connections=config.REDIS_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT,
+        socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
+        retry=retry_class(
+            ExponentialBackoff(
+                cap=config.REDIS_RETRY_BACKOFF_CAP,
+                base=config.REDIS_RETRY_BACKOFF_BASE,
+            ),
+            config.REDIS_RETRIES,
+        ),
+        retry_on_error=[ConnectionError, TimeoutError],
+    )
 
 
 class RedisCache:
     _instances = {}
     _config = None
+    _client = None
+    _pid = None
+    _lock = threading.Lock()
 
     def __new__(cls, config=None):
         # Use config as key for the instance to support different environments
@@ -16,59 +48,154 @@ class RedisCache:
         if config_key not in cls._instances:
             cls._instances[config_key] = super(RedisCache, cls).__new__(cls)
             cls._instances[config_key]._config = config
-            cls._instances[config_key]._connect()
+            cls._instances[config_key]._load_config()
         return cls._instances[config_key]
 
-    def _connect(self):
-        """Establish connection to Redis"""
+    @classmethod
+    def close_all(cls):
+        """Fecha as conexões de todas as instâncias do processo"""
+        for instance in cls._instances.values():
+            instance.close()
+
+    def _load_config(self):
         if not self._config:
             from app.config import config_by_name
 
             env = os.getenv("ENV", "development")
             configuration = config_by_name.get(env)
             self._config = configuration
+        self.serializer = CacheSerializer.from_config(self._config)
+
+    @property
+    def redis_client(self):
+        """
+        Cliente Redis do processo atual. O pool é criado no primeiro acesso
+        e recriado após um fork, para que workers não compartilhem sockets.
+        """
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._connect()
+        return self._client
 
-        self.redis_client = redis.from_url(
-            self._config.REDIS_URI, password=self._config.DOCKER_REDIS_PASSWORD
+    def _connect(self):
+        """Establish connection to Redis"""
+        # Pool limitado: ao atingir REDIS_MAX_CONNECTIONS, aguarda até
+        # REDIS_POOL_TIMEOUT segundos por uma conexão livre
+        pool = redis.BlockingConnectionPool.from_url(
+            self._config.REDIS_URI, **pool_options(self._config)
         )
+        # Mede a latência de cada comando (ver app.lib.metrics)
+        self._client = InstrumentedRedis(connection_pool=pool)
+        self._pid = os.getpid()
+        self._scripts = {}
+
+    def script(self, source):
+        """
+        Script Lua registrado no cliente do processo atual. Chamado com
+        ``client=pipe``, é apenas enfileirado no pipeline.
+        """
+        client = self.redis_client
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = client.register_script(source)
+        return script
+
+    def close(self):
+        """Fecha as conexões do pool do processo atual"""
+        if self._client is not None:
+            # Após um fork, os sockets pertencem ao processo pai
+            if self._pid == os.getpid():
+                self._client.close()
+                self._client.connection_pool.disconnect()
+            self._client = None
+
+    def expiration(self, expiration_key="REDIS_EXPIRATION"):
+        """Retorna o TTL (em segundos) configurado em ``expiration_key``"""
+        return getattr(self._config, expiration_key)
 
     def set(self, key, value, expiration_key="REDIS_EXPIRATION"):
         """Armazena um valor no cache com expiração"""
-        # expiration = self._config[expiration_key]
-        expiration = getattr(self._config, expiration_key)
-        serialized = json.dumps(value, default=self._json_serializer)
-        self.redis_client.setex(key, expiration, serialized)
+        self.redis_client.setex(
+            key, self.expiration(expiration_key), self.serialize(value)
+        )
 
     def get(self, key):
         """Recupera um valor do cache"""
         data = self.redis_client.get(key)
         if data:
-            return json.loads(data, object_hook=self._json_deserializer)
+            return self.deserialize(data)
         return None
 
     def delete(self, key):
         """Remove um valor do cache"""
         self.redis_client.delete(key)
 
-    def clear_pattern(self, pattern):
-        """Remove todos os valores que correspondem a um padrão"""
-        keys = self.redis_client.keys(pattern)
+    def pipeline(self):
+        """
+        Pipeline sem transação para agrupar vários comandos em uma única
+        ida ao Redis. Os valores devem ser serializados com ``serialize``.
+        """
+        return self.redis_client.pipeline(transaction=False)
+
+    def lock(self, name):
+        """
+        Lock de curta duração para que apenas um processo recalcule a entrada
+        ``name``. Expira sozinho após CACHE_LOCK_TIMEOUT segundos, e quem o
+        aguarda desiste após CACHE_LOCK_WAIT segundos.
+        """
+        return self.redis_client.lock(
+            f"lock:{name}",
+            timeout=self._config.CACHE_LOCK_TIMEOUT,
+            blocking_timeout=self._config.CACHE_LOCK_WAIT,
+        )
+
+    def should_refresh(self, remaining, delta):
+        """Atualização antecipada com o beta configurado (ver singleflight)"""
+        return should_refresh(remaining, delta, self._config.CACHE_EARLY_REFRESH_BETA)
+
+    def mdelete(self, *keys):
+        """Remove vários valores do cache com um único comando"""
         if keys:
             self.redis_client.delete(*keys)
 
-    def _json_serializer(self, obj):
-        """Serializa tipos especiais para JSON"""
-        if isinstance(obj, datetime):
-            return {"__type__": "datetime", "value": obj.isoformat()}
-        elif isinstance(obj, ObjectId):
-            return {"__type__": "objectid", "value": str(obj)}
-        raise TypeError(f"Objeto do tipo {obj.__class__.__name__} não é serializável")
-
-    def _json_deserializer(self, obj):
-        """Deserializa tipos especiais do JSON"""
-        if "__type__" in obj:
-            if obj["__type__"] == "datetime":
-                return datetime.fromisoformat(obj["value"])
-            elif obj["__type__"] == "objectid":
-                return ObjectId(obj["value"])
-        return obj
+    def hget(self, key, field):
+        """Recupera um campo de um hash do cache"""
+        data = self.redis_client.hget(key, field)
+        if data:
+            return self.deserialize(data)
+        return None
+
+    def hmget(self, key, fields):
+        """Recupera vários campos de um hash, na mesma ordem de ``fields``"""
+        if not fields:
+            return []
+        return [
+            self.deserialize(data) if data else None
+            for data in self.redis_client.hmget(key, fields)
+        ]
+
+    def clear_pattern(self, pattern):
+        """
+        Remove todos os valores que correspondem a um padrão. Usa SCAN
+        incremental e UNLINK em lotes, sem bloquear o servidor como KEYS.
+        """
+        batch_size = self._config.REDIS_DELETE_BATCH_SIZE
+        batch = []
+        for key in self.redis_client.scan_iter(
+            match=pattern, count=self._config.REDIS_SCAN_COUNT
+        ):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                self.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            self.redis_client.unlink(*batch)
+
+    def serialize(self, value):
+        """Serializa um valor para gravação no Redis"""
+        return self.serializer.dumps(value)
+
+    def deserialize(self, data):
+        """Deserializa um valor lido do Redis"""
+        return self.serializer.loads(data)
@@ -0,0 +1,75 @@
+import math
+import random
+
+from redis.exceptions import LockError
+
+
+def should_refresh(remaining, delta, beta=1.0):
+    """
+    Atualização antecipada probabilística (XFetch): decide se uma entrada
+    que expira em ``remaining`` segundos, e leva ``delta`` segundos para ser
+    recalculada, deve ser atualizada agora. A probabilidade cresce à medida
+    que a expiração se aproxima e com o custo do recálculo, de forma que as
+    atualizações se espalham no tempo em vez de coincidirem na expiração.
+    """
+    if remaining <= 0:
+        return True
+    # 1 - random() está em (0, 1], evitando log(0)
+    return -delta * beta * math.log(1 - random.random()) >= remaining
+
+
+def refresh(redis, name, stale, load, compute):
+    """
+    Recalcula uma entrada do cache em apenas um processo por vez (single-flight).
+
+    ``stale`` é o valor atual, ainda utilizável, ou None se a entrada não
+    existe. Com um valor atual, quem não obtém o lock o retorna sem esperar
+    (stale-while-revalidate). Sem ele, aguarda quem está recalculando e relê
+    o cache com ``load()``; só chama ``compute()``, que recalcula e grava a
+    entrada, se ela continuar ausente.
+    """
+    lock = redis.lock(name)
+    acquired = lock.acquire(blocking=stale is None)
+    if not acquired and stale is not None:
+        return stale
+    try:
+        if stale is None:
+            value = load()
+            if value is not None:
+                return value
+        return compute()
+    finally:
+        if acquired:
+            _release(lock)
+
+
+async def refresh_async(redis, name, stale, load, compute):
+    """Versão assíncrona de ``refresh``, com ``load`` e ``compute`` corrotinas"""
+    lock = redis.lock(name)
+    acquired = await lock.acquire(blocking=stale is None)
+    if not acquired and stale is not None:
+        return stale
+    try:
+        if stale is None:
+            value = await load()
+            if value is not None:
+                return value
+        return await compute()
+    finally:
+        if acquired:
+            await _release_async(lock)
+
+
+def _release(lock):
+    try:
+        lock.release()
+    except LockError:
+        # O lock expirou durante o recálculo; outro processo pode tê-lo obtido
+        pass
+
+
+async def _release_async(lock):
+    try:
+        await lock.release()
+    except LockError:
+        pass
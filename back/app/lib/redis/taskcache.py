@@ -0,0 +1,517 @@
+from contextlib import contextmanager
+from datetime import UTC, datetime
+import time
+
+from app.lib.metrics import record_cache
+from app.lib.redis.rediscache import RedisCache
+
+# Membro sentinela do índice: sua presença indica que o índice está completo
+INDEX_SENTINEL = ""
+
+# As escritas no cache são condicionadas à revisão de cada tarefa (campo
+# "revisao" do MongoDB, incrementado a cada alteração), registrada no hash
+# de revisões como "revisão|membro do índice". Exclusões deixam a revisão
+# seguinte com o membro vazio, para que escritas atrasadas sejam ignoradas.
+
+# Grava uma tarefa alterada ou criada, se sua revisão for mais nova que a do
+# cache, movendo o membro do índice. Sem revisão em cache, uma alteração
+# sobre um índice completo não tem como saber o membro atual: o cache do
+# usuário é descartado (retorno -1).
+# KEYS: items, index, revisions
+# ARGV: task_id, tarefa, revisão, membro, membro anterior (vazio em criações),
+#       expiração
+PUT_TASK_SCRIPT = """
+local revision = tonumber(ARGV[3])
+local old = ARGV[5]
+local current = redis.call('HGET', KEYS[3], ARGV[1])
+if current then
+    local sep = string.find(current, '|', 1, true)
+    if tonumber(string.sub(current, 1, sep - 1)) >= revision then
+        return 0
+    end
+    old = string.sub(current, sep + 1)
+elseif old ~= '' and redis.call('ZSCORE', KEYS[2], '') then
+    redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+    return -1
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[3] .. '|' .. ARGV[4])
+if old ~= '' and old ~= ARGV[4] then
+    redis.call('ZREM', KEYS[2], old)
+end
+redis.call('ZADD', KEYS[2], 0, ARGV[4])
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[6])
+end
+return 1
+"""
+
+# Remove uma tarefa excluída e registra a revisão seguinte sem membro
+# KEYS: items, index, revisions
+# ARGV: task_id, revisão da tarefa excluída, membro, expiração
+REMOVE_TASK_SCRIPT = """
+local revision = tonumber(ARGV[2])
+local old = ARGV[3]
+local current = redis.call('HGET', KEYS[3], ARGV[1])
+if current then
+    local sep = string.find(current, '|', 1, true)
+    revision = math.max(revision, tonumber(string.sub(current, 1, sep - 1)))
+    old = string.sub(current, sep + 1)
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+if old ~= '' then
+    redis.call('ZREM', KEYS[2], old)
+end
+redis.call('HSET', KEYS[3], ARGV[1], (revision + 1) .. '|')
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+return 1
+"""
+
+# Grava tarefas lidas do MongoDB, exceto as que têm outra revisão em cache:
+# uma escrita concorrente já as gravou ou ainda vai gravá-las
+# KEYS: items, revisions
+# ARGV: expiração, seguida de (task_id, tarefa, revisão) por tarefa
+LOAD_TASKS_SCRIPT = """
+for i = 2, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[2], ARGV[i])
+    if not current
+        or tonumber(string.match(current, '^[^|]*')) == tonumber(ARGV[i + 2]) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Substitui o índice pelas tarefas lidas do MongoDB. Se o cache tiver uma
+# revisão mais nova que a lida, ou uma tarefa que a leitura não viu, uma
+# escrita ocorreu durante a reconstrução: o cache do usuário é descartado
+# (retorno -1) e o índice será reconstruído na próxima leitura.
+# KEYS: index, revisions, items, delta
+# ARGV: expiração, duração da reconstrução, seguidas de
+#       (task_id, revisão, membro) por tarefa
+REBUILD_INDEX_SCRIPT = """
+local tasks = {}
+for i = 3, #ARGV, 3 do
+    tasks[ARGV[i]] = {tonumber(ARGV[i + 1]), ARGV[i + 2]}
+end
+local cached = {}
+local current = redis.call('HGETALL', KEYS[2])
+for i = 1, #current, 2 do
+    local sep = string.find(current[i + 1], '|', 1, true)
+    local revision = tonumber(string.sub(current[i + 1], 1, sep - 1))
+    local task = tasks[current[i]]
+    if (task and revision > task[1])
+        or (not task and sep < #current[i + 1]) then
+        redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+        return -1
+    end
+    cached[current[i]] = revision
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZADD', KEYS[1], 0, '')
+for task_id, task in pairs(tasks) do
+    redis.call('ZADD', KEYS[1], 0, task[2])
+    if cached[task_id] ~= task[1] then
+        redis.call('HDEL', KEYS[3], task_id)
+    end
+    redis.call('HSET', KEYS[2], task_id, task[1] .. '|' .. task[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+redis.call('SET', KEYS[4], ARGV[2], 'EX', ARGV[1])
+return 1
+"""
+
+# Grava uma entrada derivada das tarefas do usuário (página de listagem ou de
+# busca) se a versão das tarefas ainda for a lida antes da consulta ao
+# MongoDB, como em REBUILD_STATS_SCRIPT. Uma versão diferente indica uma
+# alteração que a consulta pode não ter visto: nada é gravado (retorno 0).
+# KEYS: version, entrada
+# ARGV: versão, entrada serializada, expiração
+SET_VERSIONED_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class TaskCache:
+    """
+    Cache das tarefas de cada usuário no Redis.
+
+    Layout por usuário:
+        tasks:{user_id}:items  -> hash  {task_id: tarefa serializada}
+        tasks:{user_id}:index  -> zset  membros "data_vencimento|task_id" com
+                                        score 0, ordenados lexicograficamente
+        tasks:{user_id}:revisions -> hash {task_id: "revisão|membro"}
+        tasks:{user_id}:version -> int  incrementado a cada alteração
+        tasks:{user_id}:index:delta -> duração da última reconstrução do
+                                        índice, para a atualização antecipada
+        tasks:{user_id}:query:{assinatura} -> página de uma listagem filtrada
+        tasks:{user_id}:search:{assinatura} -> página de uma busca
+
+    O hash é preenchido sob demanda; o índice só é considerado válido quando
+    contém o membro sentinela, gravado junto com a reconstrução completa.
+    Alterações atualizam apenas a entrada da tarefa (write-through), por
+    scripts Lua condicionados à revisão da tarefa, de forma que escritas
+    concorrentes fora de ordem não sobrescrevem dados mais novos.
+
+    As páginas de listagens filtradas e de buscas guardam a versão das
+    tarefas lida antes da consulta e só são servidas enquanto ela for a
+    atual: as alterações apenas incrementam a versão, e as páginas antigas
+    expiram sozinhas.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or RedisCache()
+
+    @staticmethod
+    def items_key(user_id):
+        return f"tasks:{user_id}:items"
+
+    @staticmethod
+    def index_key(user_id):
+        return f"tasks:{user_id}:index"
+
+    @staticmethod
+    def revisions_key(user_id):
+        return f"tasks:{user_id}:revisions"
+
+    @staticmethod
+    def index_delta_key(user_id):
+        return f"tasks:{user_id}:index:delta"
+
+    @staticmethod
+    def index_member(data_vencimento, task_id):
+        """
+        Membro do índice ordenado. A data é normalizada para UTC com precisão
+        de milissegundos (a mesma do BSON), de forma que a ordem lexicográfica
+        coincida com a ordenação (data_vencimento, _id) do MongoDB.
+        """
+        if isinstance(data_vencimento, str):
+            # Tarefas antigas foram gravadas com a data em texto
+            data_vencimento = datetime.fromisoformat(data_vencimento)
+        if data_vencimento.tzinfo is not None:
+            data_vencimento = data_vencimento.astimezone(UTC).replace(tzinfo=None)
+        millis = data_vencimento.microsecond // 1000
+        return f"{data_vencimento:%Y-%m-%dT%H:%M:%S}.{millis:03d}|{task_id}"
+
+    @staticmethod
+    def split_member(member):
+        """Retorna (data_vencimento em ISO, task_id) de um membro do índice"""
+        data_vencimento, task_id = member.rsplit("|", 1)
+        return data_vencimento, task_id
+
+    def get_item(self, user_id, task_id):
+        task = self.redis.hget(self.items_key(user_id), str(task_id))
+        record_cache("tasks_items", hits=task is not None, misses=task is None)
+        return task
+
+    def get_items(self, user_id, task_ids):
+        tasks = self.redis.hmget(self.items_key(user_id), [str(i) for i in task_ids])
+        misses = tasks.count(None)
+        record_cache("tasks_items", hits=len(tasks) - misses, misses=misses)
+        return tasks
+
+    def set_items(self, user_id, tasks, revisions):
+        """
+        Grava no hash as tarefas lidas do MongoDB ({task_id: tarefa}), com
+        suas revisões ({task_id: revisão}). Tarefas com outra revisão em cache
+        são ignoradas.
+        """
+        if tasks:
+            self.redis.script(LOAD_TASKS_SCRIPT)(
+                *self._load_arguments(user_id, tasks, revisions)
+            )
+
+    def _load_arguments(self, user_id, tasks, revisions):
+        args = [self.redis.expiration()]
+        for task_id, task in tasks.items():
+            args += [str(task_id), self.redis.serialize(task), revisions[task_id]]
+        return [self.items_key(user_id), self.revisions_key(user_id)], args
+
+    def index_page(self, user_id, after_member, count):
+        """
+        Retorna (membros, reconstruir): até ``count`` membros do índice
+        posteriores a ``after_member``, ou None se o índice não estiver
+        completo, e se ele deve ser reconstruído. Um índice completo também
+        é reconstruído antecipadamente, com probabilidade crescente à medida
+        que se aproxima da expiração (ver RedisCache.should_refresh).
+        """
+        pipe = self.redis.pipeline()
+        self._queue_index_page(pipe, user_id, after_member, count)
+        return self._index_result(*pipe.execute())
+
+    def _queue_index_page(self, pipe, user_id, after_member, count):
+        start = f"({after_member}" if after_member else f"({INDEX_SENTINEL}"
+        pipe.zscore(self.index_key(user_id), INDEX_SENTINEL)
+        pipe.zrangebylex(self.index_key(user_id), start, "+", start=0, num=count)
+        pipe.pttl(self.index_key(user_id))
+        pipe.get(self.index_delta_key(user_id))
+
+    def _index_result(self, ready, members, ttl, delta):
+        record_cache("tasks_index", hits=ready is not None, misses=ready is None)
+        if ready is None:
+            return None, True
+        members = [m.decode("utf-8") for m in members]
+        # Sem TTL ou sem a duração da reconstrução, não há como antecipar
+        if ttl < 0 or delta is None:
+            return members, False
+        return members, self.redis.should_refresh(ttl / 1000, float(delta))
+
+    def rebuild_index(self, user_id, tasks, delta=0):
+        """
+        Substitui o índice do usuário pelas tarefas lidas do MongoDB, como
+        (task_id, revisão, data_vencimento). ``delta`` é a duração da
+        reconstrução, em segundos. Retorna se o índice foi gravado: uma
+        escrita concorrente descarta o cache do usuário (ver
+        REBUILD_INDEX_SCRIPT).
+        """
+        stored = self.redis.script(REBUILD_INDEX_SCRIPT)(
+            *self._rebuild_arguments(user_id, tasks, delta)
+        )
+        return stored == 1
+
+    def _rebuild_arguments(self, user_id, tasks, delta):
+        keys = [
+            self.index_key(user_id),
+            self.revisions_key(user_id),
+            self.items_key(user_id),
+            self.index_delta_key(user_id),
+        ]
+        args = [self.redis.expiration(), delta]
+        for task_id, revision, data_vencimento in tasks:
+            member = self.index_member(data_vencimento, task_id)
+            args += [str(task_id), revision, member]
+        return keys, args
+
+    def put(
+        self,
+        user_id,
+        task_id,
+        task,
+        data_vencimento,
+        revision,
+        old_data_vencimento=None,
+        pipe=None,
+    ):
+        """
+        Grava uma tarefa no hash e atualiza sua posição no índice, se
+        ``revision`` for mais nova que a revisão em cache. Com ``pipe``, o
+        script é apenas enfileirado no pipeline informado.
+
+        ``old_data_vencimento`` (None em criações) só é usado se a tarefa
+        não tiver revisão em cache. Se o índice não existir, o membro é
+        gravado sem o sentinela e o índice será reconstruído na próxima
+        leitura.
+        """
+        with _pipeline(self.redis, pipe) as pipe:
+            self.redis.script(PUT_TASK_SCRIPT)(
+                *self._put_arguments(
+                    user_id,
+                    task_id,
+                    task,
+                    data_vencimento,
+                    revision,
+                    old_data_vencimento,
+                ),
+                client=pipe,
+            )
+
+    def _put_arguments(
+        self, user_id, task_id, task, data_vencimento, revision, old_data_vencimento
+    ):
+        old_member = ""
+        if old_data_vencimento is not None:
+            old_member = self.index_member(old_data_vencimento, task_id)
+        return self._task_keys(user_id), [
+            str(task_id),
+            self.redis.serialize(task),
+            revision,
+            self.index_member(data_vencimento, task_id),
+            old_member,
+            self.redis.expiration(),
+        ]
+
+    def remove(self, user_id, task_id, data_vencimento, revision, pipe=None):
+        """Remove uma tarefa excluída (na revisão ``revision``) do hash e do índice"""
+        with _pipeline(self.redis, pipe) as pipe:
+            self.redis.script(REMOVE_TASK_SCRIPT)(
+                *self._remove_arguments(user_id, task_id, data_vencimento, revision),
+                client=pipe,
+            )
+
+    def _remove_arguments(self, user_id, task_id, data_vencimento, revision):
+        return self._task_keys(user_id), [
+            str(task_id),
+            revision,
+            self.index_member(data_vencimento, task_id),
+            self.redis.expiration(),
+        ]
+
+    def _task_keys(self, user_id):
+        return [
+            self.items_key(user_id),
+            self.index_key(user_id),
+            self.revisions_key(user_id),
+        ]
+
+    def invalidate(self, user_id, pipe=None):
+        """Descarta todo o cache de tarefas do usuário"""
+        with _pipeline(self.redis, pipe) as pipe:
+            pipe.delete(*self._task_keys(user_id))
+            self.bump_version(user_id, pipe)
+
+    @staticmethod
+    def version_key(user_id):
+        return f"tasks:{user_id}:version"
+
+    def _seed_version(self, user_id, pipe):
+        """
+        Cria a versão se ela não existir. O valor inicial é o instante atual
+        em nanossegundos, e não 0, para que uma versão expirada ou perdida
+        não volte a um número já entregue como ETag.
+        """
+        pipe.set(
+            self.version_key(user_id),
+            time.time_ns(),
+            nx=True,
+            ex=self.redis.expiration("TASKS_VERSION_EXPIRATION"),
+        )
+
+    def get_version(self, user_id):
+        """Versão atual das tarefas do usuário"""
+        pipe = self.redis.pipeline()
+        self._seed_version(user_id, pipe)
+        pipe.get(self.version_key(user_id))
+        return int(pipe.execute()[1])
+
+    def bump_version(self, user_id, pipe=None):
+        """Incrementa a versão das tarefas do usuário após uma alteração"""
+        with _pipeline(self.redis, pipe) as pipe:
+            self._seed_version(user_id, pipe)
+            pipe.incr(self.version_key(user_id))
+
+    @staticmethod
+    def query_key(user_id, signature):
+        return f"tasks:{user_id}:query:{signature}"
+
+    def get_query_page(self, user_id, signature):
+        """
+        Retorna (página, recalcular, versão) de uma listagem filtrada. A
+        página é None se não estiver em cache ou for de uma versão anterior.
+        Após o TTL suave, ou antes dele por atualização antecipada,
+        ``recalcular`` é verdadeiro, mas a página ainda pode ser servida
+        enquanto outro processo a recalcula. A versão atual deve ser passada
+        a ``set_query_page``.
+        """
+        pipe = self.redis.pipeline()
+        self._queue_versioned_get(pipe, user_id, self.query_key(user_id, signature))
+        return self._query_result(*pipe.execute()[1:])
+
+    def _query_result(self, version, data):
+        entry, version = self._versioned_entry(version, data)
+        if entry is None:
+            record_cache("tasks_queries", misses=1)
+            return None, True, version
+        record_cache("tasks_queries", hits=1)
+        remaining = entry["fresh_until"] - time.time()
+        refresh = self.redis.should_refresh(remaining, entry["delta"])
+        return entry["page"], refresh, version
+
+    def set_query_page(self, user_id, signature, page, version, delta=0):
+        """
+        Grava a página de uma listagem filtrada, se ``version`` (lida antes
+        da consulta) ainda for a versão atual. ``delta`` é a duração da
+        consulta, em segundos, usada na atualização antecipada.
+        """
+        self.redis.script(SET_VERSIONED_SCRIPT)(
+            *self._query_page_arguments(user_id, signature, page, version, delta)
+        )
+
+    def _query_page_arguments(self, user_id, signature, page, version, delta):
+        fresh_for = self.redis.expiration("TASKS_QUERY_CACHE_SOFT_EXPIRATION")
+        entry = {
+            "page": page,
+            "fresh_until": time.time() + fresh_for,
+            "delta": delta,
+            "version": version,
+        }
+        return self._versioned_arguments(
+            user_id,
+            self.query_key(user_id, signature),
+            entry,
+            "TASKS_QUERY_CACHE_EXPIRATION",
+        )
+
+    @staticmethod
+    def search_key(user_id, signature):
+        return f"tasks:{user_id}:search:{signature}"
+
+    def get_search_page(self, user_id, signature):
+        """
+        Retorna (página, versão) de uma busca textual. A página é None se
+        não estiver em cache ou for de uma versão anterior.
+        """
+        pipe = self.redis.pipeline()
+        self._queue_versioned_get(pipe, user_id, self.search_key(user_id, signature))
+        return self._search_result(*pipe.execute()[1:])
+
+    def _search_result(self, version, data):
+        entry, version = self._versioned_entry(version, data)
+        record_cache("tasks_search", hits=entry is not None, misses=entry is None)
+        return (entry["page"] if entry else None), version
+
+    def set_search_page(self, user_id, signature, page, version):
+        """
+        Grava a página de uma busca por TASKS_SEARCH_CACHE_EXPIRATION
+        segundos, se ``version`` ainda for a versão atual.
+        """
+        self.redis.script(SET_VERSIONED_SCRIPT)(
+            *self._search_page_arguments(user_id, signature, page, version)
+        )
+
+    def _search_page_arguments(self, user_id, signature, page, version):
+        return self._versioned_arguments(
+            user_id,
+            self.search_key(user_id, signature),
+            {"page": page, "version": version},
+            "TASKS_SEARCH_CACHE_EXPIRATION",
+        )
+
+    def _queue_versioned_get(self, pipe, user_id, key):
+        self._seed_version(user_id, pipe)
+        pipe.get(self.version_key(user_id))
+        pipe.get(key)
+
+    def _versioned_entry(self, version, data):
+        """
+        Retorna (entrada, versão atual). Entradas de outra versão, ou do
+        formato anterior (sem versão), são tratadas como ausentes.
+        """
+        version = int(version)
+        entry = self.redis.deserialize(data) if data else None
+        if not isinstance(entry, dict) or entry.get("version") != version:
+            return None, version
+        return entry, version
+
+    def _versioned_arguments(self, user_id, key, entry, expiration_key):
+        return [self.version_key(user_id), key], [
+            entry["version"],
+            self.redis.serialize(entry),
+            self.redis.expiration(expiration_key),
+        ]
+
+
+@contextmanager
+def _pipeline(redis, pipe):
+    """Usa o pipeline informado ou cria um e o executa ao final do bloco"""
+    if pipe is not None:
+        yield pipe
+        return
+    pipe = redis.pipeline()
+    yield pipe
+    pipe.execute()
@@ -0,0 +1,281 @@
+from datetime import UTC, datetime
+import os
+import time
+
+from app.config import config_by_name
+from app.lib.metrics import record_cache
+from app.lib.redis.rediscache import RedisCache
+from app.lib.redis.taskcache import TaskCache, _pipeline
+
+# Os contadores de cada usuário guardam, por tarefa, o estado já contado
+# ("revisão|status") no hash de revisões. Cada alteração é aplicada como uma
+# transição a partir desse estado, e apenas se sua revisão for mais nova:
+# escritas fora de ordem, ou já vistas pela reconstrução, não contam duas
+# vezes. Exclusões registram a revisão seguinte com o status vazio.
+
+# Aplica a alteração de uma tarefa aos contadores, se eles existirem (senão
+# serão reconstruídos na próxima leitura). Sem o estado anterior de uma
+# tarefa alterada ou excluída, a transição não pode ser calculada: os
+# contadores são descartados (retorno -1).
+# KEYS: counters, due, revisions
+# ARGV: task_id, revisão, status (vazio em exclusões), vencimento em ms
+#       (vazio em tarefas concluídas ou excluídas), "1" em criações,
+#       expiração
+UPDATE_STATS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local old = ''
+local current = redis.call('HGET', KEYS[3], ARGV[1])
+if current then
+    local sep = string.find(current, '|', 1, true)
+    if tonumber(string.sub(current, 1, sep - 1)) >= tonumber(ARGV[2]) then
+        return 0
+    end
+    old = string.sub(current, sep + 1)
+elseif ARGV[5] ~= '1' then
+    redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+    return -1
+end
+local function count(status, delta)
+    redis.call('HINCRBY', KEYS[1], 'total', delta)
+    if redis.call('HINCRBY', KEYS[1], 'status:' .. status, delta) == 0 then
+        redis.call('HDEL', KEYS[1], 'status:' .. status)
+    end
+end
+if old ~= '' then
+    count(old, -1)
+end
+if ARGV[3] ~= '' then
+    count(ARGV[3], 1)
+end
+if ARGV[4] ~= '' then
+    redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+else
+    redis.call('ZREM', KEYS[2], ARGV[1])
+end
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2] .. '|' .. ARGV[3])
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[6])
+end
+return 1
+"""
+
+# Substitui os contadores pelos calculados a partir das tarefas lidas do
+# MongoDB, se a versão das tarefas do usuário ainda for a lida antes da
+# leitura. Uma versão diferente indica uma alteração concorrente que a
+# leitura pode não ter visto: nada é gravado (retorno 0).
+# KEYS: counters, due, revisions, version
+# Tarefas com o status vazio não são contadas, como em UPDATE_STATS_SCRIPT.
+# ARGV: versão, expiração, seguidas de (task_id, revisão, status,
+#       vencimento em ms) por tarefa
+REBUILD_STATS_SCRIPT = """
+if redis.call('GET', KEYS[4]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+redis.call('HSET', KEYS[1], 'total', 0)
+for i = 3, #ARGV, 4 do
+    if ARGV[i + 2] ~= '' then
+        redis.call('HINCRBY', KEYS[1], 'total', 1)
+        redis.call('HINCRBY', KEYS[1], 'status:' .. ARGV[i + 2], 1)
+    end
+    if ARGV[i + 3] ~= '' then
+        redis.call('ZADD', KEYS[2], ARGV[i + 3], ARGV[i])
+    end
+    redis.call('HSET', KEYS[3], ARGV[i], ARGV[i + 1] .. '|' .. ARGV[i + 2])
+end
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+end
+return 1
+"""
+
+
+class TaskStats:
+    """
+    Estatísticas das tarefas de cada usuário (total, por status e
+    atrasadas), mantidas incrementalmente no Redis para que o dashboard não
+    precise ler todas as tarefas.
+
+    Layout por usuário:
+        tasks:{user_id}:stats  -> hash  {"total": n, "status:<status>": n}
+        tasks:{user_id}:stats:due -> zset {task_id: vencimento em ms} das
+                                         tarefas não concluídas
+        tasks:{user_id}:stats:revisions -> hash {task_id: "revisão|status"}
+
+    As alterações de tarefas atualizam os contadores por scripts Lua
+    condicionados à revisão (ver UPDATE_STATS_SCRIPT). Contadores ausentes
+    ou descartados são reconstruídos a partir do MongoDB.
+    """
+
+    def __init__(self, redis=None, config=None):
+        self.config = config or config_by_name.get(os.getenv("ENV", "development"))
+        self.redis = redis or RedisCache(config)
+
+    @staticmethod
+    def counters_key(user_id):
+        return f"tasks:{user_id}:stats"
+
+    @staticmethod
+    def due_key(user_id):
+        return f"tasks:{user_id}:stats:due"
+
+    @staticmethod
+    def revisions_key(user_id):
+        return f"tasks:{user_id}:stats:revisions"
+
+    def _keys(self, user_id):
+        return [
+            self.counters_key(user_id),
+            self.due_key(user_id),
+            self.revisions_key(user_id),
+        ]
+
+    def done_statuses(self):
+        """Status de tarefas concluídas, que não contam como atrasadas"""
+        return {
+            status.strip()
+            for status in self.config.TASKS_STATS_DONE_STATUSES.split(",")
+            if status.strip()
+        }
+
+    @staticmethod
+    def due_score(data_vencimento):
+        """Vencimento em milissegundos desde a época (datas sem fuso são UTC)"""
+        if isinstance(data_vencimento, str):
+            # Tarefas antigas foram gravadas com a data em texto
+            data_vencimento = datetime.fromisoformat(data_vencimento)
+        if data_vencimento.tzinfo is None:
+            data_vencimento = data_vencimento.replace(tzinfo=UTC)
+        return int(data_vencimento.timestamp() * 1000)
+
+    def _due_argument(self, status, data_vencimento):
+        if not status or status in self.done_statuses():
+            return ""
+        return self.due_score(data_vencimento)
+
+    def get(self, user_id):
+        """Estatísticas do usuário, ou None se os contadores não existirem"""
+        pipe = self.redis.pipeline()
+        self._queue_get(pipe, user_id)
+        return self._result(*pipe.execute())
+
+    def _queue_get(self, pipe, user_id):
+        pipe.hgetall(self.counters_key(user_id))
+        pipe.zcard(self.due_key(user_id))
+        pipe.zcount(self.due_key(user_id), "-inf", f"({int(time.time() * 1000)}")
+
+    @staticmethod
+    def _result(counters, pending, overdue):
+        record_cache("tasks_stats", hits=bool(counters), misses=not counters)
+        if not counters:
+            return None
+        counters = {k.decode("utf-8"): int(v) for k, v in counters.items()}
+        return {
+            "total": counters.pop("total"),
+            "status": {k.split(":", 1)[1]: v for k, v in sorted(counters.items())},
+            "pending": pending,
+            "overdue": overdue,
+        }
+
+    def put(
+        self,
+        user_id,
+        task_id,
+        revision,
+        status,
+        data_vencimento,
+        created=False,
+        pipe=None,
+    ):
+        """
+        Conta a tarefa criada ou alterada (na revisão ``revision``), se
+        a revisão for mais nova que a já contada. Deve ser enfileirado depois
+        de ``TaskCache.bump_version``: uma reconstrução concorrente que não
+        viu a alteração encontra a versão nova e é descartada.
+        """
+        self._update(
+            user_id,
+            [
+                str(task_id),
+                revision,
+                status,
+                self._due_argument(status, data_vencimento),
+                "1" if created else "",
+                self.redis.expiration("TASKS_STATS_EXPIRATION"),
+            ],
+            pipe,
+        )
+
+    def remove(self, user_id, task_id, revision, pipe=None):
+        """Desconta a tarefa excluída (na revisão ``revision``)"""
+        self._update(
+            user_id,
+            [
+                str(task_id),
+                revision + 1,
+                "",
+                "",
+                "",
+                self.redis.expiration("TASKS_STATS_EXPIRATION"),
+            ],
+            pipe,
+        )
+
+    def _update(self, user_id, args, pipe):
+        with _pipeline(self.redis, pipe) as pipe:
+            self.redis.script(UPDATE_STATS_SCRIPT)(
+                self._keys(user_id), args, client=pipe
+            )
+
+    def rebuild(self, user_id, version, tasks):
+        """
+        Substitui os contadores do usuário pelos calculados a partir das
+        tarefas lidas do MongoDB, como (task_id, revisão, status,
+        data_vencimento). ``version`` é a versão das tarefas lida antes da
+        leitura. Retorna as estatísticas e se elas foram gravadas.
+        """
+        keys, args = self._rebuild_arguments(user_id, version, tasks)
+        stored = self.redis.script(REBUILD_STATS_SCRIPT)(keys, args)
+        return self._summary(tasks), bool(stored)
+
+    def _rebuild_arguments(self, user_id, version, tasks):
+        keys = [*self._keys(user_id), TaskCache.version_key(user_id)]
+        args = [version, self.redis.expiration("TASKS_STATS_EXPIRATION")]
+        for task_id, revision, status, data_vencimento in tasks:
+            args += [
+                str(task_id),
+                revision,
+                status,
+                self._due_argument(status, data_vencimento),
+            ]
+        return keys, args
+
+    def _summary(self, tasks):
+        """Estatísticas calculadas diretamente das tarefas, como em ``get``"""
+        done = self.done_statuses()
+        now = int(time.time() * 1000)
+        by_status = {}
+        pending = overdue = 0
+        for _, _, status, data_vencimento in tasks:
+            if not status:
+                continue
+            by_status[status] = by_status.get(status, 0) + 1
+            if status not in done:
+                pending += 1
+                overdue += self.due_score(data_vencimento) < now
+        return {
+            "total": sum(by_status.values()),
+            "status": dict(sorted(by_status.items())),
+            "pending": pending,
+            "overdue": overdue,
+        }
+
+    def invalidate(self, user_id, pipe=None):
+        """
+        Descarta os contadores do usuário. Deve ser enfileirado depois de
+        ``TaskCache.bump_version``, pelo mesmo motivo de ``put``.
+        """
+        with _pipeline(self.redis, pipe) as pipe:
+            pipe.delete(*self._keys(user_id))
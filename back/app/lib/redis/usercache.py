@@ -0,0 +1,33 @@
+from app.lib.metrics import record_cache
+from app.lib.redis.rediscache import RedisCache
+
+
+class UserCache:
+    """
+    Cache dos perfis de usuário no Redis, no formato da resposta de
+    GET /api/users (sem senha):
+        users:{user_id}:profile -> perfil serializado
+
+    Expira após USERS_PROFILE_CACHE_EXPIRATION segundos e é removido quando
+    o usuário é alterado ou redefine a senha.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or RedisCache()
+
+    @staticmethod
+    def profile_key(user_id):
+        return f"users:{user_id}:profile"
+
+    def get_profile(self, user_id):
+        profile = self.redis.get(self.profile_key(user_id))
+        record_cache("users_profiles", hits=profile is not None, misses=profile is None)
+        return profile
+
+    def set_profile(self, user_id, profile):
+        self.redis.set(
+            self.profile_key(user_id), profile, "USERS_PROFILE_CACHE_EXPIRATION"
+        )
+
+    def invalidate(self, user_id):
+        self.redis.delete(self.profile_key(user_id))
@@ -3,118 +3,911 @@ from app.api.tasks.models import TaskModel, TaskUpdateModel
 from app.lib.database.mongodb import MongoDB
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.lib.redis.rediscache import RedisCache
+from app.lib.redis import singleflight
+from app.lib.redis.taskcache import TaskCache
+from app.lib.redis.taskstats import TaskStats
+from app.lib.pagination import (
+    clamp_limit,
+    decode_cursor,
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+    keyset_filter,
+)
+from app.config import config_by_name
+from bson.errors import InvalidId
+from pydantic import TypeAdapter, ValidationError
+from pymongo import ASCENDING, DESCENDING, DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from datetime import UTC, datetime
+import bisect
+import hashlib
 import json
-import datetime
+import orjson
+import os
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Campos que podem ser solicitados no parâmetro "fields" da listagem
+TASK_FIELDS = {"titulo", "descricao", "status", "data_vencimento"}
+
+# Campos lidos do MongoDB para serializar uma tarefa e atualizar o cache
+TASK_PROJECTION = {field: 1 for field in (*sorted(TASK_FIELDS), "revisao")}
+
+# Campos lidos do MongoDB nas listagens sem o parâmetro "fields"
+LIST_PROJECTION = sorted(TASK_FIELDS)
+
+# Tamanho máximo do termo de busca (parâmetro "q")
+SEARCH_MAX_LENGTH = 200
+
+# Serializa listas de documentos com uma única validação e um único dump,
+# sem instanciar e serializar um TaskModel por documento
+TASK_LIST_ADAPTER = TypeAdapter(list[TaskModel])
+
+# Listagem sem filtros, ordenação decrescente ou projeção (ver _build_query)
+UNFILTERED_QUERY = {
+    "filters": {},
+    "descending": False,
+    "projection": None,
+    "fields": None,
+}
+
+# Início e fim do JSON da listagem em streaming, no formato da paginada
+STREAM_HEAD = b'{"tasks":['
+STREAM_TAIL = b'],"next_cursor":null}'
+
 
 class TaskService:
     def __init__(self):
         self.db = MongoDB()
-        self.collection = self.db.get_collection("tasks")
         self.redis = RedisCache()
+        self.cache = TaskCache(self.redis)
+        self.stats = TaskStats(self.redis)
+        self.config = config_by_name.get(os.getenv("ENV", "development"))
+
+    @property
+    def collection(self):
+        # Resolvida a cada uso: a conexão é aberta sob demanda em cada processo
+        return self.db.get_collection("tasks")
 
-    def get_all_tasks(self):
+    def get_all_tasks(
+        self,
+        limit=None,
+        cursor=None,
+        status=None,
+        due_before=None,
+        due_after=None,
+        sort=None,
+        fields=None,
+    ):
+        """
+        Retorna uma página de tarefas do usuário usando paginação por cursor
+        (keyset) sobre (data_vencimento, _id).
 
+        Sem filtros, a página é lida do índice ordenado no Redis e as tarefas
+        do hash por id. Com filtros (status, due_before/due_after), ordenação
+        decrescente ou projeção de campos, a consulta é enviada ao MongoDB e a
+        página é cacheada por consulta.
+
+        Índice e páginas são recalculados por um único processo de cada vez
+        (ver singleflight.refresh), e antes de expirarem, para que a expiração
+        não gere uma rajada de consultas iguais ao MongoDB.
+        """
         user_id = get_jwt_identity()
+        limit = clamp_limit(
+            limit, self.config.TASKS_PAGE_SIZE, self.config.TASKS_PAGE_MAX_SIZE
+        )
+        query = self._build_query(status, due_before, due_after, sort, fields)
 
-        cache_key = f"tasks:{user_id}"
-        # self.redis.delete(cache_key)
-        cached_tasks = self.redis.get(cache_key)
+        if query:
+            return self._get_query_page(user_id, query, limit, cursor)
 
-        if cached_tasks:
-            print(f"Cached: {cached_tasks}")
+        after_member = self._after_member(cursor)
+        # Busca um membro a mais para saber se existe próxima página
+        members, rebuild = self.cache.index_page(user_id, after_member, limit + 1)
+        if rebuild:
+            members = self._refresh_index(user_id, after_member, limit + 1, members)
 
-            return eval(
-                str(cached_tasks),
-                {"datetime": datetime, "TaskModel": TaskModel},
-                dict(),
-            )
+        task_ids, next_cursor = self._index_page(members, limit)
+        tasks = self._load_tasks(user_id, task_ids)
+        return {"tasks": tasks, "next_cursor": next_cursor}
 
-        tasks = []
-        for task in self.collection.find({"user_id": user_id}):
-            task["_id"] = str(task["_id"])
-            tasks.append(TaskModel(**task).model_dump())
+    def _refresh_index(self, user_id, after_member, count, stale):
+        """
+        Reconstrói o índice ausente (``stale`` None) ou prestes a expirar e
+        retorna a página pedida. Enquanto um processo reconstrói, os demais
+        aguardam o índice novo ou, se ainda houver um, seguem com ele.
+        """
 
-        print(f"Tasks: {tasks}")
-        self.redis.set(cache_key, tasks)
-        return tasks
+        def load():
+            return self.cache.index_page(user_id, after_member, count)[0]
 
-    def get_task(self, task_id):
+        def compute():
+            members, stored = self._rebuild_index(user_id)
+            page = load() if stored else None
+            if page is None:
+                # Uma escrita concorrente descartou o índice: a página é
+                # montada a partir das tarefas lidas na reconstrução
+                page = self._members_after(members, after_member, count)
+            return page
+
+        return singleflight.refresh(
+            self.redis, self.cache.index_key(user_id), stale, load, compute
+        )
+
+    def stream_tasks(
+        self, status=None, due_before=None, due_after=None, sort=None, fields=None
+    ):
+        """
+        Todas as tarefas do usuário que atendem aos filtros, sem paginação,
+        como blocos de JSON no formato da listagem. O cursor do MongoDB é lido
+        em lotes de TASKS_STREAM_BATCH_SIZE e cada lote é enviado antes da
+        leitura do próximo, então a memória não cresce com o número de
+        tarefas. Não passa pelo cache.
+
+        A validação ocorre aqui, antes de a resposta começar a ser enviada;
+        o MongoDB só é consultado quando o gerador é consumido.
+        """
         user_id = get_jwt_identity()
+        query = self._build_query(status, due_before, due_after, sort, fields)
+        query = query or UNFILTERED_QUERY
+        mongo_filter, sort = self._query_filter(user_id, query, None)
+        cursor = (
+            self.collection.find(mongo_filter, self._projection(query))
+            .sort(sort)
+            .batch_size(self.config.TASKS_STREAM_BATCH_SIZE)
+        )
+        return self._stream_json(cursor, query["fields"])
+
+    def _stream_json(self, cursor, fields):
+        yield STREAM_HEAD
+        batch = []
+        first = True
+        for task in cursor:
+            batch.append(task)
+            if len(batch) == self.config.TASKS_STREAM_BATCH_SIZE:
+                yield self._json_items(batch, fields, first)
+                batch, first = [], False
+        if batch:
+            yield self._json_items(batch, fields, first)
+        yield STREAM_TAIL
 
-        cache_key = f"tasks:{user_id}"
-        cached_tasks = self.redis.get(cache_key)
+    def search_tasks(self, q, limit=None, cursor=None):
+        """
+        Busca textual nos títulos e descrições das tarefas do usuário (índice
+        "user_id_text", com stemming do português), ordenada por relevância
+        e paginada por posição. As páginas ficam em cache por
+        TASKS_SEARCH_CACHE_EXPIRATION segundos e deixam de ser servidas a cada
+        alteração das tarefas do usuário.
+        """
+        user_id = get_jwt_identity()
+        terms, offset, limit, signature = self._search_arguments(q, limit, cursor)
 
-        if cached_tasks:
-            tasks = eval(
-                str(cached_tasks),
-                {"datetime": datetime, "TaskModel": TaskModel},
-                dict(),
+        page, version = self.cache.get_search_page(user_id, signature)
+        if page is None:
+            mongo_filter, projection, sort = self._search_query(user_id, terms)
+            documents = list(
+                self.collection.find(mongo_filter, projection)
+                .sort(sort)
+                .skip(offset)
+                .limit(limit + 1)
             )
-            # Buscar a tarefa pelo task_id na lista de tarefas
-            print(f"tasks: {tasks}")
-            for task in tasks:
-                if str(task.get("id", None)) == str(task_id):
-                    return task
+            page = self._search_page(documents, offset, limit)
+            self.cache.set_search_page(user_id, signature, page, version)
+        return page
 
-        tasks = []
-        found_task = None
-        for task in self.collection.find({"user_id": user_id}):
-            task["_id"] = str(task["_id"])
-            tasks.append(TaskModel(**task).model_dump())
-            if str(task_id) == task["_id"]:
-                found_task = task
+    def get_task_stats(self):
+        """
+        Estatísticas das tarefas do usuário (total, por status, pendentes e
+        atrasadas), lidas dos contadores no Redis em uma única ida. Se os
+        contadores não existirem, um único processo os reconstrói a partir
+        do MongoDB (ver rebuild_stats).
+        """
+        user_id = get_jwt_identity()
+        stats = self.stats.get(user_id)
+        if stats is not None:
+            return stats
 
-        self.redis.set(cache_key, tasks)
+        def load():
+            return self.stats.get(user_id)
 
-        return found_task
+        def compute():
+            return self.rebuild_stats(user_id)[0]
 
-    def create_task(self, task: TaskModel):
+        return singleflight.refresh(
+            self.redis, self.stats.counters_key(user_id), None, load, compute
+        )
+
+    def rebuild_stats(self, user_id):
+        """
+        Recalcula os contadores do usuário com um pipeline de agregação sobre
+        as suas tarefas. Retorna (estatísticas, gravadas): os contadores não
+        são gravados se as tarefas forem alteradas durante a leitura.
+        """
+        # A versão é lida antes da agregação (ver REBUILD_STATS_SCRIPT)
+        version = self.cache.get_version(user_id)
+        tasks = [
+            (t["_id"], t["revisao"], t["status"], t["data_vencimento"])
+            for t in self.collection.aggregate(self._stats_pipeline(user_id))
+        ]
+        return self.stats.rebuild(user_id, version, tasks)
+
+    @staticmethod
+    def _stats_pipeline(user_id):
+        """
+        Estado de cada tarefa do usuário contado nas estatísticas. Os
+        contadores guardam a revisão de cada tarefa, e não apenas os totais,
+        para que alterações concorrentes à reconstrução não contem duas vezes.
+        """
+        return [
+            {"$match": {"user_id": user_id}},
+            {
+                "$project": {
+                    "status": 1,
+                    "data_vencimento": 1,
+                    "revisao": {"$ifNull": ["$revisao", 0]},
+                }
+            },
+        ]
+
+    def migrate_legacy_dates(self, batch_size=500):
+        """
+        Converte as datas de vencimento gravadas em texto (tarefas criadas
+        antes das datas BSON) em datas, em lotes de ``batch_size``
+        atualizações. Cada atualização só é aplicada se a data ainda for o
+        texto lido e incrementa a revisão, como qualquer alteração. O cache e
+        os contadores dos usuários afetados são descartados ao final.
+
+        Retorna (convertidas, ids das tarefas com datas inválidas).
+        """
+        converted, invalid, user_ids, requests = 0, [], set(), []
+        cursor = self.collection.find(
+            {"data_vencimento": {"$type": "string"}},
+            {"data_vencimento": 1, "user_id": 1},
+        )
+        for task in cursor:
+            try:
+                data_vencimento = self._bson_datetime(
+                    datetime.fromisoformat(task["data_vencimento"])
+                )
+            except ValueError:
+                invalid.append(task["_id"])
+                continue
+            requests.append(
+                UpdateOne(
+                    {"_id": task["_id"], "data_vencimento": task["data_vencimento"]},
+                    self._update_operation({"data_vencimento": data_vencimento}),
+                )
+            )
+            user_ids.add(task.get("user_id"))
+            if len(requests) >= batch_size:
+                converted += self.collection.bulk_write(
+                    requests, ordered=False
+                ).modified_count
+                requests = []
+        if requests:
+            converted += self.collection.bulk_write(
+                requests, ordered=False
+            ).modified_count
+
+        user_ids.discard(None)
+        if user_ids:
+            pipe = self.redis.pipeline()
+            for user_id in user_ids:
+                self.cache.invalidate(user_id, pipe)
+                self.stats.invalidate(user_id, pipe)
+            pipe.execute()
+        return converted, invalid
+
+    def get_tasks_version(self):
+        """
+        Versão das tarefas do usuário, usada como ETag das listagens. Deve ser
+        lida antes da página: uma alteração concorrente muda a versão e a
+        próxima requisição condicional recebe a página nova.
+        """
         user_id = get_jwt_identity()
+        return self._version_tag(user_id, self.cache.get_version(user_id))
 
-        task_dict = task.dict(by_alias=True, exclude={"id"})
-        task_dict["user_id"] = user_id
-        result = self.collection.insert_one(task_dict)
-        created_task = self.collection.find_one({"_id": result.inserted_id})
+    def get_task(self, task_id):
+        user_id = get_jwt_identity()
+
+        cached_task = self.cache.get_item(user_id, task_id)
+        if cached_task:
+            return cached_task
+
+        task = self.collection.find_one(
+            {"_id": ObjectId(task_id), "user_id": user_id}, TASK_PROJECTION
+        )
+        if not task:
+            return None
+
+        revision = self._revision(task)
+        task = self._serialize(task)
+        self.cache.set_items(user_id, {task["id"]: task}, {task["id"]: revision})
+        return task
 
-        # Invalidate cache for this user's tasks
+    def create_task(self, task: TaskModel):
+        user_id = get_jwt_identity()
+
+        # insert_one acrescenta o _id ao documento, que não precisa ser relido
+        created_task = self._task_document(task, user_id)
+        self.collection.insert_one(created_task)
 
         if user_id:
-            cache_key = f"tasks:{user_id}"
-            self.redis.delete(cache_key)
+            pipe = self.redis.pipeline()
+            self.cache.put(
+                user_id,
+                created_task["_id"],
+                self._serialize(dict(created_task)),
+                created_task["data_vencimento"],
+                self._revision(created_task),
+                pipe=pipe,
+            )
+            self.cache.bump_version(user_id, pipe)
+            self.stats.put(
+                user_id,
+                created_task["_id"],
+                self._revision(created_task),
+                created_task["status"],
+                created_task["data_vencimento"],
+                created=True,
+                pipe=pipe,
+            )
+            pipe.execute()
 
         return TaskModel(**created_task)
 
     def update_task(self, task_id, task_update: TaskUpdateModel):
-        if not self.collection.find_one({"_id": ObjectId(task_id)}):
+        user_id = get_jwt_identity()
+        query = {"_id": ObjectId(task_id), "user_id": user_id}
+
+        update_data = self._update_document(task_update)
+        if not update_data:
+            return self.get_task(task_id)
+
+        # Uma única ida ao MongoDB: o documento anterior é retornado e o
+        # atualizado é obtido aplicando a alteração sobre ele
+        old_task = self.collection.find_one_and_update(
+            query, self._update_operation(update_data), projection=TASK_PROJECTION
+        )
+        if not old_task:
             return None
+        updated_task = self._apply_update(old_task, update_data)
+
+        # Apenas a entrada da tarefa é atualizada no cache; se outra escrita
+        # já gravou uma revisão mais nova, esta é ignorada
+        task = self._serialize(dict(updated_task))
+        pipe = self.redis.pipeline()
+        self.cache.put(
+            user_id,
+            task_id,
+            task,
+            updated_task["data_vencimento"],
+            self._revision(updated_task),
+            old_data_vencimento=old_task["data_vencimento"],
+            pipe=pipe,
+        )
+        self.cache.bump_version(user_id, pipe)
+        self.stats.put(
+            user_id,
+            task_id,
+            self._revision(updated_task),
+            updated_task["status"],
+            updated_task["data_vencimento"],
+            pipe=pipe,
+        )
+        pipe.execute()
+        return task
 
+    def delete_task(self, task_id):
         user_id = get_jwt_identity()
-        # Remove campos None
+        query = {"_id": ObjectId(task_id), "user_id": user_id}
+
+        # O documento excluído informa a entrada do índice a remover
+        task = self.collection.find_one_and_delete(
+            query, projection={"data_vencimento": 1, "revisao": 1}
+        )
+        if not task:
+            return False
+
+        pipe = self.redis.pipeline()
+        self.cache.remove(
+            user_id,
+            task_id,
+            task["data_vencimento"],
+            self._revision(task),
+            pipe=pipe,
+        )
+        self.cache.bump_version(user_id, pipe)
+        self.stats.remove(user_id, task_id, self._revision(task), pipe=pipe)
+        pipe.execute()
+        return True
+
+    def bulk_tasks(self, operations):
+        """
+        Executa um lote de operações (create/update/delete) em um único
+        ``bulk_write`` não ordenado e retorna o resultado de cada item, na
+        mesma ordem do lote. O cache do usuário é invalidado uma única vez.
+        """
+        user_id = get_jwt_identity()
+        results, requests = self._bulk_requests(operations, user_id)
+
+        # Uma única consulta identifica quais das tarefas alteradas existem
+        target_ids = self._bulk_target_ids(requests)
+        existing = set()
+        if target_ids:
+            existing = {
+                task["_id"]
+                for task in self.collection.find(
+                    {"_id": {"$in": target_ids}, "user_id": user_id}, {"_id": 1}
+                )
+            }
+        pending = self._bulk_pending(results, requests, existing)
+
+        if pending:
+            try:
+                outcome = self.collection.bulk_write(
+                    [r for _, r in pending], ordered=False
+                ).bulk_api_result
+            except BulkWriteError as e:
+                outcome = e.details
+                self._bulk_errors(results, pending, e)
+            self._bulk_lost(results, pending, outcome)
+            # Os contadores são descartados depois do incremento da versão
+            pipe = self.redis.pipeline()
+            self.cache.invalidate(user_id, pipe)
+            self.stats.invalidate(user_id, pipe)
+            pipe.execute()
+
+        return results
+
+    def _bulk_requests(self, operations, user_id):
+        """
+        Valida o lote e retorna (resultados, requisições), em que cada
+        requisição é (índice no lote, tipo, _id da tarefa, operação do pymongo).
+        Itens inválidos já recebem o resultado 400.
+        """
+        if not isinstance(operations, list) or not operations:
+            raise ValueError("Informe uma lista de operações")
+        if len(operations) > self.config.TASKS_BULK_MAX_OPERATIONS:
+            raise ValueError(
+                "O lote excede o limite de "
+                f"{self.config.TASKS_BULK_MAX_OPERATIONS} operações"
+            )
+
+        results = [None] * len(operations)
+        requests = []
+        for index, operation in enumerate(operations):
+            try:
+                op, task_id, request = self._bulk_request(operation, user_id)
+            except (ValidationError, InvalidId, ValueError, TypeError, KeyError) as e:
+                results[index] = {"status": 400, "message": str(e)}
+                continue
+            status = 201 if op == "create" else 200
+            results[index] = {"id": str(task_id), "status": status}
+            requests.append((index, op, task_id, request))
+        return results, requests
+
+    @staticmethod
+    def _bulk_target_ids(requests):
+        """_ids das tarefas alteradas ou removidas pelo lote"""
+        return [task_id for _, op, task_id, _ in requests if op != "create"]
+
+    @staticmethod
+    def _bulk_pending(results, requests, existing):
+        """
+        Marca como 404 as operações sobre tarefas inexistentes e retorna as
+        demais como (índice no lote, operação do pymongo).
+        """
+        pending = []
+        for index, op, task_id, request in requests:
+            if op != "create" and task_id not in existing:
+                results[index].update(status=404, message="Tarefa não encontrada")
+            else:
+                pending.append((index, request))
+        return pending
+
+    @staticmethod
+    def _bulk_lost(results, pending, outcome):
+        """
+        Marca como 404 as operações sobre tarefas removidas entre a
+        verificação de existência e o bulk_write, sem reler o MongoDB. O
+        resultado do bulk_write só informa o total de documentos encontrados
+        por tipo de operação: se nenhuma atualização (ou exclusão) do lote
+        encontrou documento, todas perderam a corrida. Se só parte delas
+        perdeu, não há como saber quais, e todas mantêm o 200: equivale a
+        tê-las aplicado antes da exclusão concorrente, cujo estado final
+        (tarefa removida) é o mesmo.
+        """
+        counts = {UpdateOne: "nMatched", DeleteOne: "nRemoved"}
+        for kind, count in counts.items():
+            indexes = [
+                index
+                for index, request in pending
+                if isinstance(request, kind) and results[index]["status"] == 200
+            ]
+            if indexes and not outcome.get(count):
+                for index in indexes:
+                    results[index].update(status=404, message="Tarefa não encontrada")
+
+    @staticmethod
+    def _bulk_errors(results, pending, error):
+        """Associa os erros de um BulkWriteError aos itens do lote"""
+        for write_error in error.details["writeErrors"]:
+            index = pending[write_error["index"]][0]
+            results[index].update(status=400, message=write_error["errmsg"])
+
+    def _bulk_request(self, operation, user_id):
+        """
+        Valida uma operação do lote e retorna (tipo, _id da tarefa, operação
+        do pymongo). Em criações o _id é gerado aqui para ser informado no
+        resultado.
+        """
+        if not isinstance(operation, dict):
+            raise ValueError("Cada operação deve ser um objeto")
+        op = operation.get("op")
+        if op == "create":
+            document = self._task_document(TaskModel(**operation["task"]), user_id)
+            document["_id"] = ObjectId()
+            return op, document["_id"], InsertOne(document)
+
+        if op not in ("update", "delete"):
+            raise ValueError("Operação deve ser 'create', 'update' ou 'delete'")
+        task_id = ObjectId(operation.get("id"))
+        query = {"_id": task_id, "user_id": user_id}
+        if op == "delete":
+            return op, task_id, DeleteOne(query)
+
+        update_data = self._update_document(TaskUpdateModel(**operation["task"]))
+        if not update_data:
+            raise ValueError("Nenhum campo para atualizar")
+        return op, task_id, UpdateOne(query, self._update_operation(update_data))
+
+    @staticmethod
+    def _version_tag(user_id, version):
+        """Valor da ETag (sem aspas) para a versão das tarefas do usuário"""
+        return f"{user_id}-{version}"
+
+    @staticmethod
+    def _task_document(task: TaskModel, user_id):
+        """Documento do MongoDB para uma nova tarefa"""
+        task_dict = task.dict(by_alias=True, exclude={"id"})
+        # O serializer do modelo converte a data em texto; grava como data
+        task_dict["data_vencimento"] = TaskService._bson_datetime(task.data_vencimento)
+        task_dict["user_id"] = user_id
+        task_dict["revisao"] = 1
+        return task_dict
+
+    @staticmethod
+    def _update_operation(update_data):
+        """Atualização do MongoDB que também incrementa a revisão da tarefa"""
+        return {"$set": update_data, "$inc": {"revisao": 1}}
+
+    @staticmethod
+    def _revision(task):
+        """Revisão de um documento; tarefas anteriores à revisão contam como 0"""
+        return task.get("revisao", 0)
+
+    @staticmethod
+    def _update_document(task_update: TaskUpdateModel):
+        """Campos informados na atualização, sem valores None"""
         update_data = {
             k: v
             for k, v in task_update.dict(exclude_unset=True).items()
             if v is not None
         }
-        self.collection.update_one({"_id": ObjectId(task_id)}, {"$set": update_data})
-        cache_key = f"tasks:{user_id}"
-        self.redis.delete(cache_key)
-        return self.get_task(task_id)
+        if task_update.data_vencimento is not None:
+            update_data["data_vencimento"] = TaskService._bson_datetime(
+                task_update.data_vencimento
+            )
+        return update_data
 
-    def delete_task(self, task_id):
-        # Get the task to find the user_id before deleting
-        task = self.collection.find_one({"_id": ObjectId(task_id)})
+    @staticmethod
+    def _bson_datetime(value):
+        """
+        Data como o MongoDB a armazena e devolve (UTC, sem fuso, precisão de
+        milissegundos), para que documentos montados localmente, sem releitura,
+        sejam iguais aos lidos do banco.
+        """
+        if value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+    @classmethod
+    def _apply_update(cls, task, update_data):
+        """Documento resultante de ``_update_operation`` sobre ``task``"""
+        return {**task, **update_data, "revisao": cls._revision(task) + 1}
+
+    def _build_query(self, status, due_before, due_after, sort, fields):
+        """
+        Valida os parâmetros de listagem e retorna a consulta correspondente,
+        ou None quando nenhum filtro, ordenação ou projeção foi solicitado.
+        """
+        if sort not in (None, "data_vencimento", "-data_vencimento"):
+            raise ValueError(
+                "O parâmetro sort deve ser 'data_vencimento' ou '-data_vencimento'"
+            )
+        descending = sort == "-data_vencimento"
+
+        filters = {}
+        if status:
+            filters["status"] = {"$in": sorted(set(status.split(",")))}
+        due = {}
+        try:
+            # due_after é inclusivo e due_before exclusivo
+            if due_after:
+                due["$gte"] = self._bson_datetime(datetime.fromisoformat(due_after))
+            if due_before:
+                due["$lt"] = self._bson_datetime(datetime.fromisoformat(due_before))
+        except ValueError:
+            raise ValueError("Datas devem estar no formato ISO 8601")
+        if due:
+            # Tarefas antigas têm a data em texto (``str`` do datetime), que o
+            # MongoDB só compara com texto; após ``flask tasks migrate-dates``
+            # o segundo ramo não encontra mais nenhum documento
+            legacy_due = {op: str(value) for op, value in due.items()}
+            filters["$or"] = [
+                {"data_vencimento": due},
+                {"data_vencimento": legacy_due},
+            ]
+
+        projection = None
+        if fields:
+            requested = set(fields.split(","))
+            unknown = requested - TASK_FIELDS
+            if unknown:
+                raise ValueError(f"Campos inválidos: {', '.join(sorted(unknown))}")
+            # data_vencimento é sempre lido para montar o cursor
+            projection = sorted(requested | {"data_vencimento"})
+            fields = sorted(requested)
+
+        if not filters and not descending and projection is None:
+            return None
+        return {
+            "filters": filters,
+            "descending": descending,
+            "projection": projection,
+            "fields": fields,
+        }
+
+    def _get_query_page(self, user_id, query, limit, cursor):
+        """Executa uma listagem filtrada no MongoDB, com cache por consulta"""
+        signature = self._query_signature(query, cursor, limit)
+        cached_page, refresh, version = self.cache.get_query_page(user_id, signature)
+        if not refresh:
+            return cached_page
+
+        def load():
+            return self.cache.get_query_page(user_id, signature)[0]
 
-        result = self.collection.delete_one({"_id": ObjectId(task_id)})
+        def compute():
+            start = time.perf_counter()
+            mongo_filter, sort = self._query_filter(user_id, query, cursor)
+            # Busca um documento a mais para saber se existe próxima página
+            documents = list(
+                self.collection.find(mongo_filter, self._projection(query))
+                .sort(sort)
+                .limit(limit + 1)
+            )
+            page = self._query_page(query, documents, limit)
+            self.cache.set_query_page(
+                user_id, signature, page, version, time.perf_counter() - start
+            )
+            return page
+
+        return singleflight.refresh(
+            self.redis,
+            self.cache.query_key(user_id, signature),
+            cached_page,
+            load,
+            compute,
+        )
+
+    def _search_arguments(self, q, limit, cursor):
+        """Valida a busca e retorna (termos, posição, limite, assinatura)"""
+        terms = (q or "").strip()
+        if not terms:
+            raise ValueError("Informe o termo de busca no parâmetro q")
+        if len(terms) > SEARCH_MAX_LENGTH:
+            raise ValueError(
+                f"O termo de busca deve ter até {SEARCH_MAX_LENGTH} caracteres"
+            )
+        limit = clamp_limit(
+            limit, self.config.TASKS_PAGE_SIZE, self.config.TASKS_PAGE_MAX_SIZE
+        )
+        offset = decode_offset_cursor(cursor) if cursor else 0
+        signature = self._query_signature({"search": terms}, offset, limit)
+        return terms, offset, limit, signature
+
+    @staticmethod
+    def _search_query(user_id, terms):
+        """Filtro, projeção e ordenação (por relevância) da busca textual"""
+        mongo_filter = {"user_id": user_id, "$text": {"$search": terms}}
+        projection = {
+            **{field: 1 for field in LIST_PROJECTION},
+            "score": {"$meta": "textScore"},
+        }
+        sort = [("score", {"$meta": "textScore"}), ("_id", ASCENDING)]
+        return mongo_filter, projection, sort
+
+    def _search_page(self, documents, offset, limit):
+        """Monta a página da busca a partir de até ``limit + 1`` documentos"""
+        next_cursor = None
+        if len(documents) > limit:
+            next_cursor = encode_offset_cursor(offset + limit)
+        return {
+            "tasks": self._serialize_many(documents[:limit]),
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    def _query_signature(query, cursor, limit):
+        """Identifica a página de uma listagem filtrada no cache"""
+        return hashlib.sha1(
+            json.dumps([query, cursor, limit], sort_keys=True, default=str).encode(
+                "utf-8"
+            )
+        ).hexdigest()
+
+    @staticmethod
+    def _query_filter(user_id, query, cursor):
+        """Filtro e ordenação do MongoDB para uma listagem filtrada"""
+        mongo_filter = {"user_id": user_id, **query["filters"]}
+        if cursor:
+            keyset = keyset_filter(cursor, descending=query["descending"])
+            mongo_filter = {"$and": [mongo_filter, keyset]}
+        direction = DESCENDING if query["descending"] else ASCENDING
+        return mongo_filter, [("data_vencimento", direction), ("_id", direction)]
+
+    def _query_page(self, query, documents, limit):
+        """Monta a página a partir de até ``limit + 1`` documentos"""
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+
+        tasks = self._serialize_documents(documents, query["fields"])
+
+        next_cursor = None
+        if has_more:
+            last = documents[-1]
+            next_cursor = encode_cursor(last["data_vencimento"], last["_id"])
+
+        return {"tasks": tasks, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _after_member(cursor):
+        """Membro do índice a partir do qual a página começa"""
+        if not cursor:
+            return None
+        data_vencimento, last_id = decode_cursor(cursor)
+        return TaskCache.index_member(data_vencimento, last_id)
+
+    @staticmethod
+    def _index_page(members, limit):
+        """
+        Retorna (ids das tarefas, próximo cursor) a partir de até
+        ``limit + 1`` membros do índice.
+        """
+        has_more = len(members) > limit
+        members = members[:limit]
+        task_ids = [TaskCache.split_member(m)[1] for m in members]
+
+        next_cursor = None
+        if has_more:
+            data_vencimento, task_id = TaskCache.split_member(members[-1])
+            next_cursor = encode_cursor(
+                datetime.fromisoformat(data_vencimento), task_id
+            )
+        return task_ids, next_cursor
+
+    def _rebuild_index(self, user_id):
+        """
+        Reconstrói o índice ordenado do usuário a partir do MongoDB. Retorna
+        (membros lidos, em ordem, e se o índice foi gravado).
+        """
+        start = time.perf_counter()
+        cursor = self.collection.find(
+            {"user_id": user_id}, {"_id": 1, "data_vencimento": 1, "revisao": 1}
+        )
+        tasks = [(t["_id"], self._revision(t), t["data_vencimento"]) for t in cursor]
+        stored = self.cache.rebuild_index(user_id, tasks, time.perf_counter() - start)
+        return self._sorted_members(tasks), stored
+
+    @staticmethod
+    def _sorted_members(tasks):
+        return sorted(
+            TaskCache.index_member(data_vencimento, task_id)
+            for task_id, _, data_vencimento in tasks
+        )
+
+    @staticmethod
+    def _members_after(members, after_member, count):
+        """Até ``count`` membros posteriores a ``after_member``, como no índice"""
+        start = bisect.bisect_right(members, after_member) if after_member else 0
+        return members[start : start + count]
+
+    def _load_tasks(self, user_id, task_ids):
+        """
+        Carrega as tarefas do hash do usuário, buscando no MongoDB (em uma
+        única consulta) apenas as que não estão em cache.
+        """
+        cached = self.cache.get_items(user_id, task_ids)
+        missing = [i for i, task in zip(task_ids, cached) if task is None]
+
+        loaded = {}
+        revisions = {}
+        if missing:
+            cursor = self.collection.find(
+                {"_id": {"$in": [ObjectId(i) for i in missing]}, "user_id": user_id},
+                TASK_PROJECTION,
+            )
+            documents = list(cursor)
+            for document, task in zip(documents, self._serialize_many(documents)):
+                loaded[task["id"]] = task
+                revisions[task["id"]] = self._revision(document)
+            self.cache.set_items(user_id, loaded, revisions)
+
+        return self._merge_loaded(task_ids, cached, loaded)
+
+    @staticmethod
+    def _merge_loaded(task_ids, cached, loaded):
+        """Combina as tarefas do cache e do MongoDB na ordem de ``task_ids``"""
+        tasks = []
+        for task_id, task in zip(task_ids, cached):
+            task = task or loaded.get(task_id)
+            # Tarefas removidas entre a leitura do índice e do hash são ignoradas
+            if task:
+                tasks.append(task)
+        return tasks
+
+    @staticmethod
+    def _serialize(task):
+        task["_id"] = str(task["_id"])
+        return TaskModel(**task).model_dump()
+
+    @staticmethod
+    def _serialize_many(tasks):
+        """Serializa uma lista de documentos de uma vez (ver TASK_LIST_ADAPTER)"""
+        return TASK_LIST_ADAPTER.dump_python(TASK_LIST_ADAPTER.validate_python(tasks))
+
+    @classmethod
+    def _serialize_documents(cls, tasks, fields):
+        """Serializa as tarefas inteiras ou apenas os ``fields`` solicitados"""
+        if fields is None:
+            return cls._serialize_many(tasks)
+        return [cls._serialize_fields(task, fields) for task in tasks]
+
+    @classmethod
+    def _json_items(cls, tasks, fields, first):
+        """
+        Bloco de itens do array de tarefas em JSON, precedido de vírgula
+        quando não é o primeiro bloco. Tarefas inteiras são validadas e
+        convertidas em JSON pelo pydantic, sem passar por dicionários.
+        """
+        if fields is None:
+            # Remove os colchetes do array gerado pelo adapter
+            chunk = TASK_LIST_ADAPTER.dump_json(
+                TASK_LIST_ADAPTER.validate_python(tasks)
+            )[1:-1]
+        else:
+            chunk = b",".join(
+                orjson.dumps(cls._serialize_fields(task, fields)) for task in tasks
+            )
+        return chunk if first else b"," + chunk
 
-        if result.deleted_count > 0 and task:
-            # Invalidate cache for this user's tasks
-            user_id = task.get("user_id")
-            if user_id:
-                cache_key = f"tasks:{user_id}"
-                self.redis.delete(cache_key)
+    @staticmethod
+    def _projection(query):
+        """Campos lidos do MongoDB para uma listagem"""
+        return query["projection"] or LIST_PROJECTION
 
-        return result.deleted_count > 0
+    @staticmethod
+    def _serialize_fields(task, fields):
+        """Serializa apenas os campos solicitados, no formato do TaskModel"""
+        serialized = {"id": str(task["_id"])}
+        for field in fields:
+            value = task.get(field)
+            if field == "data_vencimento" and isinstance(value, datetime):
+                value = str(value)
+            serialized[field] = value
+        return serialized
@@ -0,0 +1,34 @@
+import click
+from flask.cli import AppGroup
+
+from app.lib.tasks import TaskService
+
+tasks_cli = AppGroup("tasks", help="Manutenção dos dados das tarefas.")
+
+
+@tasks_cli.command("rebuild-stats")
+@click.option("--user-id", help="Reconstrói apenas os contadores deste usuário.")
+def rebuild_stats_command(user_id):
+    """Recalcula os contadores de estatísticas a partir do MongoDB."""
+    service = TaskService()
+    user_ids = [user_id] if user_id else service.collection.distinct("user_id")
+    skipped = 0
+    for uid in user_ids:
+        _, stored = service.rebuild_stats(uid)
+        if not stored:
+            # Tarefas alteradas durante a leitura: a próxima consulta reconstrói
+            skipped += 1
+            click.echo(f"  {uid}: alterado durante a reconstrução, ignorado")
+    click.echo(
+        f"Contadores reconstruídos: {len(user_ids) - skipped} de {len(user_ids)}."
+    )
+
+
+@tasks_cli.command("migrate-dates")
+@click.option("--batch-size", default=500, show_default=True)
+def migrate_dates_command(batch_size):
+    """Converte as datas de vencimento gravadas em texto em datas BSON."""
+    converted, invalid = TaskService().migrate_legacy_dates(batch_size)
+    click.echo(f"Tarefas convertidas: {converted}.")
+    for task_id in invalid:
+        click.echo(f"  {task_id}: data de vencimento inválida, mantida em texto")
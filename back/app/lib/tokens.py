@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime, timezone
+
+import jwt
+
+# Algoritmo padrão do flask_jwt_extended
+ALGORITHM = "HS256"
+
+
+class InvalidToken(Exception):
+    """Token JWT ausente, malformado, expirado ou de tipo incorreto"""
+
+
+def create_access_token(configuration, identity, additional_claims=None):
+    """
+    Gera um access token no mesmo formato do flask_jwt_extended, para que os
+    tokens emitidos pela API ASGI sejam aceitos pela API WSGI e vice-versa.
+    """
+    now = datetime.now(timezone.utc)
+    claims = {
+        "fresh": False,
+        "iat": now,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "sub": identity,
+        "nbf": now,
+        "exp": now + configuration.JWT_ACCESS_TOKEN_EXPIRES,
+        **(additional_claims or {}),
+    }
+    return jwt.encode(claims, configuration.JWT_SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_access_token(configuration, authorization):
+    """Valida o cabeçalho ``Authorization: Bearer <token>`` e retorna as claims"""
+    if not authorization:
+        raise InvalidToken("Missing Authorization Header")
+    scheme, _, token = authorization.partition(" ")
+    if scheme != "Bearer" or not token:
+        raise InvalidToken("Missing 'Bearer' type in 'Authorization' header")
+    try:
+        claims = jwt.decode(token, configuration.JWT_SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise InvalidToken("Token has expired")
+    except jwt.InvalidTokenError as e:
+        raise InvalidToken(str(e))
+    if claims.get("type") != "access":
+        raise InvalidToken("Only non-refresh tokens are allowed")
+    return claims
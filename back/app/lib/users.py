@@ -0,0 +1,52 @@
+from bson import ObjectId
+from app.api.users.models import UserResponse
+from app.lib.database.mongodb import MongoDB
+from app.lib.redis.rediscache import RedisCache
+from app.lib.redis.usercache import UserCache
+
+# Campos do perfil lidos do MongoDB; a senha nunca é lida nem armazenada
+PROFILE_PROJECTION = {"email": 1, "username": 1, "created_at": 1}
+
+
+class UserService:
+    """
+    Perfis de usuário com cache no Redis (ver UserCache), usados em
+    GET /api/users e nas claims dos tokens JWT: em um cache hit, nenhum dos
+    dois consulta o MongoDB.
+    """
+
+    def __init__(self, config=None):
+        self.db = MongoDB(config)
+        self.redis = RedisCache(config)
+        self.cache = UserCache(self.redis)
+
+    @property
+    def collection(self):
+        # Resolvida a cada uso: a conexão é aberta sob demanda em cada processo
+        return self.db.get_collection("users")
+
+    def get_profile(self, user_id):
+        """Perfil do usuário, ou None se não existir"""
+        profile = self.cache.get_profile(user_id)
+        if profile is None:
+            user = self.collection.find_one(
+                {"_id": ObjectId(user_id)}, PROFILE_PROJECTION
+            )
+            if not user:
+                return None
+            profile = self.cache_profile(user)
+        return profile
+
+    def cache_profile(self, user):
+        """Grava no cache o perfil de um documento já lido do MongoDB"""
+        profile = UserResponse(**user).model_dump()
+        self.cache.set_profile(profile["id"], profile)
+        return profile
+
+    def invalidate(self, user_id):
+        self.cache.invalidate(user_id)
+
+    @staticmethod
+    def claims(profile):
+        """Claims adicionais do token JWT"""
+        return {"username": profile["username"], "email": profile["email"]}
@@ -0,0 +1,7 @@
+import os
+from app.asgi import create_asgi_app
+
+# API assíncrona: uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 4
+env = os.getenv("ENV", "production")
+
+app = create_asgi_app(env)
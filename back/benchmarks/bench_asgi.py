@@ -0,0 +1,150 @@
+"""
+Benchmark lado a lado das APIs WSGI (Flask/gunicorn) e ASGI (Starlette/uvicorn).
+
+Os dois servidores devem estar no ar, apontando para o mesmo MongoDB e Redis:
+
+    gunicorn -c gunicorn.conf.py wsgi:app                  # porta 5000
+    uvicorn asgi:app --port 5001 --workers 4
+
+O benchmark cria (ou reutiliza) um usuário pela API Flask, garante
+``--tasks`` tarefas e, para cada nível de concorrência, dispara requisições
+GET /api/tasks e GET /api/tasks/<id> em cada servidor por ``--duration``
+segundos, reportando vazão, latências p50/p95/p99 e erros.
+
+Uso:
+    python -m benchmarks.bench_asgi [--concurrency 10,100,500] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+async def prepare(base_url, email, password, tasks):
+    """Cria o usuário e as tarefas, se necessário, e retorna (token, ids)"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        await client.post(
+            "/api/users",
+            json={
+                "email": email,
+                "username": email.split("@")[0],
+                "password": password,
+            },
+        )
+        response = await client.post(
+            "/api/auth/login", json={"email": email, "password": password}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response = await client.get(
+            "/api/tasks", params={"limit": tasks}, headers=headers
+        )
+        ids = [task["id"] for task in response.json()["tasks"]]
+        for i in range(len(ids), tasks):
+            response = await client.post(
+                "/api/tasks",
+                json={
+                    "titulo": f"Tarefa {i}",
+                    "descricao": "Tarefa criada pelo benchmark",
+                    "status": "pendente",
+                    "data_vencimento": f"2025-01-{i % 28 + 1:02d}T00:00:00",
+                },
+                headers=headers,
+            )
+            ids.append(response.json()["id"])
+        return headers["Authorization"], ids
+
+
+async def run(base_url, token, task_ids, concurrency, duration):
+    """Executa ``concurrency`` clientes em paralelo por ``duration`` segundos"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": token},
+        limits=limits,
+        timeout=60,
+    ) as client:
+
+        async def worker(n):
+            nonlocal errors
+            i = n
+            while time.perf_counter() < deadline:
+                # Alterna entre a listagem e a leitura de uma tarefa
+                path = (
+                    "/api/tasks"
+                    if i % 2 == 0
+                    else f"/api/tasks/{task_ids[i % len(task_ids)]}"
+                )
+                i += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flask-url", default="http://localhost:5000")
+    parser.add_argument("--asgi-url", default="http://localhost:5001")
+    parser.add_argument("--concurrency", default="10,100,500")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--email", default=f"bench-{uuid.uuid4().hex[:8]}@exemplo.com")
+    parser.add_argument("--password", default="benchmark")
+    args = parser.parse_args()
+
+    # Os tokens são compatíveis: o mesmo usuário é usado nas duas APIs
+    token, task_ids = await prepare(
+        args.flask_url, args.email, args.password, args.tasks
+    )
+    targets = {"wsgi": args.flask_url, "asgi": args.asgi_url}
+
+    print(f"{args.tasks} tarefas, {args.duration:.0f}s por cenário")
+    print(
+        f"{'api':<6}{'clientes':>10}{'req/s':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}"
+    )
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        for name, url in targets.items():
+            result = await run(url, token, task_ids, concurrency, args.duration)
+            print(
+                f"{name:<6}{concurrency:>10}{result['rps']:>10.1f}"
+                f"{result['p50'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}"
+                f"{result['p99'] * 1000:>10.1f}{result['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
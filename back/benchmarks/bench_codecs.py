@@ -0,0 +1,63 @@
+"""
+Micro-benchmark dos codecs do cache Redis.
+
+Compara tempo de serialização/deserialização e tamanho dos valores para uma
+lista de tarefas semelhante às gravadas pelo TaskService.
+
+Uso:
+    python -m benchmarks.bench_codecs [--tasks 1000] [--repeat 50]
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.lib.redis.codecs import CODECS, COMPRESSIONS, CacheSerializer, zstandard
+
+
+def build_tasks(count):
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "titulo": f"Tarefa {i}",
+            "descricao": "Descrição da tarefa número %d para o benchmark" % i,
+            "status": ("pendente", "em_andamento", "concluida")[i % 3],
+            "data_vencimento": base + timedelta(days=i),
+            "user_id": "65f0c0ffee0000000000beef",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    value = build_tasks(args.tasks)
+    compressions = [c for c in COMPRESSIONS if c != "zstd" or zstandard is not None]
+
+    print(f"{args.tasks} tarefas, {args.repeat} repetições")
+    print(
+        f"{'codec':<10}{'compressão':<12}{'bytes':>10}{'dumps ms':>12}{'loads ms':>12}"
+    )
+    for codec in CODECS:
+        for compression in compressions:
+            serializer = CacheSerializer(codec, compression, threshold=1024)
+            data = serializer.dumps(value)
+            assert serializer.loads(data) == value
+
+            dumps = timeit.timeit(lambda: serializer.dumps(value), number=args.repeat)
+            loads = timeit.timeit(lambda: serializer.loads(data), number=args.repeat)
+            print(
+                f"{codec:<10}{compression:<12}{len(data):>10}"
+                f"{dumps / args.repeat * 1000:>12.3f}{loads / args.repeat * 1000:>12.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
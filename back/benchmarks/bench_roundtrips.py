@@ -0,0 +1,260 @@
+"""
+Idas ao MongoDB e ao Redis por requisição nas rotas que alteram dados.
+
+Executa cada cenário ``--requests`` vezes contra ``create_app("testing")`` e
+exibe a média de comandos enviados a cada servidor por requisição.
+
+Backends:
+    memory  mongomock + fakeredis no próprio processo (padrão); as chamadas
+            à API de coleções do mongomock são contadas diretamente
+    local   MongoDB e Redis de MONGODB_URI / REDIS_URI; as idas ao MongoDB
+            são contadas pelo listener de comandos do pymongo
+
+No Redis, cada comando, script ou pipeline conta como uma ida (métrica
+``redis_command_duration_seconds``), nos dois backends.
+
+Uso:
+    python -m benchmarks.bench_roundtrips [--backend memory] [--requests 50]
+"""
+
+import argparse
+import functools
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+# Operações da API de coleções que correspondem a um comando no servidor
+COLLECTION_METHODS = (
+    "find",
+    "find_one",
+    "insert_one",
+    "insert_many",
+    "update_one",
+    "update_many",
+    "replace_one",
+    "delete_one",
+    "delete_many",
+    "find_one_and_update",
+    "find_one_and_replace",
+    "find_one_and_delete",
+    "bulk_write",
+    "aggregate",
+    "count_documents",
+)
+
+
+class MemoryMongoCounter:
+    """
+    Conta as chamadas à API de coleções do mongomock. Chamadas internas (ex.:
+    ``find_one`` implementado sobre ``find``) não são contadas novamente.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._local = threading.local()
+
+    def install(self):
+        from mongomock.collection import Collection
+
+        for name in COLLECTION_METHODS:
+            setattr(Collection, name, self._wrap(getattr(Collection, name)))
+
+    def _wrap(self, method):
+        @functools.wraps(method)
+        def counted(*args, **kwargs):
+            if getattr(self._local, "active", False):
+                return method(*args, **kwargs)
+            self._local.active = True
+            self.count += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._local.active = False
+
+        return counted
+
+    def total(self):
+        return self.count
+
+
+def metric_total(histogram):
+    """Número de observações de um histograma, somado entre os labels"""
+    return sum(
+        sample.value
+        for metric in histogram.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_count")
+    )
+
+
+class Scenario:
+    """Cliente com um usuário autenticado e algumas tarefas"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.suffix = uuid.uuid4().hex[:12]
+        self.created = 0
+        response = self.client.post(
+            "/api/users",
+            json={
+                "email": f"rt{self.suffix}@exemplo.com",
+                "username": f"rt{self.suffix}",
+                "password": "idas",
+            },
+        )
+        assert response.status_code == 201, response.get_json()
+        response = self.client.post(
+            "/api/auth/login",
+            json={"email": f"rt{self.suffix}@exemplo.com", "password": "idas"},
+        )
+        self.headers = {
+            "Authorization": f"Bearer {response.get_json()['access_token']}"
+        }
+        self.task_ids = [self.create_task() for _ in range(4)]
+
+    def task_payload(self):
+        self.created += 1
+        return {
+            "titulo": f"Tarefa {self.created}",
+            "descricao": "Tarefa criada pelo benchmark de idas",
+            "status": "pendente",
+            "data_vencimento": (
+                datetime(2025, 1, 1) + timedelta(days=self.created)
+            ).isoformat(),
+        }
+
+    def create_task(self):
+        response = self.client.post(
+            "/api/tasks", json=self.task_payload(), headers=self.headers
+        )
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()["id"]
+
+    def create_user(self):
+        suffix = uuid.uuid4().hex[:12]
+        response = self.client.post(
+            "/api/users",
+            json={
+                "email": f"rt{suffix}@exemplo.com",
+                "username": f"rt{suffix}",
+                "password": "idas",
+            },
+        )
+        return response.status_code == 201
+
+    def update_user(self):
+        response = self.client.put(
+            "/api/users",
+            json={"username": f"rt{self.suffix}-{uuid.uuid4().hex[:6]}"},
+            headers=self.headers,
+        )
+        return response.status_code == 200
+
+    def update_task(self):
+        task_id = self.task_ids[self.created % len(self.task_ids)]
+        response = self.client.put(
+            f"/api/tasks/{task_id}",
+            json={"status": "concluida", "titulo": f"Alterada {self.created}"},
+            headers=self.headers,
+        )
+        self.created += 1
+        return response.status_code == 200
+
+    def delete_task(self, task_id):
+        response = self.client.delete(f"/api/tasks/{task_id}", headers=self.headers)
+        return response.status_code == 200
+
+
+def measure(name, count, prepare, action, mongo_total, redis_total):
+    """Média de idas por requisição; ``action`` retorna se a resposta foi a esperada"""
+    mongo = redis = errors = 0
+    for _ in range(count):
+        argument = prepare()
+        mongo_start, redis_start = mongo_total(), redis_total()
+        if not action(argument):
+            errors += 1
+        mongo += mongo_total() - mongo_start
+        redis += redis_total() - redis_start
+    print(f"{name:<26}{mongo / count:>10.2f}{redis / count:>10.2f}{errors:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=("memory", "local"), default="memory")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ["ENV"] = "testing"
+    if args.backend == "memory":
+        from benchmarks.standins import use_memory_backends
+
+        use_memory_backends()
+        counter = MemoryMongoCounter()
+        counter.install()
+        mongo_total = counter.total
+    else:
+        from app.lib.metrics import MONGODB_COMMAND_DURATION
+
+        def mongo_total():
+            return metric_total(MONGODB_COMMAND_DURATION)
+
+    from app import create_app
+    from app.lib.metrics import REDIS_COMMAND_DURATION
+
+    def redis_total():
+        return metric_total(REDIS_COMMAND_DURATION)
+
+    app = create_app("testing")
+    scenario = Scenario(app)
+
+    def nothing():
+        return None
+
+    print(f"backend={args.backend} requisições={args.requests}")
+    print(f"{'rota':<26}{'MongoDB':>10}{'Redis':>10}{'erros':>8}")
+    measure(
+        "POST /api/users",
+        args.requests,
+        nothing,
+        lambda _: scenario.create_user(),
+        mongo_total,
+        redis_total,
+    )
+    measure(
+        "PUT /api/users",
+        args.requests,
+        nothing,
+        lambda _: scenario.update_user(),
+        mongo_total,
+        redis_total,
+    )
+    measure(
+        "POST /api/tasks",
+        args.requests,
+        nothing,
+        lambda _: bool(scenario.create_task()),
+        mongo_total,
+        redis_total,
+    )
+    measure(
+        "PUT /api/tasks/<id>",
+        args.requests,
+        nothing,
+        lambda _: scenario.update_task(),
+        mongo_total,
+        redis_total,
+    )
+    measure(
+        "DELETE /api/tasks/<id>",
+        args.requests,
+        # A tarefa é criada fora da medição, para contar só a exclusão
+        scenario.create_task,
+        scenario.delete_task,
+        mongo_total,
+        redis_total,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark da serialização de tarefas nas listagens.
+
+Compara a serialização documento a documento (um ``TaskModel`` por tarefa,
+seguido de ``model_dump``) com a serialização em lote do TaskService
+(``TypeAdapter(list[TaskModel])``), tanto para dicionários (páginas e cache)
+quanto para JSON (listagem em streaming).
+
+Uso:
+    python -m benchmarks.bench_serialization [--tasks 1000] [--repeat 50]
+"""
+
+import argparse
+import timeit
+
+import orjson
+
+from app.api.tasks.models import TaskModel
+from app.lib.tasks import LIST_PROJECTION, TaskService
+from benchmarks.bench_codecs import build_tasks
+
+
+def per_document(documents):
+    tasks = []
+    for task in documents:
+        task = dict(task)
+        task["_id"] = str(task["_id"])
+        tasks.append(TaskModel(**task).model_dump())
+    return tasks
+
+
+def per_document_json(documents):
+    return b",".join(orjson.dumps(task) for task in per_document(documents))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # Documentos como lidos com a projeção das listagens
+    documents = [
+        {"_id": task["_id"], **{field: task[field] for field in LIST_PROJECTION}}
+        for task in build_tasks(args.tasks)
+    ]
+
+    cases = [
+        ("dicts", per_document, TaskService._serialize_many),
+        (
+            "json",
+            per_document_json,
+            lambda tasks: TaskService._json_items(tasks, None, True),
+        ),
+    ]
+
+    print(f"{args.tasks} tarefas, {args.repeat} repetições")
+    print(f"{'saída':<8}{'por documento ms':>18}{'em lote ms':>14}{'ganho':>8}")
+    for name, single, bulk in cases:
+        assert single(documents) == bulk(documents)
+        single_time = timeit.timeit(lambda: single(documents), number=args.repeat)
+        bulk_time = timeit.timeit(lambda: bulk(documents), number=args.repeat)
+        print(
+            f"{name:<8}{single_time / args.repeat * 1000:>18.3f}"
+            f"{bulk_time / args.repeat * 1000:>14.3f}"
+            f"{single_time / bulk_time:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Teste de carga reproduzível das rotas da API.
+
+Sobe ``create_app("testing")`` no próprio processo e executa uma mistura de
+login, CRUD de tarefas, listagens e redefinição de senha com ``--concurrency``
+clientes simultâneos, cada um com seu usuário. Ao final, exibe vazão e
+latências p50/p95/p99 por rota e grava o resultado em JSON.
+
+Backends:
+    memory  mongomock + fakeredis no próprio processo (padrão)
+    local   MongoDB e Redis de MONGODB_URI / REDIS_URI (ex.: um mongod e um
+            redis-server locais)
+
+Uso:
+    python -m benchmarks.loadtest [--backend memory] [--concurrency 8]
+        [--duration 20] [--output benchmarks/results]
+    python -m benchmarks.loadtest --compare base.json novo.json [--tolerance 0.1]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Peso de cada operação na mistura
+WEIGHTS = {
+    "list": 40,
+    "get": 20,
+    "list_filtered": 10,
+    "create": 10,
+    "update": 10,
+    "delete": 5,
+    "login": 3,
+    "reset_password": 2,
+}
+
+STATUSES = ("pendente", "em_andamento", "concluida")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def task_payload(rng, i):
+    return {
+        "titulo": f"Tarefa {i}",
+        "descricao": f"Tarefa {i} criada pelo teste de carga",
+        "status": rng.choice(STATUSES),
+        "data_vencimento": (
+            datetime(2025, 1, 1) + timedelta(days=rng.randrange(365))
+        ).isoformat(),
+    }
+
+
+class Recorder:
+    """Acumula latências e erros por rota, de forma thread-safe"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.enabled = False
+        self._lock = threading.Lock()
+
+    def record(self, route, elapsed, ok):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            if not ok:
+                self.errors[route] += 1
+
+
+class Session:
+    """Cliente de um usuário: executa operações e registra cada requisição"""
+
+    def __init__(self, app, recorder, index, seed, tasks):
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.rng = random.Random(seed + index)
+        self.email = f"carga{index}@exemplo.com"
+        self.password = "carga"
+        self.headers = {}
+        self.task_ids = []
+        self.created = 0
+
+        self.client.post(
+            "/api/users",
+            json={
+                "email": self.email,
+                "username": f"carga{index}",
+                "password": self.password,
+            },
+        )
+        self.login()
+        for _ in range(tasks):
+            self.create()
+
+    def request(self, route, method, path, expected, **kwargs):
+        start = time.perf_counter()
+        response = self.client.open(path, method=method, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.recorder.record(route, elapsed, response.status_code in expected)
+        return response
+
+    def login(self):
+        response = self.request(
+            "POST /api/auth/login",
+            "POST",
+            "/api/auth/login",
+            (200,),
+            json={"email": self.email, "password": self.password},
+        )
+        token = response.get_json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def list(self):
+        self.request(
+            "GET /api/tasks", "GET", "/api/tasks", (200,), headers=self.headers
+        )
+
+    def list_filtered(self):
+        status = self.rng.choice(STATUSES)
+        self.request(
+            "GET /api/tasks?status&sort",
+            "GET",
+            f"/api/tasks?status={status}&sort=-data_vencimento",
+            (200,),
+            headers=self.headers,
+        )
+
+    def get(self):
+        task_id = self.rng.choice(self.task_ids)
+        self.request(
+            "GET /api/tasks/<id>",
+            "GET",
+            f"/api/tasks/{task_id}",
+            (200,),
+            headers=self.headers,
+        )
+
+    def create(self):
+        self.created += 1
+        response = self.request(
+            "POST /api/tasks",
+            "POST",
+            "/api/tasks",
+            (201,),
+            json=task_payload(self.rng, self.created),
+            headers=self.headers,
+        )
+        self.task_ids.append(response.get_json()["id"])
+
+    def update(self):
+        task_id = self.rng.choice(self.task_ids)
+        self.request(
+            "PUT /api/tasks/<id>",
+            "PUT",
+            f"/api/tasks/{task_id}",
+            (200,),
+            json={"status": self.rng.choice(STATUSES)},
+            headers=self.headers,
+        )
+
+    def delete(self):
+        task_id = self.task_ids.pop(self.rng.randrange(len(self.task_ids)))
+        self.request(
+            "DELETE /api/tasks/<id>",
+            "DELETE",
+            f"/api/tasks/{task_id}",
+            (200,),
+            headers=self.headers,
+        )
+
+    def reset_password(self):
+        self.request(
+            "POST /api/auth/reset-password",
+            "POST",
+            "/api/auth/reset-password",
+            (200,),
+            json={"email": self.email},
+        )
+
+    def step(self):
+        operations = list(WEIGHTS)
+        operation = self.rng.choices(operations, [WEIGHTS[o] for o in operations])[0]
+        if not self.task_ids and operation in ("get", "update", "delete"):
+            operation = "create"
+        getattr(self, operation)()
+
+
+def summarize(recorder, elapsed):
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[route],
+            "rps": len(latencies) / elapsed,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": max(latencies) * 1000,
+        }
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    total = {
+        "requests": len(all_latencies),
+        "errors": sum(recorder.errors.values()),
+        "rps": len(all_latencies) / elapsed,
+        "p50_ms": percentile(all_latencies, 50) * 1000,
+        "p95_ms": percentile(all_latencies, 95) * 1000,
+        "p99_ms": percentile(all_latencies, 99) * 1000,
+    }
+    return routes, total
+
+
+def print_report(result):
+    meta = result["meta"]
+    print(
+        f"backend={meta['backend']} clientes={meta['concurrency']} "
+        f"duração={meta['duration']}s commit={meta['commit']}"
+    )
+    print(
+        f"{'rota':<32}{'req':>8}{'erros':>7}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    for route, stats in list(result["routes"].items()) + [("total", result["total"])]:
+        print(
+            f"{route:<32}{stats['requests']:>8}{stats['errors']:>7}"
+            f"{stats['rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+            f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    os.environ["ENV"] = "testing"
+    # Todos os clientes vêm do mesmo IP e repetem o login; o limite de
+    # tentativas rejeitaria a mistura de operações
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if args.backend == "memory":
+        from benchmarks.standins import use_memory_backends
+
+        use_memory_backends()
+
+    from app import create_app
+
+    logging.disable(logging.WARNING)
+    app = create_app("testing")
+    recorder = Recorder()
+
+    sessions = [
+        Session(app, recorder, i, args.seed, args.tasks)
+        for i in range(args.concurrency)
+    ]
+
+    def worker(session, deadline):
+        while time.perf_counter() < deadline:
+            session.step()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        if args.warmup:
+            deadline = time.perf_counter() + args.warmup
+            list(executor.map(lambda s: worker(s, deadline), sessions))
+
+        recorder.enabled = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        list(executor.map(lambda s: worker(s, deadline), sessions))
+        elapsed = time.perf_counter() - started
+
+    routes, total = summarize(recorder, elapsed)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "backend": args.backend,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "tasks": args.tasks,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "routes": routes,
+        "total": total,
+    }
+
+
+def compare(base_path, new_path, tolerance):
+    """
+    Compara dois resultados e retorna as rotas com regressão: p95 maior ou
+    vazão menor que a base além da tolerância.
+    """
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(
+        f"{'rota':<32}{'p95 base':>10}{'p95 novo':>10}{'req/s base':>12}{'req/s novo':>12}"
+    )
+    regressions = []
+    for route, stats in new["routes"].items():
+        if route not in base["routes"]:
+            continue
+        old = base["routes"][route]
+        slower = stats["p95_ms"] > old["p95_ms"] * (1 + tolerance)
+        fewer = stats["rps"] < old["rps"] * (1 - tolerance)
+        flag = ""
+        if slower or fewer:
+            regressions.append(route)
+            flag = "  <- regressão"
+        print(
+            f"{route:<32}{old['p95_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+            f"{old['rps']:>12.1f}{stats['rps']:>12.1f}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=("memory", "local"), default="memory")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--tasks", type=int, default=50, help="tarefas por usuário")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmarks/results")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NOVO"))
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    result = run(args)
+    print_report(result)
+
+    os.makedirs(args.output, exist_ok=True)
+    name = f"loadtest-{datetime.now():%Y%m%d-%H%M%S}-{result['meta']['commit']}.json"
+    path = os.path.join(args.output, name)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Resultado gravado em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Substitutos em memória do MongoDB e do Redis para os benchmarks.
+
+``use_memory_backends()`` deve ser chamada antes de ``create_app``: as
+conexões passam a ser abertas contra o mongomock e o fakeredis (com Lua via
+``lupa``), compartilhados por todas as instâncias do processo.
+"""
+
+import fakeredis
+import mongomock
+from mongomock.collection import BulkOperationBuilder
+from mongomock.store import ServerStore
+import redis
+
+from app.lib.database import mongodb
+
+_mongo_store = ServerStore()
+_redis_server = fakeredis.FakeServer()
+
+
+class _Admin:
+    """O mongomock não implementa ``command``; ping/ismaster sempre respondem ok"""
+
+    def command(self, *args, **kwargs):
+        return {"ok": 1.0}
+
+
+class MemoryMongoClient(mongomock.MongoClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(_store=_mongo_store)
+
+    @property
+    def admin(self):
+        return _Admin()
+
+
+def _memory_redis_pool(url, **kwargs):
+    return redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection,
+        server=_redis_server,
+        max_connections=kwargs.get("max_connections", 50),
+        timeout=kwargs.get("timeout", 20),
+    )
+
+
+_add_update = BulkOperationBuilder.add_update
+
+
+def _add_update_without_sort(self, *args, sort=None, **kwargs):
+    # O pymongo >= 4.11 repassa o argumento sort de UpdateOne ao bulk_write,
+    # que o mongomock não aceita; sem sort o resultado é o mesmo
+    return _add_update(self, *args, **kwargs)
+
+
+def use_memory_backends():
+    mongodb.MongoClient = MemoryMongoClient
+    BulkOperationBuilder.add_update = _add_update_without_sort
+    redis.BlockingConnectionPool.from_url = _memory_redis_pool
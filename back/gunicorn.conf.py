@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+
+# Configuração do gunicorn para produção: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Cada worker cria a aplicação após o fork (preload_app desativado) e abre
+# suas próprias conexões com MongoDB e Redis no primeiro uso. Os singletons
+# também detectam um fork pelo pid, então ativar GUNICORN_PRELOAD é seguro.
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# Threads por worker: o pool do Redis (REDIS_MAX_CONNECTIONS) deve comportar
+# ao menos esse número de conexões simultâneas
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recicla os workers periodicamente, com jitter para não reiniciarem juntos
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def child_exit(server, worker):
+    """Descarta os arquivos de métricas do worker que saiu (modo multiprocess)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """Encerra as conexões e pools do worker antes de ele sair"""
+    from app.lib.database.mongodb import MongoDB
+    from app.lib.passwords import PasswordHasher
+    from app.lib.redis.rediscache import RedisCache
+
+    MongoDB.close_all()
+    RedisCache.close_all()
+    PasswordHasher.shutdown_all()
@@ -0,0 +1,59 @@
+"""
+Fixtures dos testes: a aplicação roda sobre o mongomock e o fakeredis (com
+Lua via ``lupa``), os mesmos substitutos em memória dos benchmarks.
+"""
+
+import os
+import uuid
+
+import pytest
+
+os.environ["ENV"] = "testing"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from benchmarks.standins import (  # noqa: E402
+    MemoryMongoClient,
+    _redis_server,
+    use_memory_backends,
+)
+
+use_memory_backends()
+
+import fakeredis  # noqa: E402
+
+from app import create_app  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    yield app
+    # Cada teste começa com o banco e o Redis vazios
+    for name in MemoryMongoClient().list_database_names():
+        MemoryMongoClient().drop_database(name)
+    fakeredis.FakeRedis(server=_redis_server).flushall()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(server=_redis_server)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Cabeçalhos de um usuário recém-criado e autenticado"""
+    suffix = uuid.uuid4().hex[:12]
+    email = f"teste{suffix}@exemplo.com"
+    client.post(
+        "/api/users",
+        json={"email": email, "username": f"teste{suffix}", "password": "segredo"},
+    )
+    response = client.post(
+        "/api/auth/login", json={"email": email, "password": "segredo"}
+    )
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
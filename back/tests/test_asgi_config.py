@@ -0,0 +1,40 @@
+from starlette.testclient import TestClient
+
+from app.api.tasks.asgi import TaskView
+from app.asgi import create_asgi_app
+from app.config import config_by_name
+from app.lib.metrics import HTTP_REQUESTS
+
+
+async def _unused():
+    pass
+
+
+def test_route_services_use_app_configuration(monkeypatch):
+    # O ambiente do processo não deve ser usado no lugar do da aplicação
+    monkeypatch.setenv("ENV", "development")
+    app = create_asgi_app("testing")
+    configuration = config_by_name["testing"]
+
+    view = TaskView({"type": "http", "app": app}, _unused, _unused)
+    service = view.task_service
+    assert service.config is configuration
+    assert service.db._config is configuration
+    assert service.redis._config is configuration
+    assert service.stats.config is configuration
+
+
+def test_metrics_route_counts_requests_by_route():
+    app = create_asgi_app("testing")
+    route = "/api/tasks/{task_id:task_id}"
+    counter = HTTP_REQUESTS.labels("GET", route, 401)
+    before = counter._value.get()
+
+    # Sem o lifespan: a rota de tarefas responde 401 antes de usar o banco
+    client = TestClient(app)
+    assert client.get("/api/tasks/abc").status_code == 401
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert counter._value.get() == before + 1
+    assert "http_requests_total" in response.text
@@ -0,0 +1,20 @@
+from app import create_app
+from app.config import config_by_name
+
+
+def test_logout_revokes_token(client, auth_headers):
+    assert client.post("/api/auth/logout", headers=auth_headers).status_code == 200
+
+    response = client.get("/api/tasks", headers=auth_headers)
+    assert response.status_code == 401
+    assert (
+        client.get("/api/auth/blocklist/stats", headers=auth_headers).status_code == 401
+    )
+
+
+def test_blocklist_uses_app_configuration(monkeypatch):
+    # O ambiente do processo não deve ser usado no lugar do da aplicação
+    monkeypatch.setenv("ENV", "development")
+    app = create_app("testing")
+
+    assert app.blocklist.redis._config is config_by_name["testing"]
@@ -0,0 +1,90 @@
+from bson import ObjectId
+
+from app.lib.tasks import TaskService
+
+TASK = {
+    "titulo": "Tarefa",
+    "descricao": "criada em lote",
+    "status": "pendente",
+    "data_vencimento": "2025-01-01T00:00:00",
+}
+
+
+def bulk(client, headers, operations):
+    response = client.post(
+        "/api/tasks/bulk", json={"operations": operations}, headers=headers
+    )
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()["results"]
+
+
+def create(client, headers, count):
+    results = bulk(client, headers, [{"op": "create", "task": TASK}] * count)
+    return [result["id"] for result in results]
+
+
+def test_non_object_item_fails_only_that_item(client, auth_headers):
+    results = bulk(client, auth_headers, [{"op": "create", "task": TASK}, 1, "x"])
+
+    assert results[0]["status"] == 201
+    assert [r["status"] for r in results[1:]] == [400, 400]
+    assert client.get("/api/tasks", headers=auth_headers).get_json()["tasks"]
+
+
+def remove_after_check(monkeypatch, collection, task_ids):
+    """Outra requisição remove as tarefas depois da verificação de existência"""
+    bulk_pending = TaskService._bulk_pending
+
+    def remove_before_write(results, requests, existing):
+        pending = bulk_pending(results, requests, existing)
+        collection.delete_many({"_id": {"$in": [ObjectId(i) for i in task_ids]}})
+        return pending
+
+    monkeypatch.setattr(TaskService, "_bulk_pending", staticmethod(remove_before_write))
+
+
+def test_tasks_removed_after_existence_check_are_not_found(
+    app, client, auth_headers, monkeypatch
+):
+    updated, deleted = create(client, auth_headers, 2)
+    collection = app.mongodb.get_database()["tasks"]
+    remove_after_check(monkeypatch, collection, [updated, deleted])
+
+    results = bulk(
+        client,
+        auth_headers,
+        [
+            {"op": "update", "id": updated, "task": {"status": "concluida"}},
+            {"op": "delete", "id": deleted},
+        ],
+    )
+
+    assert [r["status"] for r in results] == [404, 404]
+
+
+def test_partially_lost_updates_keep_their_status(
+    app, client, auth_headers, monkeypatch
+):
+    lost, kept = create(client, auth_headers, 2)
+    collection = app.mongodb.get_database()["tasks"]
+    remove_after_check(monkeypatch, collection, [lost])
+
+    results = bulk(
+        client,
+        auth_headers,
+        [
+            {"op": "update", "id": lost, "task": {"status": "concluida"}},
+            {"op": "update", "id": kept, "task": {"status": "concluida"}},
+        ],
+    )
+
+    # Sem reler o MongoDB, não há como saber qual perdeu a corrida: ambas
+    # contam como aplicadas antes da exclusão concorrente
+    assert [r["status"] for r in results] == [200, 200]
+    assert collection.find_one({"_id": ObjectId(kept)})["status"] == "concluida"
+
+
+def test_bulk_path_rejects_other_methods(client, auth_headers):
+    for method in (client.get, client.put, client.delete):
+        assert method("/api/tasks/bulk", headers=auth_headers).status_code == 405
+    assert client.put("/api/tasks/stats", headers=auth_headers).status_code == 405
@@ -0,0 +1,39 @@
+import gzip
+import json
+
+from app.config import config_by_name
+
+from tests.test_tasks import create
+
+
+def test_large_responses_are_gzipped(client, auth_headers):
+    minimum = config_by_name["testing"].COMPRESSION_MIN_SIZE
+    create(client, auth_headers, descricao="x" * minimum)
+    headers = {**auth_headers, "Accept-Encoding": "gzip"}
+
+    response = client.get("/api/tasks", headers=headers)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    page = json.loads(gzip.decompress(response.data))
+    assert len(page["tasks"][0]["descricao"]) == minimum
+
+
+def test_small_responses_are_not_compressed(client, auth_headers):
+    headers = {**auth_headers, "Accept-Encoding": "gzip"}
+
+    response = client.get("/api/tasks", headers=headers)
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["tasks"] == []
+
+
+def test_streamed_responses_are_compressed(client, auth_headers):
+    create(client, auth_headers, titulo="a")
+    headers = {**auth_headers, "Accept-Encoding": "gzip"}
+
+    response = client.get("/api/tasks?stream=true", headers=headers)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    page = json.loads(gzip.decompress(response.data))
+    assert [t["titulo"] for t in page["tasks"]] == ["a"]
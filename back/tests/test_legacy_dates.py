@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from flask_jwt_extended import decode_token
+
+from app.lib.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def user_id(app, headers):
+    with app.app_context():
+        return decode_token(headers["Authorization"].split()[1])["sub"]
+
+
+@pytest.fixture
+def legacy_tasks(app, auth_headers):
+    """
+    Tarefas como gravadas antes das datas BSON: data_vencimento em texto,
+    no formato do ``str`` de um datetime
+    """
+    collection = app.mongodb.get_database()["tasks"]
+    uid = user_id(app, auth_headers)
+    documents = [
+        {
+            "titulo": f"Antiga {day}",
+            "descricao": "gravada em texto",
+            "status": "pendente",
+            "data_vencimento": str(datetime(2024, 1, day)),
+            "user_id": uid,
+        }
+        for day in (1, 2, 3)
+    ]
+    collection.insert_many(documents)
+    return documents
+
+
+def test_cursor_keeps_legacy_text_date():
+    task_id = ObjectId()
+    cursor = encode_cursor("2024-01-01 00:00:00", task_id)
+    assert decode_cursor(cursor) == ("2024-01-01 00:00:00", task_id)
+
+    cursor = encode_cursor(datetime(2024, 1, 1), task_id)
+    assert decode_cursor(cursor) == (datetime(2024, 1, 1), task_id)
+
+
+def test_keyset_filter_crosses_from_text_to_bson_dates():
+    cursor = encode_cursor("2024-01-01 00:00:00", ObjectId())
+    conditions = keyset_filter(cursor)["$or"]
+    assert {"data_vencimento": {"$type": "date"}} in conditions
+
+    cursor = encode_cursor(datetime(2024, 1, 1), ObjectId())
+    conditions = keyset_filter(cursor, descending=True)["$or"]
+    assert {"data_vencimento": {"$type": "string"}} in conditions
+
+
+@pytest.mark.parametrize(
+    "params",
+    ["status=pendente", "sort=-data_vencimento", "fields=titulo", ""],
+)
+def test_listing_pages_through_legacy_dates(client, auth_headers, legacy_tasks, params):
+    client.post(
+        "/api/tasks",
+        json={
+            "titulo": "Nova",
+            "descricao": "gravada como data",
+            "status": "pendente",
+            "data_vencimento": "2024-01-04T00:00:00",
+        },
+        headers=auth_headers,
+    )
+
+    titles, cursor = [], None
+    while True:
+        url = f"/api/tasks?limit=2&{params}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, response.get_json()
+        page = response.get_json()
+        titles += [task["titulo"] for task in page["tasks"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(titles) == ["Antiga 1", "Antiga 2", "Antiga 3", "Nova"]
+
+
+def test_due_filters_match_legacy_text_dates(client, auth_headers, legacy_tasks):
+    response = client.get(
+        "/api/tasks?due_before=2024-01-03T00:00:00&due_after=2024-01-02T00:00:00",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert [t["titulo"] for t in response.get_json()["tasks"]] == ["Antiga 2"]
+
+
+def test_migrate_dates_converts_text_to_bson_dates(
+    app, client, auth_headers, legacy_tasks
+):
+    # O cache é preenchido antes da migração e deve ser descartado por ela
+    assert client.get("/api/tasks", headers=auth_headers).status_code == 200
+    collection = app.mongodb.get_database()["tasks"]
+    collection.update_one({"titulo": "Antiga 3"}, {"$set": {"data_vencimento": "?"}})
+
+    result = app.test_cli_runner().invoke(args=["tasks", "migrate-dates"])
+
+    assert result.exit_code == 0, result.output
+    assert "Tarefas convertidas: 2." in result.output
+    assert "data de vencimento inválida" in result.output
+    migrated = collection.find_one({"titulo": "Antiga 1"})
+    assert migrated["data_vencimento"] == datetime(2024, 1, 1)
+    assert migrated["revisao"] == 1
+    assert collection.count_documents({"data_vencimento": {"$type": "string"}}) == 1
+
+    response = client.get(
+        "/api/tasks?due_before=2024-01-02T00:00:00", headers=auth_headers
+    )
+    assert [t["titulo"] for t in response.get_json()["tasks"]] == ["Antiga 1"]
@@ -0,0 +1,161 @@
+"""
+Envio pela fila de emails até um servidor SMTP local (aiosmtpd), com o
+Redis em memória dos demais testes.
+"""
+
+import email
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+
+from app.config import config_by_name
+from app.lib.mail import build_password_reset_message
+from app.lib.mailqueue import (
+    DEAD_KEY,
+    QUEUE_KEY,
+    RETRY_KEY,
+    MailDispatcher,
+    MailQueue,
+)
+from app.lib.redis.rediscache import RedisCache
+
+
+class Recorder(Sink):
+    """Guarda os emails recebidos e recusa os destinatários ``recusado@``"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("recusado@"):
+            return "550 5.1.1 Destinatário inexistente"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, envelope.rcpt_tos))
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = Recorder()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+@pytest.fixture
+def config(smtp_server):
+    return type(
+        "MailTestConfig",
+        (config_by_name["testing"],),
+        {
+            "MAIL_SERVER": smtp_server.hostname,
+            "MAIL_PORT": smtp_server.port,
+            "MAIL_USE_TLS": False,
+            "MAIL_USERNAME": "",
+            "MAIL_DEFAULT_SENDER": "naoresponda@exemplo.com",
+            "MAIL_POLL_TIMEOUT": 1,
+        },
+    )
+
+
+def _message(config, to_email):
+    return build_password_reset_message(config, to_email, "token").as_string()
+
+
+def test_worker_sends_and_dead_letters_refused(app, redis_client, smtp_server, config):
+    queue = MailQueue(RedisCache(), worker_id="worker-1")
+    queue.enqueue("ana@exemplo.com", _message(config, "ana@exemplo.com"))
+    queue.enqueue("recusado@exemplo.com", _message(config, "recusado@exemplo.com"))
+
+    dispatcher = MailDispatcher(config, queue)
+    try:
+        assert dispatcher.run_once() == 1
+    finally:
+        dispatcher.connection.close()
+
+    assert smtp_server.handler.messages == [
+        ("naoresponda@exemplo.com", ["ana@exemplo.com"])
+    ]
+    # Recusa permanente: descartado sem passar pelas novas tentativas
+    assert redis_client.zcard(RETRY_KEY) == 0
+    dead = [
+        queue.redis.deserialize(data) for data in redis_client.lrange(DEAD_KEY, 0, -1)
+    ]
+    assert [(job["to"], job["attempts"]) for job in dead] == [
+        ("recusado@exemplo.com", 1)
+    ]
+    assert redis_client.llen(queue.processing_key("worker-1")) == 0
+
+
+def test_worker_recovers_batch_of_dead_worker(app, redis_client, smtp_server, config):
+    crashed = MailQueue(RedisCache(), worker_id="worker-1")
+    crashed.enqueue("ana@exemplo.com", _message(config, "ana@exemplo.com"))
+    crashed.enqueue("bia@exemplo.com", _message(config, "bia@exemplo.com"))
+    crashed.heartbeat(60)
+    # O worker retira o lote da fila e morre antes de enviar
+    assert len(crashed.pop_batch(10, 1)) == 2
+    assert redis_client.llen(QUEUE_KEY) == 0
+
+    dispatcher = MailDispatcher(config, MailQueue(RedisCache(), worker_id="worker-2"))
+    try:
+        # Heartbeat ainda válido: os emails não são devolvidos
+        assert dispatcher.run_once() == 0
+        redis_client.delete(crashed.heartbeat_key("worker-1"))
+        assert dispatcher.run_once() == 2
+    finally:
+        dispatcher.connection.close()
+
+    assert [to for _, to in smtp_server.handler.messages] == [
+        ["ana@exemplo.com"],
+        ["bia@exemplo.com"],
+    ]
+    assert redis_client.llen(crashed.processing_key("worker-1")) == 0
+    assert redis_client.smembers("mail:workers") == {b"worker-2"}
+
+
+def test_reset_request_only_enqueues_the_email(client, redis_client):
+    user = {"email": "ana@exemplo.com", "username": "ana", "password": "segredo"}
+    client.post("/api/users", json=user)
+
+    for address in ("ana@exemplo.com", "outra@exemplo.com"):
+        response = client.post("/api/auth/reset-password", json={"email": address})
+        assert response.status_code == 200
+
+    # Apenas o email cadastrado é enfileirado; nenhum envio na requisição
+    jobs = [RedisCache().deserialize(d) for d in redis_client.lrange(QUEUE_KEY, 0, -1)]
+    assert [(job["to"], job["attempts"]) for job in jobs] == [("ana@exemplo.com", 0)]
+    token = redis_client.keys("password_reset:*")[0].decode("utf-8").split(":", 1)[1]
+    text = email.message_from_string(jobs[0]["message"]).get_payload(0)
+    assert f"/reset-password/{token}" in text.get_payload(decode=True).decode("utf-8")
+
+
+def test_temporary_failure_is_retried_after_backoff(app, redis_client, config):
+    unreachable = type(
+        "UnreachableConfig", (config,), {"MAIL_PORT": _free_port(), "MAIL_TIMEOUT": 1}
+    )
+    queue = MailQueue(RedisCache(), worker_id="worker-1")
+    queue.enqueue("ana@exemplo.com", _message(config, "ana@exemplo.com"))
+
+    dispatcher = MailDispatcher(unreachable, queue)
+    assert dispatcher.run_once() == 0
+
+    assert redis_client.llen(DEAD_KEY) == 0
+    [(data, due)] = redis_client.zrange(RETRY_KEY, 0, -1, withscores=True)
+    assert queue.redis.deserialize(data)["attempts"] == 1
+    # Só volta à fila quando a nova tentativa vence
+    assert queue.promote_due_retries(now=due - 1) == 0
+    assert queue.promote_due_retries(now=due) == 1
+    assert redis_client.llen(QUEUE_KEY) == 1
+    assert redis_client.llen(queue.processing_key("worker-1")) == 0
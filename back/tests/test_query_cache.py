@@ -0,0 +1,30 @@
+from app.lib.redis.rediscache import RedisCache
+from app.lib.redis.taskcache import TaskCache
+
+USER = "usuario"
+PAGE = {"tasks": [{"id": "1"}], "next_cursor": None}
+
+
+def test_page_stored_only_for_current_version(app):
+    cache = TaskCache(RedisCache())
+    _, refresh, version = cache.get_query_page(USER, "status")
+    assert refresh
+
+    # Uma alteração durante a consulta: a página lida não é gravada
+    cache.bump_version(USER)
+    cache.set_query_page(USER, "status", PAGE, version)
+    page, _, current = cache.get_query_page(USER, "status")
+    assert page is None and current == version + 1
+
+    cache.set_query_page(USER, "status", PAGE, current)
+    assert cache.get_query_page(USER, "status")[0] == PAGE
+
+
+def test_page_of_previous_version_is_not_served(app):
+    cache = TaskCache(RedisCache())
+    _, version = cache.get_search_page(USER, "termo")
+    cache.set_search_page(USER, "termo", PAGE, version)
+    assert cache.get_search_page(USER, "termo") == (PAGE, version)
+
+    cache.bump_version(USER)
+    assert cache.get_search_page(USER, "termo") == (None, version + 1)
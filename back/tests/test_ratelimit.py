@@ -0,0 +1,44 @@
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.config import config_by_name
+from app.lib.redis.ratelimit import RateLimiter
+from app.lib.redis.rediscache import RedisCache
+
+
+@pytest.fixture
+def config(monkeypatch):
+    # Os testes desativam o limite por padrão (conftest)
+    configuration = config_by_name["testing"]
+    monkeypatch.setattr(configuration, "RATE_LIMIT_ENABLED", True)
+    return configuration
+
+
+def login(client, email):
+    return client.post("/api/auth/login", json={"email": email, "password": "x"})
+
+
+def test_login_limited_per_email(app, client, config):
+    for _ in range(config.RATE_LIMIT_LOGIN_EMAIL):
+        assert login(client, "ana@exemplo.com").status_code == 401
+
+    response = login(client, " ANA@exemplo.com")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # O bucket do IP ainda tem tokens para outros emails
+    assert login(client, "bia@exemplo.com").status_code == 401
+
+
+def test_attempts_allowed_when_redis_is_down(app, config, monkeypatch):
+    redis = RedisCache(config)
+
+    def unavailable(script):
+        def run(keys, args):
+            raise ConnectionError("Redis indisponível")
+
+        return run
+
+    monkeypatch.setattr(redis, "script", unavailable)
+    limiter = RateLimiter(redis, config)
+
+    assert limiter.hit("login", ip="127.0.0.1", email="ana@exemplo.com") is None
@@ -0,0 +1,55 @@
+import re
+
+import pytest
+from pymongo import ASCENDING
+
+from app.lib.tasks import SEARCH_MAX_LENGTH, TaskService
+
+from tests.test_tasks import create
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """
+    O mongomock não implementa ``$text``: a busca textual é trocada por uma
+    expressão regular no título, e cada consulta ao MongoDB é registrada.
+    """
+    calls = []
+
+    def search_query(user_id, terms):
+        calls.append(terms)
+        mongo_filter = {"user_id": user_id, "titulo": re.compile(re.escape(terms))}
+        return mongo_filter, None, [("_id", ASCENDING)]
+
+    monkeypatch.setattr(TaskService, "_search_query", staticmethod(search_query))
+    return calls
+
+
+def search(client, headers, q, **params):
+    return client.get(
+        "/api/tasks/search", query_string={"q": q, **params}, headers=headers
+    )
+
+
+@pytest.mark.parametrize("q", ["", "   ", "x" * (SEARCH_MAX_LENGTH + 1)])
+def test_invalid_terms_are_rejected(client, auth_headers, searches, q):
+    assert search(client, auth_headers, q).status_code == 400
+    assert searches == []
+
+
+def test_search_pages_are_cached_until_a_write(client, auth_headers, searches):
+    create(client, auth_headers, titulo="reunião de equipe")
+    task = create(client, auth_headers, titulo="reunião com cliente")
+    create(client, auth_headers, titulo="relatório")
+
+    first = search(client, auth_headers, "reunião", limit=1).get_json()
+    second = search(client, auth_headers, "reunião", limit=1).get_json()
+    assert second == first
+    assert len(first["tasks"]) == 1 and first["next_cursor"]
+    assert len(searches) == 1
+
+    client.delete(f"/api/tasks/{task['id']}", headers=auth_headers)
+    page = search(client, auth_headers, "reunião", limit=1).get_json()
+    assert [t["titulo"] for t in page["tasks"]] == ["reunião de equipe"]
+    assert page["next_cursor"] is None
+    assert len(searches) == 2
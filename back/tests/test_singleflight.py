@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from app.config import config_by_name
+from app.lib.redis import singleflight
+from app.lib.redis.rediscache import RedisCache
+
+
+@pytest.fixture
+def redis(app):
+    return RedisCache(config_by_name["testing"])
+
+
+def fail():
+    raise AssertionError("recalculado fora do processo que detém o lock")
+
+
+def test_stale_value_served_while_another_process_refreshes(redis):
+    lock = redis.lock("tasks:1:index")
+    assert lock.acquire()
+
+    value = singleflight.refresh(redis, "tasks:1:index", "antigo", fail, fail)
+
+    assert value == "antigo"
+    lock.release()
+
+
+def test_missing_value_waits_and_reads_the_refreshed_entry(redis):
+    lock = redis.lock("tasks:1:index")
+    assert lock.acquire()
+    cache = {}
+    result = {}
+
+    def waiter():
+        result["value"] = singleflight.refresh(
+            redis, "tasks:1:index", None, lambda: cache.get("value"), fail
+        )
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    cache["value"] = "novo"
+    lock.release()
+    thread.join(timeout=5)
+
+    assert result["value"] == "novo"
+
+
+def test_lock_holder_computes_once(redis):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "novo"
+
+    assert singleflight.refresh(redis, "tasks:1:index", None, lambda: None, compute)
+    assert calls == [1]
+    # O lock é liberado ao final do recálculo
+    assert redis.lock("tasks:1:index").acquire(blocking=False)
+
+
+def test_early_refresh_only_near_expiration():
+    assert singleflight.should_refresh(0, 0.1)
+    assert not singleflight.should_refresh(60, 0)
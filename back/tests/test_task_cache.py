@@ -0,0 +1,98 @@
+"""
+Scripts Lua do TaskCache (PUT/REMOVE/LOAD/REBUILD) sobre o fakeredis:
+escritas concorrentes chegam ao Redis em qualquer ordem.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.lib.redis.rediscache import RedisCache
+from app.lib.redis.taskcache import TaskCache
+
+USER = "usuario"
+JAN = datetime(2025, 1, 1)
+FEB = datetime(2025, 2, 1)
+
+
+@pytest.fixture
+def cache(app):
+    return TaskCache(RedisCache())
+
+
+def task(titulo, data_vencimento):
+    return {"id": "t1", "titulo": titulo, "data_vencimento": data_vencimento}
+
+
+def index(cache):
+    members, _ = cache.index_page(USER, None, 10)
+    return members
+
+
+def test_out_of_order_puts_keep_newest_revision(cache):
+    cache.rebuild_index(USER, [("t1", 1, JAN)])
+    # A revisão 3 chega antes da 2
+    cache.put(USER, "t1", task("terceira", FEB), FEB, 3, old_data_vencimento=JAN)
+    cache.put(USER, "t1", task("segunda", JAN), JAN, 2, old_data_vencimento=JAN)
+
+    assert cache.get_item(USER, "t1")["titulo"] == "terceira"
+    assert index(cache) == [TaskCache.index_member(FEB, "t1")]
+
+
+def test_late_put_after_delete_is_ignored(cache):
+    cache.rebuild_index(USER, [("t1", 1, JAN)])
+    cache.remove(USER, "t1", JAN, 1)
+    # Alteração da revisão 1 que chega depois da exclusão
+    cache.put(USER, "t1", task("atrasada", FEB), FEB, 1, old_data_vencimento=JAN)
+
+    assert cache.get_item(USER, "t1") is None
+    assert index(cache) == []
+
+
+def test_load_skips_tasks_with_another_cached_revision(cache):
+    cache.put(USER, "t1", task("nova", JAN), JAN, 2)
+    # Leitura do MongoDB anterior à alteração
+    cache.set_items(
+        USER, {"t1": task("antiga", JAN), "t2": task("outra", JAN)}, {"t1": 1, "t2": 1}
+    )
+
+    assert cache.get_item(USER, "t1")["titulo"] == "nova"
+    assert cache.get_item(USER, "t2")["titulo"] == "outra"
+
+
+def test_put_without_cached_revision_drops_complete_index(cache):
+    cache.rebuild_index(USER, [("t1", 1, JAN)])
+    cache.redis.redis_client.hdel(TaskCache.revisions_key(USER), "t1")
+    # Sem a revisão, o membro atual do índice é desconhecido
+    cache.put(USER, "t1", task("nova", FEB), FEB, 2, old_data_vencimento=JAN)
+
+    assert cache.index_page(USER, None, 10) == (None, True)
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        # Alteração de uma tarefa lida pela reconstrução
+        lambda cache: cache.put(
+            USER, "t1", task("nova", FEB), FEB, 2, old_data_vencimento=JAN
+        ),
+        # Criação de uma tarefa que a reconstrução não viu
+        lambda cache: cache.put(USER, "t2", task("criada", JAN), JAN, 1),
+    ],
+)
+def test_rebuild_racing_a_write_drops_the_cache(cache, write):
+    # A reconstrução leu as tarefas antes da escrita, que chega primeiro
+    read = [("t1", 1, JAN)]
+    write(cache)
+    cache.rebuild_index(USER, read)
+
+    assert cache.index_page(USER, None, 10) == (None, True)
+    assert cache.get_items(USER, ["t1", "t2"]) == [None, None]
+
+
+def test_rebuild_keeps_deleted_tasks_out(cache):
+    cache.rebuild_index(USER, [("t1", 1, JAN), ("t2", 1, FEB)])
+    cache.remove(USER, "t2", FEB, 1)
+    cache.rebuild_index(USER, [("t1", 1, JAN)])
+
+    assert index(cache) == [TaskCache.index_member(JAN, "t1")]
@@ -0,0 +1,91 @@
+"""
+Scripts Lua do TaskStats (UPDATE/REBUILD) sobre o fakeredis: transições,
+revisões fora de ordem e reconstruções concorrentes com escritas.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.lib.redis.rediscache import RedisCache
+from app.lib.redis.taskcache import TaskCache
+from app.lib.redis.taskstats import TaskStats
+
+USER = "usuario"
+PAST = datetime(2020, 1, 1)
+FUTURE = datetime(2999, 1, 1)
+
+
+@pytest.fixture
+def stats(app):
+    return TaskStats(RedisCache())
+
+
+def rebuild(stats, tasks):
+    version = TaskCache(stats.redis).get_version(USER)
+    return stats.rebuild(USER, version, tasks)
+
+
+def test_create_update_delete_transitions(stats):
+    rebuild(stats, [("t1", 1, "pendente", PAST)])
+    stats.put(USER, "t2", 1, "pendente", FUTURE, created=True)
+    assert stats.get(USER) == {
+        "total": 2,
+        "status": {"pendente": 2},
+        "pending": 2,
+        "overdue": 1,
+    }
+
+    stats.put(USER, "t1", 2, "concluida", PAST)
+    stats.remove(USER, "t2", 1)
+    assert stats.get(USER) == {
+        "total": 1,
+        "status": {"concluida": 1},
+        "pending": 0,
+        "overdue": 0,
+    }
+
+
+def test_stale_revision_is_not_counted_twice(stats):
+    rebuild(stats, [("t1", 2, "concluida", PAST)])
+    # Alteração da revisão 1, já vista pela reconstrução
+    stats.put(USER, "t1", 1, "pendente", PAST)
+    stats.put(USER, "t1", 2, "pendente", PAST)
+
+    assert stats.get(USER)["status"] == {"concluida": 1}
+
+
+def test_late_update_after_delete_is_ignored(stats):
+    rebuild(stats, [("t1", 1, "pendente", PAST)])
+    stats.remove(USER, "t1", 1)
+    stats.put(USER, "t1", 1, "concluida", PAST)
+
+    assert stats.get(USER) == {"total": 0, "status": {}, "pending": 0, "overdue": 0}
+
+
+def test_update_without_prior_state_drops_counters(stats):
+    rebuild(stats, [("t1", 1, "pendente", PAST)])
+    # Tarefa alterada que os contadores não conhecem (retorno -1)
+    stats.put(USER, "t9", 2, "concluida", PAST)
+
+    assert stats.get(USER) is None
+    for key in stats._keys(USER):
+        assert not stats.redis.redis_client.exists(key)
+
+
+def test_update_without_counters_is_ignored(stats):
+    stats.put(USER, "t1", 1, "pendente", PAST, created=True)
+
+    assert stats.get(USER) is None
+
+
+def test_rebuild_rejected_after_version_bump(stats):
+    cache = TaskCache(stats.redis)
+    version = cache.get_version(USER)
+    # Uma alteração incrementa a versão durante a agregação
+    cache.bump_version(USER)
+    summary, stored = stats.rebuild(USER, version, [("t1", 1, "pendente", FUTURE)])
+
+    assert not stored
+    assert summary["total"] == 1
+    assert stats.get(USER) is None
@@ -0,0 +1,114 @@
+import json
+
+from bson import ObjectId
+
+from app.lib.redis.taskcache import TaskCache
+
+TASK = {
+    "titulo": "Tarefa",
+    "descricao": "descrição",
+    "status": "pendente",
+    "data_vencimento": "2025-01-01T00:00:00",
+}
+
+
+def create(client, headers, **fields):
+    response = client.post("/api/tasks", json={**TASK, **fields}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def test_listing_survives_write_during_index_rebuild(
+    client, auth_headers, redis_client, monkeypatch
+):
+    create(client, auth_headers, titulo="a", data_vencimento="2025-01-01T00:00:00")
+    create(client, auth_headers, titulo="b", data_vencimento="2025-01-02T00:00:00")
+    create(client, auth_headers, titulo="c", data_vencimento="2025-01-03T00:00:00")
+    for key in redis_client.keys("tasks:*:index"):
+        redis_client.delete(key)
+
+    rebuild_index = TaskCache.rebuild_index
+
+    def racing_rebuild(self, user_id, tasks, delta=0):
+        # Uma criação concorrente chega ao Redis antes da reconstrução
+        created = ObjectId()
+        self.put(user_id, created, {"id": str(created)}, "2025-01-04T00:00:00", 1)
+        return rebuild_index(self, user_id, tasks, delta)
+
+    monkeypatch.setattr(TaskCache, "rebuild_index", racing_rebuild)
+    response = client.get("/api/tasks?limit=2", headers=auth_headers)
+    assert response.status_code == 200
+    page = response.get_json()
+    assert [t["titulo"] for t in page["tasks"]] == ["a", "b"]
+
+    monkeypatch.setattr(TaskCache, "rebuild_index", rebuild_index)
+    response = client.get(
+        f"/api/tasks?limit=2&cursor={page['next_cursor']}", headers=auth_headers
+    )
+    assert [t["titulo"] for t in response.get_json()["tasks"]] == ["c"]
+
+
+def test_matching_etag_returns_not_modified(client, auth_headers):
+    create(client, auth_headers)
+    response = client.get("/api/tasks", headers=auth_headers)
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/tasks", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+
+
+def test_write_changes_etag(client, auth_headers):
+    task = create(client, auth_headers)
+    etag = client.get("/api/tasks", headers=auth_headers).headers["ETag"]
+
+    response = client.put(
+        f"/api/tasks/{task['id']}", json={"status": "concluida"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/tasks", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["tasks"][0]["status"] == "concluida"
+
+
+def test_stream_returns_every_task_in_listing_format(client, auth_headers):
+    for day in (3, 1, 2):
+        create(client, auth_headers, titulo=str(day), data_vencimento=f"2025-01-0{day}")
+
+    response = client.get("/api/tasks?stream=true&limit=1", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    page = json.loads(response.data)
+    assert [t["titulo"] for t in page["tasks"]] == ["1", "2", "3"]
+    assert page["next_cursor"] is None
+
+
+def test_stats_follow_writes_and_rebuild_from_mongodb(
+    client, auth_headers, redis_client
+):
+    create(client, auth_headers, data_vencimento="2020-01-01T00:00:00")
+    create(client, auth_headers, data_vencimento="2999-01-01T00:00:00")
+    done = create(client, auth_headers, data_vencimento="2020-01-01T00:00:00")
+    client.put(
+        f"/api/tasks/{done['id']}", json={"status": "concluida"}, headers=auth_headers
+    )
+    expected = {
+        "total": 3,
+        "status": {"concluida": 1, "pendente": 2},
+        "pending": 2,
+        "overdue": 1,
+    }
+
+    response = client.get("/api/tasks/stats", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json() == expected
+
+    # Sem os contadores, as estatísticas são reconstruídas pela agregação
+    keys = redis_client.keys("tasks:*:stats*")
+    assert keys
+    redis_client.delete(*keys)
+    assert client.get("/api/tasks/stats", headers=auth_headers).get_json() == expected
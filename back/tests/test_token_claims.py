@@ -0,0 +1,25 @@
+from datetime import UTC, datetime
+
+from flask_jwt_extended import create_access_token, decode_token
+
+from app import create_app
+from app.lib.redis.usercache import UserCache
+
+
+def test_claims_read_from_app_database(monkeypatch, redis_client):
+    # O ambiente do processo não deve ser usado no lugar do da aplicação
+    monkeypatch.setenv("ENV", "development")
+    app = create_app("testing")
+    users = app.mongodb.get_collection("users")
+    user_id = users.insert_one(
+        {"email": "ana@exemplo.com", "username": "ana", "created_at": datetime.now(UTC)}
+    ).inserted_id
+    try:
+        with app.app_context():
+            claims = decode_token(create_access_token(identity=str(user_id)))
+    finally:
+        users.delete_one({"_id": user_id})
+        redis_client.delete(UserCache.profile_key(str(user_id)))
+
+    assert claims["username"] == "ana"
+    assert claims["email"] == "ana@exemplo.com"
@@ -0,0 +1,27 @@
+import pytest
+
+from app.lib.passwords import PasswordHasher
+
+USER = {"email": "ana@exemplo.com", "username": "ana", "password": "segredo"}
+
+
+@pytest.mark.parametrize(
+    "duplicate, message",
+    [
+        ({"username": "outra"}, "Este email já está em uso"),
+        ({"email": "outra@exemplo.com"}, "Este nome de usuário já está em uso"),
+    ],
+)
+def test_duplicate_user_is_rejected_before_hashing(
+    client, monkeypatch, duplicate, message
+):
+    assert client.post("/api/users", json=USER).status_code == 201
+
+    def fail(self, password):
+        raise AssertionError("hash calculado para um usuário duplicado")
+
+    monkeypatch.setattr(PasswordHasher, "hash", fail)
+    response = client.post("/api/users", json={**USER, **duplicate})
+
+    assert response.status_code == 400
+    assert response.get_json()["message"] == message
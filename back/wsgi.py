@@ -0,0 +1,7 @@
+import os
+from app import create_app
+
+# Ponto de entrada de produção: gunicorn -c gunicorn.conf.py wsgi:app
+env = os.getenv("ENV", "production")
+
+app = create_app(env)